@@ -0,0 +1,90 @@
+import contextlib
+import types
+
+
+class FakeElement:
+    """
+    Stand-in for a Selenium WebElement.
+    """
+
+    def __init__(self, driver, locator):
+        self.driver = driver
+        self.locator = locator
+
+    def click(self):
+        self.driver.on_click(self.locator)
+
+    def send_keys(self, *keys):
+        pass
+
+
+class FakeDriver:
+    """
+    Offline stand-in for the Swag Labs Chrome WebDriver.
+    Every element exists and clicks move between pages, so SwagLabsEnv runs
+    its full action logic without a browser or network.
+    """
+
+    PAGES = {
+        "login-button": "inventory.html",
+        "shopping_cart_link": "cart.html",
+        "checkout": "checkout-step-one.html",
+        "continue": "checkout-step-two.html",
+        "finish": "checkout-complete.html",
+        "logout_sidebar_link": "",
+        "back-to-products": "inventory.html",
+    }
+
+    def __init__(self, url="https://www.saucedemo.com/"):
+        self.url = url
+        self.current_url = url
+
+    def on_click(self, locator):
+        page = self.PAGES.get(locator)
+        if page is not None:
+            self.current_url = self.url + page
+
+    def get(self, url):
+        self.current_url = url
+
+    def find_element(self, by, value):
+        return FakeElement(self, value)
+
+    def find_elements(self, by, value):
+        return [FakeElement(self, value) for _ in range(3)]
+
+    def delete_all_cookies(self):
+        pass
+
+    def execute_script(self, script, *args):
+        return None
+
+    def quit(self):
+        pass
+
+
+@contextlib.contextmanager
+def no_sleep(module):
+    """
+    Temporarily replaces `module.time` so its time.sleep() calls return immediately.
+    """
+
+    original = module.time
+    module.time = types.SimpleNamespace(time=original.time, sleep=lambda seconds: None)
+    try:
+        yield
+    finally:
+        module.time = original
+
+
+def make_fake_swaglabs_env(persona="functional"):
+    """
+    Builds a SwagLabsEnv driven by FakeDriver.
+    Use together with no_sleep(envs.swaglabs.env) to skip the env's fixed waits.
+    """
+
+    from envs.swaglabs.env import SwagLabsEnv
+
+    env = SwagLabsEnv(persona=persona)
+    env.driver = FakeDriver(env.url)
+    return env
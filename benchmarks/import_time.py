@@ -0,0 +1,76 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Heavy modules we want to keep out of CLI startup unless they're needed
+HEAVY_MODULES = ["torch", "stable_baselines3", "selenium", "webdriver_manager", "Box2D"]
+
+# Each target runs in a fresh interpreter
+TARGETS = {
+    "import src.eval": "import src.eval",
+    "import src.train": "import src.train",
+    "eval --help": "import sys; sys.argv = ['eval', '--help']\ntry:\n    import src.eval; src.eval.main()\nexcept SystemExit:\n    pass",
+    "make lunar_lander env": "from envs import registry; registry.make_env('lunar_lander', persona='baseline').close()",
+    "import swaglabs env": "from envs import registry; registry.load(registry.get_app('swaglabs')['entry_point'])",
+}
+
+PROBE = """
+import sys, time, json, io, contextlib
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    exec({code!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(code, repeat=5):
+    """
+    Times `code` in fresh interpreters and reports which heavy modules it loaded.
+
+    Return:
+        dict with median/min seconds (import + run) and the heavy modules loaded
+    """
+
+    times, loaded = [], []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        loaded = result["loaded"]
+
+    return {"median_s": statistics.median(times), "min_s": min(times), "loaded": loaded}
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--json", default=None)
+    args = p.parse_args()
+
+    results = {}
+    for name, code in TARGETS.items():
+        try:
+            results[name] = measure(code, repeat=args.repeat)
+        except subprocess.CalledProcessError as e:
+            results[name] = {"error": e.stderr.strip().splitlines()[-1] if e.stderr else str(e)}
+
+        result = results[name]
+        if "error" in result:
+            print(f"{name:<24} failed: {result['error']}")
+        else:
+            print(f"{name:<24} {result['median_s'] * 1000:8.1f} ms (min {result['min_s'] * 1000:.1f} ms)  "
+                  f"heavy: {', '.join(result['loaded']) or '-'}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from envs import registry
+
+# Synthetic step infos for RewardManager.compute, one per app
+LUNAR_INFO = {
+    "x_pos": 0.1, "y_pos": 0.8, "x_vel": 0.2, "y_vel": -0.6, "angle": 0.05, "angular_vel": 0.01,
+    "leg1_contact": False, "leg2_contact": False, "landed": False, "crashed": False,
+}
+SWAGLABS_INFO = {
+    "success": True, "error": False, "latency": 0.01, "visited_pages": {"login", "inventory", "cart"},
+    "touched_selectors": set(), "validation_errors": 0, "successes": 3, "step": 4, "logged_in": True,
+    "action": 3, "page": "cart",
+}
+
+
+def time_per_op(fn, number=1000, repeat=5):
+    """
+    Runs `fn` `number` times per round for `repeat` rounds.
+
+    Return:
+        seconds per call of each round
+    """
+
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return rounds
+
+
+def summarize_rounds(rounds):
+    """
+    Median of the rounds and its standard error, estimated from the median
+    absolute deviation so one slow round (GC, a noisy neighbour) doesn't inflate it.
+    """
+
+    median = statistics.median(rounds)
+    mad = statistics.median(abs(value - median) for value in rounds)
+    stderr = 1.2533 * 1.4826 * mad / len(rounds) ** 0.5 if len(rounds) > 1 else 0.0
+    return {"median": median, "stderr": stderr, "rounds": rounds}
+
+
+def bench_lunar_step(steps=2000, repeat=5):
+    """
+    Raw LunarLander-v3 step vs. LunarLanderEnv.step (wrapper + persona reward).
+    """
+
+    import gymnasium as gym
+
+    results = {}
+    envs = {"lunar.raw_step": gym.make("LunarLander-v3")}
+    for persona in registry.get_app("lunar_lander")["personas"]:
+        envs[f"lunar.wrapper_step.{persona}"] = registry.make_env("lunar_lander", persona=persona)
+
+    for name, env in envs.items():
+        env.reset(seed=0)
+        action_space = env.action_space
+        action_space.seed(0)
+
+        def step():
+            _, _, terminated, truncated, _ = env.step(action_space.sample())
+            if terminated or truncated:
+                env.reset()
+
+        results[name] = time_per_op(step, number=steps, repeat=repeat)
+        env.close()
+
+    return results
+
+
+def bench_rewards(number=20000, repeat=5):
+    """
+    RewardManager.compute for every persona of both apps.
+    """
+
+    from envs.lunar_lander.reward import RewardManager as LunarRewardManager
+    from envs.swaglabs.reward import RewardManager as SwagLabsRewardManager
+
+    results = {}
+    for persona in ["speedrunner", "safe"]:
+        manager = LunarRewardManager(persona)
+        results[f"reward.lunar.{persona}"] = time_per_op(lambda: manager.compute(LUNAR_INFO), number=number, repeat=repeat)
+
+    for persona in registry.get_app("swaglabs")["personas"]:
+        manager = SwagLabsRewardManager(persona)
+        results[f"reward.swaglabs.{persona}"] = time_per_op(lambda: manager.compute(SWAGLABS_INFO), number=number, repeat=repeat)
+
+    return results
+
+
+def bench_predict(model_dir="models", number=500, repeat=5):
+    """
+    model.predict latency for every shipped model zip.
+    """
+
+    import numpy as np
+    from stable_baselines3 import PPO, A2C
+
+    results = {}
+    for path in sorted(glob.glob(os.path.join(model_dir, "*", "*.zip"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        algo = A2C if "_a2c_" in name else PPO
+        model = algo.load(path, device="cpu")
+        obs = np.zeros(model.observation_space.shape, dtype=np.float32)
+
+        results[f"predict.{name}"] = time_per_op(lambda: model.predict(obs, deterministic=True), number=number, repeat=repeat)
+
+    return results
+
+
+def bench_eval(episodes=3, repeat=5):
+    """
+    Eval throughput, in seconds per env step. Episodes are reset with the first
+    seeds of the eval seed bank and the random policy is reseeded every round,
+    so each round replays exactly the same steps. Swag Labs runs against the offline stand-in.
+    """
+
+    import numpy as np
+    import envs.swaglabs.env as swaglabs_env
+    from src.eval import evaluate_lunar, evaluate_swaglabs
+    from src.suite import load_seed_bank
+    from .fake_swaglabs import make_fake_swaglabs_env, no_sleep
+
+    class RandomPolicy:
+        def __init__(self, action_space):
+            self.action_space = action_space
+            self.action_space.seed(0)
+            self.steps = 0
+
+        def predict(self, obs, deterministic=True):
+            self.steps += 1
+            return np.int64(self.action_space.sample()), None
+
+    def time_per_step(evaluate, env, seeds):
+        rounds = []
+        for _ in range(repeat):
+            policy = RandomPolicy(env.action_space)
+            start = time.perf_counter()
+            evaluate(policy, env, verbose=False, seeds=seeds)
+            rounds.append((time.perf_counter() - start) / policy.steps)
+        return rounds
+
+    seeds = load_seed_bank()
+    results = {}
+
+    env = registry.make_env("lunar_lander", persona="safe")
+    results["eval.lunar.step"] = time_per_step(evaluate_lunar, env, seeds[:episodes])
+    env.close()
+
+    with no_sleep(swaglabs_env):
+        env = make_fake_swaglabs_env(persona="functional")
+        results["eval.swaglabs_fake.step"] = time_per_step(evaluate_swaglabs, env, seeds[:episodes * 10])
+        env.close()
+
+    return results
+
+
+def bench_export(rows=10000, repeat=5):
+    """
+    export_metrics_csv throughput, in seconds per row.
+    """
+
+    import contextlib
+    import io
+    from src.export import export_metrics_csv
+
+    metrics = [
+        {"episode": i + 1, "total_reward": 100.0 + i, "landing_type": "perfect", "crashed": False, "landed": True, "landing_time": 300}
+        for i in range(rows)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        rounds = time_per_op(lambda: export_metrics_csv(metrics, export_dir=tmp), number=1, repeat=repeat)
+
+    return {"export.csv_row": [seconds / rows for seconds in rounds]}
+
+
+BENCHMARKS = {
+    "lunar_step": bench_lunar_step,
+    "rewards": bench_rewards,
+    "predict": bench_predict,
+    "eval": bench_eval,
+    "export": bench_export,
+}
+
+
+def fingerprint():
+    """
+    Describes the machine and library versions the results were measured on.
+    """
+
+    info = {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+    for module in ["numpy", "torch", "gymnasium", "stable_baselines3"]:
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    return info
+
+
+def run(names, out, passes=5):
+    """
+    Runs the benchmarks in `passes` interleaved passes of one round each, so every
+    benchmark's rounds are spread over the whole run and their spread includes
+    slow drift of the machine (frequency scaling, other load), not just jitter.
+    """
+
+    rounds = {}
+    for i in range(passes):
+        print(f"Pass {i + 1}/{passes}...")
+        for name in names:
+            for bench, timings in BENCHMARKS[name](repeat=1).items():
+                rounds.setdefault(bench, []).extend(timings)
+
+    results = {}
+    for bench, timings in rounds.items():
+        results[bench] = summarize_rounds(timings)
+        print(f"  {bench:<48} {results[bench]['median'] * 1e6:12.2f} us  +/- {results[bench]['stderr'] * 1e6:.2f}")
+
+    payload = {"time": time.time(), "fingerprint": fingerprint(), "results": results}
+
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as file:
+        json.dump(payload, file, indent=2)
+    print(f"Saved benchmark results to: {out}")
+
+
+def compare(baseline_path, current_path, threshold=0.05, sigmas=3.0, overrides=None):
+    """
+    Compares two result files. A benchmark regresses when its median time per op
+    grew by more than `sigmas` standard errors of the difference (measured from
+    the rounds of both runs) and by more than its threshold (a fraction, e.g.
+    0.05 = 5% slower), so neither noise nor negligible slowdowns fail the gate.
+
+    Return:
+        list of regressed benchmark names
+    """
+
+    overrides = overrides or {}
+
+    with open(baseline_path, "r") as file:
+        baseline = json.load(file)
+    with open(current_path, "r") as file:
+        current = json.load(file)
+
+    if baseline["fingerprint"] != current["fingerprint"]:
+        print("Warning: results come from different machines or library versions, comparison may be noisy.")
+
+    regressions = []
+    for name, base in sorted(baseline["results"].items()):
+        if name not in current["results"]:
+            print(f"  {name:<48} missing in {current_path}")
+            continue
+
+        # Files from before rounds were recorded hold a bare median
+        base = base if isinstance(base, dict) else summarize_rounds([base])
+        new = current["results"][name]
+        new = new if isinstance(new, dict) else summarize_rounds([new])
+        delta = new["median"] - base["median"]
+        noise = (base["stderr"] ** 2 + new["stderr"] ** 2) ** 0.5
+        change = delta / base["median"] if base["median"] else 0.0
+        limit = overrides.get(name, threshold)
+        regressed = change > limit and delta > sigmas * noise
+
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<48} {base['median'] * 1e6:10.2f} us -> {new['median'] * 1e6:10.2f} us  {change * 100:+7.1f}%  "
+              f"(noise {noise / base['median'] * 100 if base['median'] else 0.0:.1f}%)  {'REGRESSION' if regressed else 'ok'}")
+
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run")
+    run_p.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    run_p.add_argument("--out", default="benchmarks/results/latest.json")
+    run_p.add_argument("--passes", type=int, default=5, help="interleaved rounds per benchmark")
+
+    compare_p = sub.add_parser("compare")
+    compare_p.add_argument("baseline")
+    compare_p.add_argument("current")
+    compare_p.add_argument("--threshold", type=float, default=0.05, help="smallest slowdown that counts, as a fraction")
+    compare_p.add_argument("--sigmas", type=float, default=3.0, help="slowdown must exceed this many standard errors of the difference")
+    compare_p.add_argument("--override", nargs="*", default=[], help="per-benchmark thresholds, e.g. predict.lunar_ppo_safe_500000=0.3")
+
+    args = p.parse_args()
+
+    if args.command == "run":
+        run(args.only, args.out, passes=args.passes)
+    else:
+        overrides = {name: float(value) for name, value in (item.split("=") for item in args.override)}
+        regressions = compare(args.baseline, args.current, threshold=args.threshold, sigmas=args.sigmas, overrides=overrides)
+
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed beyond threshold: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,35 @@ class LunarLanderEnv(gym.Wrapper):
     """
     Wrapper for LunarLander-v3 environment.
     Adds velocity, tilt, and landing/crashed info to RewardManager.
+
+    With action_repeat=k, each step() applies the action for up to k physics
+    frames and sums their rewards. Landing/crash detection still runs on
+    every frame, and the repeat stops early when the episode ends.
+
+    With reward_personas set, every persona's reward is also computed on the
+    same frames and returned in info["persona_rewards"], so one simulation
+    can train several personas (see src/multi_persona.py).
     """
 
-    def __init__(self, persona="baseline", render_mode=None, seed=None):
+    def __init__(self, persona="baseline", render_mode=None, seed=None, action_repeat=1, reward_personas=None):
         env = gym.make("LunarLander-v3", render_mode=render_mode)
         super().__init__(env)
 
+        if action_repeat < 1:
+            raise ValueError(f"action_repeat must be >= 1, got {action_repeat}")
+
         self.persona = persona
+        self.action_repeat = action_repeat
+        self.initial_seed = seed # seeds the first reset(), later resets continue the same RNG stream
         self.frame_count = 0
         self.landed = False
         self.crashed = False
 
         self.reward_manager = None if persona == "baseline" else RewardManager(persona)
 
+        # One reward manager per extra reward channel (None = the default Gym reward)
+        self.persona_managers = {p: None if p == "baseline" else RewardManager(p) for p in reward_personas or []}
+
     def reset(self, **kwargs):
         """
         Resets the env state for each episode.
@@ -28,7 +44,12 @@ class LunarLanderEnv(gym.Wrapper):
             obs: np.ndarray vector of observations
             info: dict containing episode metrics and physics variables (velocity, position, etc.)
         """
-        obs, info = self.env.reset(seed=kwargs.get("seed", None))
+        seed = kwargs.get("seed", None)
+        if seed is None:
+            seed = self.initial_seed
+        self.initial_seed = None
+
+        obs, info = self.env.reset(seed=seed)
 
         # Reset state
         self.frame_count = 0
@@ -37,24 +58,53 @@ class LunarLanderEnv(gym.Wrapper):
 
         if self.reward_manager:
             self.reward_manager.reset()
+        for manager in self.persona_managers.values():
+            if manager:
+                manager.reset()
 
         return obs, info
 
     def step(self, action):
         """
         Goes forward a single step in the environment using given action.
-        Auto-collects metrics in info dictionary for RewardManager to use.
-        Detects crashes and landings using custom and Gym-provided boolean flags.
+        The action is repeated for `action_repeat` frames (fewer if the episode ends).
 
         Args: 
             action: int or np.ndarray action for the LunarLander agent.
 
         Return: 
             obs: observation vector of the next state.
-            reward: a float reward value (shaped in RewardManager) for the step.
+            reward: a float reward value (shaped in RewardManager), summed over the repeated frames.
             terminated: a boolean that tracks if an episode has ended.
             truncated: a boolean that tracks if an episode reached its time limit.
-            info: contains episode metrics and physics info (velocity, position, etc.)
+            info: contains episode metrics and physics info (velocity, position, etc.) of the last frame,
+                  plus "frames": the number of frames this step ran.
+        """
+        total_reward = 0.0
+        persona_rewards = dict.fromkeys(self.persona_managers, 0.0)
+
+        for frames in range(1, self.action_repeat + 1):
+            obs, reward, terminated, truncated, info = self.step_frame(action)
+            total_reward += reward
+
+            for persona in persona_rewards:
+                persona_rewards[persona] += info["persona_rewards"][persona]
+
+            if terminated or truncated:
+                break
+
+        if persona_rewards:
+            info["persona_rewards"] = persona_rewards
+        info["frames"] = frames
+        info["total_reward"] = float(total_reward)
+
+        return obs, total_reward, terminated, truncated, info
+
+    def step_frame(self, action):
+        """
+        Goes forward a single physics frame using given action.
+        Auto-collects metrics in info dictionary for RewardManager to use.
+        Detects crashes and landings using custom and Gym-provided boolean flags.
         """
         obs, reward, terminated, truncated, info = self.env.step(action)
 
@@ -108,6 +158,13 @@ class LunarLanderEnv(gym.Wrapper):
         info["landed"] = self.landed
         info["crashed"] = self.crashed
 
+        # Reward channels for shared-rollout training, computed on the same info as the persona reward
+        if self.persona_managers:
+            info["persona_rewards"] = {
+                persona: manager.compute(info) if manager else float(reward)
+                for persona, manager in self.persona_managers.items()
+            }
+
         # Apply custom reward shaping based on persona (overwrites default env reward)
         if self.reward_manager:
             reward = self.reward_manager.compute(info)
@@ -0,0 +1,150 @@
+import functools
+import importlib
+
+# App registry. Env modules are only imported when an app is selected, so
+# LunarLander runs never load Selenium and Swag Labs runs never load Box2D.
+# To add a new app, add an entry here pointing at its env class and evaluate function.
+APPS = {
+    "lunar_lander": {
+        "short_name": "lunar",
+        "entry_point": "envs.lunar_lander.env:LunarLanderEnv",
+        "gym_id": "drl/LunarLander-v0",
+        "personas": ["baseline", "speedrunner", "safe"],
+        "env_kwargs": ["persona", "render_mode", "seed", "action_repeat", "reward_personas"],
+        "evaluate": "src.eval:evaluate_lunar",
+        # aggregates per-episode metrics into the evaluate results (used to merge sharded suites)
+        "summarize": "src.eval:summarize_lunar",
+        # info key marking a failure, counted per episode or per step by soak runs
+        "failure_key": "crashed",
+        "failure_scope": "episode",
+        # eval result used to pick the best checkpoint and stop early during training (metric, max/min)
+        "eval_metric": ("landing_rate", "max"),
+        "summary": [
+            ("Landing Rate", "landing_rate", "percent"),
+            ("Crash Rate", "crash_rate", "percent"),
+        ],
+    },
+    "swaglabs": {
+        "short_name": "swaglabs",
+        "entry_point": "envs.swaglabs.env:SwagLabsEnv",
+        "gym_id": "drl/SwagLabs-v0",
+        "personas": ["functional", "explorer"],
+        "env_kwargs": ["persona", "seed", "failures", "shared_browser", "events"],
+        # builds the env's structured event logger (called with the app name), unless one is passed in
+        "events": "src.events:get_logger",
+        # builds the env's failure signature index from a `failures_dir` keyword argument
+        "failure_index": "src.failures:FailureIndex",
+        "evaluate": "src.eval:evaluate_swaglabs",
+        "summarize": "src.eval:summarize_swaglabs",
+        "failure_key": "error",
+        "failure_scope": "step",
+        "eval_metric": ("avg_success", "max"),
+        "summary": [
+            ("Average Success", "avg_success", "float"),
+            ("Average Errors", "avg_error", "float"),
+        ],
+    },
+}
+
+
+# Run options callers pass for any app, with the value that means "not used". An app whose
+# env doesn't take one only accepts that value, so e.g. action_repeat=4 fails instead of being ignored.
+OPTIONS = {
+    "render_mode": None,
+    "seed": None,
+    "action_repeat": 1,
+    "reward_personas": None,
+    "shared_browser": False,
+}
+
+
+def load(entry_point):
+    """
+    Imports and returns the object named by a "module:attribute" entry point.
+    """
+
+    module_name, attr = entry_point.split(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def get_app(app):
+    if app not in APPS:
+        raise ValueError(f"App does not exist: {app}")
+    return APPS[app]
+
+
+def app_names():
+    return list(APPS)
+
+
+def all_personas():
+    personas = []
+    for spec in APPS.values():
+        personas += [persona for persona in spec["personas"] if persona not in personas]
+    return personas
+
+
+def short_name(app):
+    return get_app(app)["short_name"]
+
+
+def summary_metrics(app):
+    """
+    Names of the aggregate results the app's evaluator returns.
+    """
+
+    return ["avg_reward"] + [metric for _, metric, _ in get_app(app)["summary"]]
+
+
+def make_env(app, **kwargs):
+    """
+    Builds the env for `app`, importing its module only now.
+    Apps that log events or index failures get the logger and index named by their "events" and
+    "failure_index" entries, so env modules never import src.
+
+    Raises:
+        ValueError for a persona the app doesn't have, or a keyword argument its env doesn't
+        accept. Options in OPTIONS that are left at their "not used" value (e.g. render_mode=None
+        for Swag Labs) are dropped, and failures_dir is ignored by apps without a failure index.
+    """
+
+    spec = get_app(app)
+    persona = kwargs.get("persona")
+    if persona is not None and persona not in spec["personas"]:
+        raise ValueError(f"Persona {persona!r} does not exist for {app}, choose from: {', '.join(spec['personas'])}")
+
+    failures_dir = kwargs.pop("failures_dir", None)
+    unsupported = [
+        f"{key}={value!r}" for key, value in kwargs.items()
+        if key not in spec["env_kwargs"] and (key not in OPTIONS or value != OPTIONS[key])
+    ]
+    if unsupported:
+        raise ValueError(f"The {app} env does not accept: {', '.join(unsupported)}")
+
+    env_cls = load(spec["entry_point"])
+    if "events" in spec and kwargs.get("events") is None:
+        kwargs["events"] = load(spec["events"])(app)
+    if "failure_index" in spec and failures_dir and kwargs.get("failures") is None:
+        kwargs["failures"] = load(spec["failure_index"])(failures_dir)
+    return env_cls(**{key: value for key, value in kwargs.items() if key in spec["env_kwargs"]})
+
+
+def get_evaluator(app):
+    return load(get_app(app)["evaluate"])
+
+
+def get_summarizer(app):
+    return load(get_app(app)["summarize"])
+
+
+def register_gym_envs():
+    """
+    Registers every app with Gymnasium, so `gym.make("drl/LunarLander-v0", persona="safe")` works.
+    The entry points go through make_env, so nothing is imported until an env is made.
+    """
+
+    import gymnasium as gym
+
+    for app, spec in APPS.items():
+        if spec["gym_id"] not in gym.registry:
+            gym.register(id=spec["gym_id"], entry_point=functools.partial(make_env, app))
@@ -0,0 +1,190 @@
+import time
+
+
+def process_tree_memory(driver):
+    """
+    Resident memory (bytes) of a WebDriver process and the browser it started.
+    Returns 0 if the processes can't be inspected.
+    """
+
+    try:
+        import psutil
+
+        root = psutil.Process(driver.service.process.pid)
+        return sum(process.memory_info().rss for process in [root] + root.children(recursive=True))
+    except Exception:
+        return 0
+
+
+class BrowserPool:
+    """
+    One Chrome process shared by several SwagLabsEnvs in the same process.
+
+    Each env gets its own browser context (created over the DevTools protocol, like
+    an incognito profile), so cookies, local and session storage are isolated, and
+    its own window in that context. The WebDriver session only talks to one window
+    at a time, so envs must be stepped one after another (DummyVecEnv), which is
+    what ContextDriver assumes when it switches windows.
+
+    The browser's first window is never used by an env, so the session outlives
+    any one context. If the browser itself dies, the next new_context() starts a new one.
+    """
+
+    _shared = None
+
+    def __init__(self, start_driver, window_timeout=10.0):
+        self.start_driver = start_driver
+        self.window_timeout = window_timeout  # seconds to wait for a new context's window to be listed
+        self.driver = None
+        self.contexts = {}  # window handle -> browser context id
+        self.active = None
+
+    @classmethod
+    def shared(cls, start_driver):
+        """
+        Process-wide pool, so every env built in this process lands in the same browser.
+        """
+
+        if cls._shared is None:
+            cls._shared = cls(start_driver)
+        return cls._shared
+
+    def alive(self):
+        if not self.driver:
+            return False
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def new_context(self):
+        """
+        Opens a new isolated context with one window.
+
+        Return:
+            ContextDriver for the window, or None if no browser could be started
+
+        Raises:
+            RuntimeError if the window doesn't show up within `window_timeout`
+        """
+
+        if not self.alive():
+            self.quit()
+            self.driver = self.start_driver()
+            if not self.driver:
+                return None
+
+        known = set(self.driver.window_handles)
+        context_id = self.driver.execute_cdp_cmd("Target.createBrowserContext", {"disposeOnDetach": False})["browserContextId"]
+        target_id = self.driver.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": context_id, "newWindow": True},
+        )["targetId"]
+
+        handle = self._wait_for_window(target_id, known)
+        if handle is None:
+            try:
+                self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+            except Exception:
+                pass
+            raise RuntimeError(f"Window of new browser context {context_id} (target {target_id}) was not listed "
+                               f"in window_handles within {self.window_timeout:.0f}s")
+
+        self.contexts[handle] = context_id
+        return ContextDriver(self, handle)
+
+    def _wait_for_window(self, target_id, known):
+        """
+        The window list is updated asynchronously after Target.createTarget, so poll it.
+        ChromeDriver window handles are target ids; fall back to whichever handle is new.
+
+        Return:
+            the new window's handle, or None on timeout
+        """
+
+        deadline = time.monotonic() + self.window_timeout
+        while True:
+            handles = self.driver.window_handles
+            if target_id in handles:
+                return target_id
+
+            new = sorted(set(handles) - known - set(self.contexts))
+            if new:
+                return new[0]
+
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+    def activate(self, handle):
+        if self.active != handle:
+            self.driver.switch_to.window(handle)
+            self.active = handle
+
+    def close_context(self, handle):
+        """
+        Disposes one context and its window. A failure here only affects this context.
+        """
+
+        context_id = self.contexts.pop(handle, None)
+        if self.active == handle:
+            self.active = None
+
+        if context_id and self.alive():
+            try:
+                self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+            except Exception:
+                pass
+
+        # Last context gone, so release the browser's memory too
+        if not self.contexts:
+            self.quit()
+
+    def memory(self):
+        return process_tree_memory(self.driver) if self.driver else 0
+
+    def quit(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+        self.contexts.clear()
+        self.active = None
+
+
+class ContextDriver:
+    """
+    Stands in for a WebDriver inside SwagLabsEnv. Switches to the env's own
+    window before forwarding each call to the shared driver; quit() only
+    closes this env's context.
+    """
+
+    def __init__(self, pool, handle):
+        self.pool = pool
+        self.handle = handle
+
+    def __getattr__(self, name):
+        if self.handle not in self.pool.contexts:
+            raise RuntimeError("browser context is closed")
+
+        self.pool.activate(self.handle)
+        return getattr(self.pool.driver, name)
+
+    def memory(self):
+        """
+        JS heap (bytes) of this env's page. Chrome doesn't attribute process memory to
+        contexts, so this is the per-env share; pool.memory() is the whole browser.
+        """
+
+        try:
+            self.pool.activate(self.handle)
+            self.pool.driver.execute_cdp_cmd("Performance.enable", {})
+            metrics = self.pool.driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+            return int(next(metric["value"] for metric in metrics if metric["name"] == "JSHeapTotalSize"))
+        except Exception:
+            return 0
+
+    def quit(self):
+        self.pool.close_context(self.handle)
@@ -1,6 +1,6 @@
+import logging
 import os
 import time
-import random
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
@@ -9,6 +9,37 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from .reward import RewardManager
+from .pages import page_from_url
+from .browser import BrowserPool, ContextDriver, process_tree_memory
+
+
+class LoggingEvents:
+    """
+    The event logger interface SwagLabsEnv uses, on top of the standard logging
+    module. Used when no `events` logger is injected (registry.make_env injects
+    src.events' structured logger). Per-step events are dropped.
+    """
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+
+    def log(self, level, event, **fields):
+        self.logger.log(getattr(logging, level.upper()), "%s %s", event, fields)
+
+    def debug(self, event, **fields):
+        self.log("debug", event, **fields)
+
+    def info(self, event, **fields):
+        self.log("info", event, **fields)
+
+    def warning(self, event, **fields):
+        self.log("warning", event, **fields)
+
+    def error(self, event, **fields):
+        self.log("error", event, **fields)
+
+    def step(self, event, **fields):
+        pass
 
 
 class SwagLabsEnv(gym.Env): 
@@ -17,18 +48,27 @@ class SwagLabsEnv(gym.Env):
     This environment uses Selenium to interact with the Swag Labs web application,
     allowing agents to perform actions and receive observations and rewards.
     """
-    def __init__(self, persona="functional", url="https://www.saucedemo.com/"):
+    def __init__(self, persona="functional", url="https://www.saucedemo.com/", events=None, failures=None,
+                 shared_browser=False, seed=None):
         super().__init__()
 
         self.persona = persona
         self.url = url
         self.driver = None # will choose later
+        self.initial_seed = seed # seeds the first reset(), like LunarLanderEnv
+        self.shared_browser = shared_browser # one isolated context per env in a shared Chrome (see browser.py)
+        self.events = events or LoggingEvents("swaglabs")
+
+        # Failed actions are deduplicated by signature into this index (src/failures.py, injected by the registry)
+        self.failures = failures
+        self.episode_actions = []
 
         self.max_steps = 25
         self.current_step = 0
 
         self.visited_pages = set()
         self.touched_selectors = set()
+        self.state = "other" # page the browser is on, from the URL (see pages.py)
         self.latencies = []
         self.validation_errors = 0
         self.successes = 0
@@ -42,6 +82,16 @@ class SwagLabsEnv(gym.Env):
                                             
     
     def set_driver(self):
+        """
+        Returns the driver for this env: its own browser, or a new isolated
+        context in the browser shared by all envs in this process.
+        """
+
+        if self.shared_browser:
+            return BrowserPool.shared(self.start_browser).new_context()
+        return self.start_browser()
+
+    def start_browser(self):
         """
         Automatically chooses the right driver based on browser. 
         Detects Chrome, Edge, or Firefox.
@@ -60,15 +110,19 @@ class SwagLabsEnv(gym.Env):
             #options.add_argument("--disable-dev-shm-usage")
             #options.add_argument("--disable-gpu")
 
-            print("Using Chrome WebDriver")
+            self.events.info("driver_start", browser="chrome")
 
             service = ChromeService(ChromeDriverManager().install())
             return webdriver.Chrome(service=service, options=options)
 
         except Exception as e:
-            print(f"Error: Chrome not available ({e}), if you want to use a different browser, please modify the set_driver() method in envs/swaglabs/env.py")
+            self.events.error("driver_unavailable", browser="chrome", error=str(e),
+                              hint="to use a different browser, modify set_driver() in envs/swaglabs/env.py")
     
     def reset(self, seed=None, options=None):
+        if seed is None:
+            seed = self.initial_seed
+        self.initial_seed = None
         super().reset(seed=seed)
         self.current_step = 0
 
@@ -78,14 +132,20 @@ class SwagLabsEnv(gym.Env):
                 self.driver.delete_all_cookies()
                 self.driver.execute_script("window.localStorage.clear();")
                 self.driver.execute_script("window.sessionStorage.clear();")
-                print("Browser state cleared for new episode.")
+                self.events.debug("browser_state_cleared")
+            except Exception as e:
+                self.events.warning("browser_state_clear_failed", error=str(e))
+
+        if self.driver:
+            try:
+                self.driver.get(self.url)
             except Exception as e:
-                print(f"Warning: could not clear browser state: {e}")
+                # Window or browser is gone (e.g. a crashed context), so start over with a fresh one
+                self.events.warning("driver_lost", error=type(e).__name__)
+                self.recycle_driver()
 
         if not self.driver:
             self.driver = self.set_driver()
-        else: 
-            self.driver.get(self.url)
 
         if self.reward_manager:
             self.reward_manager.reset()
@@ -97,9 +157,11 @@ class SwagLabsEnv(gym.Env):
         self.latencies.clear()
         self.validation_errors = 0
         self.successes = 0
+        self.episode_actions.clear()
+        self.state = self.current_state()
 
         obs = np.zeros(3, dtype=np.float32)
-        info = {"persona": self.persona, "page": "home", "success": False, "error": False}
+        info = {"persona": self.persona, "page": "home", "state": self.state, "success": False, "error": False}
 
         return obs, info
 
@@ -109,7 +171,7 @@ class SwagLabsEnv(gym.Env):
         """
         
         if self.logged_in:
-            print("Already logged in.")
+            self.events.step("login_skipped", reason="already_logged_in")
             return True
 
         self.driver.get(self.url)
@@ -130,7 +192,7 @@ class SwagLabsEnv(gym.Env):
             WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.CLASS_NAME, "inventory_list")))
 
             self.logged_in = True
-            print("Login successful.")
+            self.events.step("login", success=True)
             return True
 
         except Exception as e:
@@ -160,7 +222,7 @@ class SwagLabsEnv(gym.Env):
         try:
             # Handle repeated login attempts
             if self.logged_in and action == 0:
-                print("Already logged in, skipping login action.")
+                self.events.step("action", action=0, page="inventory", skipped=True)
                 return "inventory", 0.0, 1.0
 
             # Login first before trying any other actions
@@ -170,7 +232,6 @@ class SwagLabsEnv(gym.Env):
 
             if action == 0:
                 if self.logged_in:
-                    print("Already logged in, skipping login.")
                     page_name = "inventory"
                     success = 0.0
                     error = 1.0
@@ -186,36 +247,31 @@ class SwagLabsEnv(gym.Env):
                 items = self.driver.find_elements(By.CLASS_NAME, "btn_primary")
 
                 if items:
-                    random.choice(items).click()
+                    items[self.np_random.integers(len(items))].click()
                     page_name = "add_to_cart"
                     success = 1.0
                 else: 
                     page_name = "add_to_cart"
                     error = 1.0
 
-                print("Added item to cart.")
-
             elif action == 2:   # Remove item from cart
                 WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.CLASS_NAME, "btn_secondary")))
 
                 remove_buttons = self.driver.find_elements(By.CLASS_NAME, "btn_secondary")
 
                 if remove_buttons:
-                    random.choice(remove_buttons).click()
+                    remove_buttons[self.np_random.integers(len(remove_buttons))].click()
                     page_name = "remove_item"
                     success = 1.0
                 else:
                     error = 1.0
 
-                print("Removed item from cart.")
-
             elif action == 3:   # Go to cart page
                 WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.CLASS_NAME, "shopping_cart_link")))
 
                 self.driver.find_element(By.CLASS_NAME, "shopping_cart_link").click()
                 page_name = "cart"
                 success = 1.0
-                print("Navigated to cart page.")
 
             elif action == 4:   # Proceed to checkout
                 WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.ID, "checkout")))
@@ -223,7 +279,6 @@ class SwagLabsEnv(gym.Env):
                 self.driver.find_element(By.ID, "checkout").click()
                 page_name = "checkout"
                 success = 1.0
-                print("Proceeded to checkout.")
 
             elif action == 5:   # Fill in checkout information
                 WebDriverWait(self.driver, 3).until(EC.presence_of_element_located((By.ID, "first-name")))
@@ -235,7 +290,6 @@ class SwagLabsEnv(gym.Env):
 
                 page_name = "checkout_info"
                 success = 1.0
-                print("Checkout information filled.")
 
             elif action == 6:   # Finish purchase
                 WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.ID, "finish")))
@@ -243,7 +297,6 @@ class SwagLabsEnv(gym.Env):
                 self.driver.find_element(By.ID, "finish").click()
                 page_name = "finish"
                 success = 1.0
-                print("Purchase finished! Flow complete.")
 
             elif action == 7:   # Logout of the website
                 WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.ID, "react-burger-menu-btn")))
@@ -256,7 +309,6 @@ class SwagLabsEnv(gym.Env):
                 self.logged_in = False
                 page_name = "logout"
                 success = 1.0
-                print("Logged out successfully.")
             
             elif action == 8:   # Back to inventory page
                 WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((By.ID, "back-to-products")))
@@ -264,15 +316,46 @@ class SwagLabsEnv(gym.Env):
                 self.driver.find_element(By.ID, "back-to-products").click()
                 page_name = "inventory"
                 success = 1.0
-                print("Returned to inventory page.")
 
             time.sleep(0.5)
 
         except Exception as e:
             error = 1.0
-            print(f"Action {action} failed: {type(e).__name__}")
+            self.events.warning("action_failed", action=int(action), error=type(e).__name__, step=self.current_step)
+            self.record_failure(action, e)
+
+        self.events.step("action", action=int(action), page=page_name, success=success, error=error)
 
         return page_name, success, error
+
+    def record_failure(self, action, exc):
+        """
+        Adds a failed action to the failure index, if one is set.
+        The page is where the action was attempted, before any navigation it caused.
+        """
+
+        if not self.failures:
+            return
+
+        try:
+            url = self.driver.current_url
+        except Exception:
+            url = None
+
+        signature, new = self.failures.record(action, self.state, exc, self.episode_actions, url=url, persona=self.persona)
+        if new:
+            self.events.warning("new_failure", signature=signature, action=int(action), page=self.state,
+                                error=type(exc).__name__, repro=list(self.episode_actions))
+
+    def current_state(self):
+        """
+        Page state of the browser, derived from its current URL.
+        """
+
+        try:
+            return page_from_url(self.driver.current_url)
+        except Exception:
+            return "other"
     
     def step(self, action):
         """
@@ -294,7 +377,10 @@ class SwagLabsEnv(gym.Env):
         start_time = time.time()
 
         # Choose action based on module or page (Customer or ToDo)
+        prev_state = self.state
+        self.episode_actions.append(int(action))
         page_name, success, error = self.perform_action(action)
+        self.state = self.current_state()
 
         # Update metrics
         latency = time.time() - start_time
@@ -309,7 +395,7 @@ class SwagLabsEnv(gym.Env):
         # Termination conditions (when to end episode)
         if time.time() - start_time > 10:
             truncated = True
-        if page_name == "finish" or ("checkout-complete" in self.driver.current_url):
+        if page_name == "finish" or self.state == "checkout_complete":
             terminated = True
         if self.current_step >= self.max_steps:
             truncated = True
@@ -327,6 +413,8 @@ class SwagLabsEnv(gym.Env):
         info = {
             "persona": self.persona,
             "page": page_name,
+            "prev_state": prev_state,
+            "state": self.state,
             "success": bool(success),
             "error": bool(error),
             "latency": latency,
@@ -344,16 +432,49 @@ class SwagLabsEnv(gym.Env):
 
         return obs, reward, terminated, truncated, info
 
+    def browser_memory(self):
+        """
+        Memory (bytes) used by this env's browser: the resident memory of the WebDriver
+        process and the browser it started, or, in a shared browser, the JS heap of this env's page.
+        Returns 0 if there is no driver or the memory can't be read.
+        """
+
+        if not self.driver:
+            return 0
+        if isinstance(self.driver, ContextDriver):
+            return self.driver.memory()
+        return process_tree_memory(self.driver)
+
+    def total_browser_memory(self):
+        """
+        Resident memory (bytes) of the whole browser this env runs in, shared with other envs if any.
+        """
+
+        if isinstance(self.driver, ContextDriver):
+            return self.driver.pool.memory()
+        return self.browser_memory()
+
+    def recycle_driver(self):
+        """
+        Quits the browser. A fresh one is started on the next reset().
+        """
+
+        self.close()
+        self.logged_in = False
+
     def close(self):
         """
         Closes the environment and quits the WebDriver.
         """
         
+        if self.failures:
+            self.failures.flush()
+
         if self.driver:
             try:
                 self.driver.quit()
-                print("Driver closed successfully.")
+                self.events.info("driver_closed")
             except Exception as e:
-                print(f"Error closing driver: {e}")
+                self.events.error("driver_close_failed", error=str(e))
             finally:
                 self.driver = None
\ No newline at end of file
@@ -0,0 +1,31 @@
+from urllib.parse import urlparse
+
+# Swag Labs pages, identified by URL path. The order fixes the state ids used by src/coverage.py,
+# so only append new pages at the end (before "other").
+PAGES = {
+    "": "login",
+    "index.html": "login",
+    "inventory.html": "inventory",
+    "inventory-item.html": "item",
+    "cart.html": "cart",
+    "checkout-step-one.html": "checkout_info",
+    "checkout-step-two.html": "checkout_overview",
+    "checkout-complete.html": "checkout_complete",
+}
+
+STATES = list(dict.fromkeys(PAGES.values())) + ["other"]
+
+# SwagLabsEnv ends the episode here, so no action is ever taken from these pages
+TERMINAL_STATES = ["checkout_complete"]
+
+
+def page_from_url(url):
+    """
+    Maps a Swag Labs URL to a page state. Unknown URLs (and no URL at all) map to "other".
+    """
+
+    if not url:
+        return "other"
+
+    path = urlparse(url).path.rsplit("/", 1)[-1]
+    return PAGES.get(path, "other")
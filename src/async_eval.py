@@ -0,0 +1,187 @@
+import multiprocessing
+import queue
+import time
+import traceback
+
+from stable_baselines3 import PPO, A2C
+from stable_baselines3.common.callbacks import BaseCallback
+
+from envs import registry
+from .weights import load_policy_weights, policy_weights
+
+
+def eval_worker(config, jobs, results):
+    """
+    Evaluation process. Receives (timesteps, weights) snapshots, evaluates them
+    on the same seeded episodes every time, saves the best one as a model zip
+    and sends back ("result", (timesteps, results, is_best)). A None job stops
+    the process. If anything fails, ("error", traceback) is sent and it exits.
+    """
+
+    env = None
+    try:
+        from .events import configure as configure_events
+
+        configure_events(log_dir=config["events_dir"])
+
+        Algo = PPO if config["algo"] == "ppo" else A2C
+        env = registry.make_env(config["app"], persona=config["persona"], seed=config["seed"],
+                                action_repeat=config["action_repeat"])
+        model = Algo("MlpPolicy", env, verbose=0, device="cpu", policy_kwargs=config["policy_kwargs"])
+        model.env_config = {"action_repeat": config["action_repeat"]}
+        evaluate = registry.get_evaluator(config["app"])
+
+        sign = 1.0 if config["mode"] == "max" else -1.0
+        best = None
+
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+
+            timesteps, weights = job
+            load_policy_weights(model.policy, weights)
+
+            # Seeding once per eval replays the same episodes for every snapshot
+            env.reset(seed=config["seed"])
+            metrics, _ = evaluate(model, env, episodes=config["episodes"], verbose=False)
+            metrics = {name: float(value) for name, value in metrics.items()}
+
+            score = sign * metrics[config["metric"]]
+            is_best = best is None or score > best + config["min_delta"]
+            if is_best:
+                best = score
+                model.save(config["best_path"])
+
+            results.put(("result", (timesteps, metrics, is_best)))
+    except Exception:
+        results.put(("error", traceback.format_exc()))
+    finally:
+        if env is not None:
+            env.close()
+
+
+class AsyncEvalCallback(BaseCallback):
+    """
+    Evaluates snapshots of the policy in a separate process while training continues.
+
+    Every `eval_freq` timesteps the current weights are handed to the eval
+    process, unless it is still busy with the previous snapshot (then that
+    snapshot is skipped, so the learner never waits). Finished evaluations are
+    logged under eval/ in the run's TensorBoard log. Training stops after
+    `patience` evaluations in a row without improving `metric` by more than
+    `min_delta` (patience=None never stops early). If the eval process fails or
+    dies, training stops with its traceback instead of waiting on it.
+    """
+
+    def __init__(self, app, algo, persona, best_path, eval_freq=25_000, episodes=10, metric="landing_rate", mode="max",
+                 patience=None, min_delta=0.0, seed=1000, action_repeat=1, events_dir=None, verbose=1):
+        super().__init__(verbose)
+        self.eval_freq = eval_freq
+        self.patience = patience
+        self.metric = metric
+        self.config = {
+            "app": app, "algo": algo, "persona": persona, "best_path": best_path, "episodes": episodes,
+            "metric": metric, "mode": mode, "min_delta": min_delta, "seed": seed, "action_repeat": action_repeat,
+            "events_dir": events_dir,
+        }
+
+        self.process = None
+        self.jobs = None
+        self.results = None
+        self.busy = False
+        self.next_eval = eval_freq
+        self.evaluations = 0
+        self.skipped = 0
+        self.since_best = 0
+        self.best = None
+        self.stopped_early = False
+
+    def _on_training_start(self):
+        # Spawned, not forked, so the eval process doesn't inherit the learner's torch threads or envs
+        context = multiprocessing.get_context("spawn")
+        self.jobs = context.Queue()
+        self.results = context.Queue()
+        self.config["policy_kwargs"] = self.model.policy_kwargs
+        self.process = context.Process(target=eval_worker, args=(self.config, self.jobs, self.results), daemon=True)
+        self.process.start()
+
+    def _on_step(self):
+        if self.busy:
+            self._poll()
+
+        if self.num_timesteps >= self.next_eval:
+            self.next_eval += self.eval_freq
+            if self.busy:
+                self.skipped += 1
+            else:
+                self.jobs.put((self.num_timesteps, policy_weights(self.model.policy)))
+                self.busy = True
+
+        return not self.stopped_early
+
+    def _poll(self, timeout=0.0):
+        """
+        Takes a finished evaluation off the result queue, waiting up to `timeout`
+        seconds. Raises if the eval process failed or died, so training never
+        waits on a result that can't arrive.
+        """
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                kind, message = self.results.get(timeout=min(1.0, remaining)) if remaining > 0 else self.results.get_nowait()
+                break
+            except queue.Empty:
+                if not self.process.is_alive():
+                    # It may have sent its last message just before exiting
+                    try:
+                        kind, message = self.results.get(timeout=1.0)
+                        break
+                    except queue.Empty:
+                        self._fail(f"Eval process exited unexpectedly (exit code {self.process.exitcode})")
+                if time.monotonic() >= deadline:
+                    return
+
+        if kind == "error":
+            self._fail(f"Eval process failed:\n{message}")
+
+        timesteps, metrics, is_best = message
+        self.busy = False
+        self.evaluations += 1
+        self.since_best = 0 if is_best else self.since_best + 1
+        if is_best:
+            self.best = (timesteps, metrics[self.metric])
+
+        for name, value in metrics.items():
+            self.logger.record(f"eval/{name}", value)
+        self.logger.record("eval/snapshot_timesteps", timesteps)
+        self.logger.record("eval/skipped_snapshots", self.skipped)
+
+        if self.verbose:
+            print(f"Eval @ {timesteps} steps: {self.metric}={metrics[self.metric]:.3f}" + (" (new best)" if is_best else ""))
+
+        if self.patience is not None and self.since_best >= self.patience:
+            self.stopped_early = True
+            print(f"Early stopping: {self.metric} has not improved for {self.patience} evaluations "
+                  f"(best {self.best[1]:.3f} at {self.best[0]} steps)")
+
+    def _fail(self, reason):
+        self.busy = False
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout=10)
+        raise RuntimeError(reason)
+
+    def _on_training_end(self):
+        # Let an evaluation that is already running finish, then write out the last results
+        # (learn() returns without a final dump when training stops early)
+        if self.busy:
+            self._poll(timeout=600)
+        self.logger.dump(self.num_timesteps)
+
+        self.jobs.put(None)
+        self.process.join(timeout=60)
+        if self.process.is_alive():
+            self.process.terminate()
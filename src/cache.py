@@ -0,0 +1,175 @@
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+
+from envs import registry
+
+
+def file_digest(path):
+    """
+    sha256 hex digest of a file's contents.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def module_path(name):
+    """
+    Source file of a module, found through the import system, so it doesn't
+    depend on the directory the command was started from.
+    """
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except ImportError:
+        spec = None
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        raise FileNotFoundError(f"Can't find the source of module {name}")
+    return spec.origin
+
+
+def source_digest(paths):
+    """
+    Digest of a list of source files. A missing file is an error rather than
+    being skipped, so a key can never silently lose its code component.
+    """
+
+    digest = hashlib.sha256()
+    for path in paths:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Can't version missing source file: {path}")
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def code_version(app):
+    """
+    Version of an app's env wrapper and reward code, as a digest of their sources.
+    Any edit to the env.py or reward.py next to the app's env module changes it.
+    """
+
+    env_dir = os.path.dirname(module_path(registry.get_app(app)["entry_point"].split(":")[0]))
+    return source_digest([os.path.join(env_dir, name) for name in ["env.py", "reward.py"]])
+
+
+def evaluator_version(app):
+    """
+    Version of the module holding an app's evaluate function (src/eval.py for the built-in apps).
+    """
+
+    return source_digest([module_path(registry.get_app(app)["evaluate"].split(":")[0])])
+
+
+def config_key(config):
+    """
+    Content address of a fully resolved run config.
+    """
+
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache of trained models and eval metrics.
+
+    Layout (in `root`):
+        models/{key}/model.zip, models/{key}/config.json
+        evals/{key}.json
+        index.json: human-readable names -> keys
+    """
+
+    def __init__(self, root="cache"):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {"models": {}, "evals": {}}
+        with open(self.index_path, "r") as file:
+            return json.load(file)
+
+    def link(self, name, key, kind="models"):
+        """
+        Points a human-readable name at a key in the index.
+        """
+
+        index = self._load_index()
+        index.setdefault(kind, {})[name] = key
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump(index, file, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def resolve(self, name, kind="models"):
+        """
+        Returns the key the index currently maps `name` to, if any.
+        """
+
+        return self._load_index().get(kind, {}).get(name)
+
+    def model_path(self, key):
+        return os.path.join(self.root, "models", key, "model.zip")
+
+    def lookup_model(self, key):
+        """
+        Returns the cached model path for `key`, or None on a miss.
+        """
+
+        path = self.model_path(key)
+        return path if os.path.exists(path) else None
+
+    def store_model(self, key, path, config, name):
+        """
+        Copies a saved model into the cache under `key` and records its config.
+        """
+
+        os.makedirs(os.path.dirname(self.model_path(key)), exist_ok=True)
+        shutil.copyfile(path, self.model_path(key))
+
+        with open(os.path.join(self.root, "models", key, "config.json"), "w") as file:
+            json.dump(config, file, indent=2, sort_keys=True, default=str)
+
+        self.link(name, key, "models")
+
+    def lookup_eval(self, key):
+        """
+        Returns cached (results, episode_metrics) for `key`, or None on a miss.
+        """
+
+        path = os.path.join(self.root, "evals", f"{key}.json")
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "r") as file:
+            cached = json.load(file)
+        return cached["results"], cached["episode_metrics"]
+
+    def store_eval(self, key, results, episode_metrics, config, name):
+        """
+        Stores eval results and per-episode metrics under `key`.
+        """
+
+        os.makedirs(os.path.join(self.root, "evals"), exist_ok=True)
+
+        payload = {
+            "config": config,
+            "results": {metric: float(value) for metric, value in results.items()},
+            "episode_metrics": episode_metrics,
+        }
+
+        tmp = os.path.join(self.root, "evals", f"{key}.json.tmp")
+        with open(tmp, "w") as file:
+            json.dump(payload, file, indent=2, default=str)
+        os.replace(tmp, os.path.join(self.root, "evals", f"{key}.json"))
+
+        self.link(name, key, "evals")
@@ -0,0 +1,286 @@
+import argparse
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from envs.swaglabs.pages import STATES, TERMINAL_STATES
+
+N_ACTIONS = 9  # SwagLabsEnv action space
+
+# Pages actions can be taken from, i.e. the denominator of (page, action) coverage
+ACTION_STATES = [i for i, state in enumerate(STATES) if state != "other" and state not in TERMINAL_STATES]
+TOTAL_PAIRS = len(ACTION_STATES) * N_ACTIONS
+
+
+class CoverageRun:
+    """
+    Transition coverage of one training or eval run.
+
+    Transitions are (state, action) -> next state, with states taken from the
+    page URL before and after each step (info["prev_state"], info["state"]).
+    Counts and first-seen times live in dense [state, action, next state] arrays.
+    The curve gets a point each time a new (state, action) pair or transition is covered.
+
+    Can be passed directly as `callback` to SB3's model.learn().
+    """
+
+    def __init__(self, run, persona=None, app="swaglabs"):
+        self.run = run
+        self.persona = persona
+        self.app = app
+        self.started = time.time()
+        self.steps = 0
+
+        shape = (len(STATES), N_ACTIONS, len(STATES))
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.first_seen = np.full(shape, np.nan)
+        self.pairs = 0
+        self.transitions = 0
+        self.curve = [(0.0, 0, 0, 0)]  # (elapsed_s, steps, pairs, transitions)
+
+        self._state_ids = {state: i for i, state in enumerate(STATES)}
+        self._action_states = set(ACTION_STATES)
+
+    def record(self, prev_state, action, state):
+        self.steps += 1
+        now = time.time()
+        src = self._state_ids.get(prev_state, len(STATES) - 1)
+        dst = self._state_ids.get(state, len(STATES) - 1)
+
+        if src in self._action_states and not self.counts[src, action].any():
+            self.pairs += 1
+        if not self.counts[src, action, dst]:
+            self.transitions += 1
+            self.first_seen[src, action, dst] = now
+            self.curve.append((now - self.started, self.steps, self.pairs, self.transitions))
+
+        self.counts[src, action, dst] += 1
+
+    def record_info(self, info):
+        """
+        Records the transition from an env step's info. Infos without page states are ignored.
+        """
+
+        if "prev_state" in info and "state" in info:
+            self.record(info["prev_state"], int(info["action"]), info["state"])
+
+    def __call__(self, locals_, globals_):
+        for info in locals_.get("infos", []):
+            self.record_info(info)
+        return True
+
+    def summary(self):
+        elapsed = time.time() - self.started
+        return {
+            "run": self.run,
+            "app": self.app,
+            "persona": self.persona,
+            "started": self.started,
+            "elapsed_s": elapsed,
+            "steps": self.steps,
+            "pairs": self.pairs,
+            "transitions": self.transitions,
+            "curve": [list(point) for point in self.curve] + [[elapsed, self.steps, self.pairs, self.transitions]],
+        }
+
+
+class CoverageStore:
+    """
+    Transition coverage across all runs and personas.
+
+    Layout (in `path`):
+        index.json: states, runs table (persona, totals and coverage curve per run)
+        counts.npy: [state, action, next state] visit counts over all runs
+        first_seen.npy: wall time each transition was first seen (NaN if never)
+        first_run.npy: index of the run that first covered each transition (-1 if never)
+        run_pairs.npy: [run, state, action] pairs covered by each run
+        index.lock: flock'ed around reads and commits, so parallel runs can share a store
+    """
+
+    def __init__(self, path="data/coverage"):
+        self.path = path
+        shape = (len(STATES), N_ACTIONS, len(STATES))
+
+        self.runs = []
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.first_seen = np.full(shape, np.nan)
+        self.first_run = np.full(shape, -1, dtype=np.int32)
+        self.run_pairs = np.zeros((0, len(STATES), N_ACTIONS), dtype=bool)
+
+        if os.path.exists(os.path.join(path, "index.json")):
+            with self.locked(shared=True):
+                self.load()
+
+    @contextmanager
+    def locked(self, shared=False):
+        """
+        Holds the store's lock file: shared for reading, exclusive for a commit.
+        """
+
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "index.lock"), "a") as file:
+            fcntl.flock(file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def load(self):
+        with open(os.path.join(self.path, "index.json"), "r") as file:
+            index = json.load(file)
+
+        if index["states"] != STATES:
+            raise ValueError(f"Coverage store {self.path} was built with different page states: {index['states']}")
+
+        self.runs = index["runs"]
+        for name in ["counts", "first_seen", "first_run", "run_pairs"]:
+            setattr(self, name, np.load(os.path.join(self.path, f"{name}.npy")))
+
+    def save(self):
+        """
+        Writes the arrays and index. Each file is written to a temp file of this
+        process and replaced atomically; the index goes last. Call it under `locked()`.
+        """
+
+        os.makedirs(self.path, exist_ok=True)
+        suffix = f"{os.getpid()}.tmp"
+
+        for name in ["counts", "first_seen", "first_run", "run_pairs"]:
+            tmp = os.path.join(self.path, f"{name}.{suffix}.npy")
+            np.save(tmp, getattr(self, name))
+            os.replace(tmp, os.path.join(self.path, f"{name}.npy"))
+
+        tmp = os.path.join(self.path, f"index.json.{suffix}")
+        with open(tmp, "w") as file:
+            json.dump({"states": STATES, "runs": self.runs}, file)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+
+    def commit(self, run):
+        """
+        Merges a finished CoverageRun into the store and saves it. The store is
+        re-read under an exclusive lock first, so runs committed by other processes
+        in the meantime are kept rather than overwritten.
+        """
+
+        with self.locked():
+            if os.path.exists(os.path.join(self.path, "index.json")):
+                self.load()
+
+            run_id = len(self.runs)
+            new = np.isnan(self.first_seen) & ~np.isnan(run.first_seen)
+            self.first_run[new] = run_id
+            self.first_seen = np.fmin(self.first_seen, run.first_seen)
+            self.counts += run.counts
+
+            self.runs.append(run.summary())
+            self.run_pairs = np.concatenate([self.run_pairs, (run.counts.sum(axis=2) > 0)[None]])
+            self.save()
+        return run_id
+
+    def select_runs(self, **filters):
+        """
+        Return:
+            run ids whose metadata matches all given filters (e.g. persona="explorer")
+        """
+
+        return [i for i, run in enumerate(self.runs) if all(run.get(key) == value for key, value in filters.items())]
+
+    def covered_pairs(self, run_ids=None):
+        """
+        Return:
+            [state, action] bool array of pairs covered by the given runs (all runs if None)
+        """
+
+        if run_ids is None:
+            return self.counts.sum(axis=2) > 0
+        return self.run_pairs[list(run_ids)].any(axis=0)
+
+    def uncovered(self, run_ids=None):
+        """
+        Return:
+            list of (state, action) pairs never taken by the given runs. Terminal
+            pages and the catch-all "other" state are left out.
+        """
+
+        covered = self.covered_pairs(run_ids)
+        return [(STATES[s], a) for s in ACTION_STATES for a in range(N_ACTIONS) if not covered[s, a]]
+
+    def transitions(self):
+        """
+        Return:
+            list of dicts, one per covered transition, ordered by first-seen time
+        """
+
+        src, action, dst = np.nonzero(self.counts)
+        edges = [
+            {"state": STATES[s], "action": int(a), "next_state": STATES[d], "count": int(self.counts[s, a, d]),
+             "first_seen": float(self.first_seen[s, a, d]), "first_run": self.runs[self.first_run[s, a, d]]["run"]}
+            for s, a, d in zip(src, action, dst)
+        ]
+        return sorted(edges, key=lambda edge: edge["first_seen"])
+
+    def coverage_at(self, run_id, seconds=None, steps=None):
+        """
+        Pairs and transitions a run had covered after `seconds` of wall-clock
+        time or `steps` env steps, for comparing runs at the same budget.
+
+        Return:
+            (pairs, transitions)
+        """
+
+        curve = np.array(self.runs[run_id]["curve"])
+        column, budget = (0, seconds) if seconds is not None else (1, steps)
+        reached = curve[curve[:, column] <= budget]
+        return int(reached[-1, 2]), int(reached[-1, 3])
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--store", default="data/coverage")
+    p.add_argument("--persona", default=None)
+    p.add_argument("--seconds", type=float, default=None, help="compare runs after this much wall-clock time")
+    p.add_argument("--steps", type=int, default=None, help="compare runs after this many env steps")
+    p.add_argument("--uncovered", action="store_true", help="list (page, action) pairs no run has covered")
+    p.add_argument("--transitions", action="store_true", help="list covered transitions in discovery order")
+    args = p.parse_args()
+
+    store = CoverageStore(args.store)
+    filters = {"persona": args.persona} if args.persona else {}
+    run_ids = store.select_runs(**filters)
+
+    if not run_ids:
+        print(f"No coverage runs in {args.store}")
+        return
+
+    print(f"{'run':<40} {'persona':<12} {'steps':>7} {'time':>8} {'pairs':>7} {'trans':>6} {'pairs/min':>10}")
+
+    for run_id in run_ids:
+        run = store.runs[run_id]
+        pairs, transitions = run["pairs"], run["transitions"]
+        if args.seconds is not None or args.steps is not None:
+            pairs, transitions = store.coverage_at(run_id, seconds=args.seconds, steps=args.steps)
+
+        rate = run["pairs"] / run["elapsed_s"] * 60 if run["elapsed_s"] else 0.0
+        print(f"{run['run']:<40} {run['persona'] or '-':<12} {run['steps']:>7} {run['elapsed_s']:>7.0f}s "
+              f"{pairs:>3}/{TOTAL_PAIRS:<3} {transitions:>6} {rate:>10.2f}")
+
+    covered = store.covered_pairs(run_ids)[ACTION_STATES].sum()
+    print(f"\nCombined: {covered}/{TOTAL_PAIRS} (page, action) pairs covered")
+
+    if args.transitions:
+        print("\nCovered transitions:")
+        for edge in store.transitions():
+            print(f"  {edge['state']:<18} --{edge['action']}--> {edge['next_state']:<18} x{edge['count']:<6} first: {edge['first_run']}")
+
+    if args.uncovered:
+        print("\nUncovered (page, action) pairs:")
+        for state, action in store.uncovered(run_ids):
+            print(f"  {state:<18} action {action}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,582 @@
+import argparse
+import hmac
+import io
+import json
+import os
+import queue
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from envs import registry
+from .cache import ArtifactCache, config_key
+from .train import load_hyperparams, make_env, train_config
+from .weights import load_policy_weights, policy_weights
+
+# Shared secret checked in the hello handshake, read from the environment so it stays out of `ps`
+TOKEN_ENV = "ROLLOUT_TOKEN"
+
+# Rollout buffer arrays sent from workers to the learner
+ROLLOUT_FIELDS = ["observations", "actions", "rewards", "returns", "episode_starts", "values", "log_probs", "advantages"]
+
+
+# ---------------------------------------------------------------------------
+# Wire format: 12-byte prefix (header length, payload length), JSON header,
+# then an optional payload of numpy arrays packed with np.savez_compressed.
+# No pickle is used in either direction.
+# ---------------------------------------------------------------------------
+
+def send_message(sock, header, payload=b""):
+    head = json.dumps(header).encode()
+    sock.sendall(struct.pack("!IQ", len(head), len(payload)) + head + payload)
+
+
+def _recv_exact(sock, n):
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    head_len, payload_len = struct.unpack("!IQ", _recv_exact(sock, 12))
+    header = json.loads(_recv_exact(sock, head_len))
+    payload = _recv_exact(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+def pack_arrays(arrays):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def unpack_arrays(payload):
+    with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+# ---------------------------------------------------------------------------
+# Learner side
+# ---------------------------------------------------------------------------
+
+class WorkerConnection:
+    """
+    One connected rollout worker, as seen by the learner.
+    """
+
+    def __init__(self, sock, worker_id):
+        self.sock = sock
+        self.worker_id = worker_id
+        self.last_seen = time.time()
+        self.alive = True
+        self.lock = threading.Lock()
+
+    def send(self, header, payload=b""):
+        try:
+            with self.lock:
+                send_message(self.sock, header, payload)
+        except OSError:
+            self.close()
+
+    def close(self):
+        self.alive = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RolloutServer:
+    """
+    Accepts rollout workers over TCP, hands them policy weights and collects
+    their trajectories. Workers that stop sending heartbeats are dropped, and
+    a worker reconnecting with the same id replaces its old connection.
+
+    Listens on localhost unless another host is given. If `token` is set, a
+    worker's hello must carry the same token or it is turned away.
+    """
+
+    def __init__(self, config, host="127.0.0.1", port=5555, heartbeat_timeout=30.0, token=None):
+        self.config = config
+        self.heartbeat_timeout = heartbeat_timeout
+        self.token = token
+        self.connections = {}
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.round = 0
+        self.stopped = False
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while not self.stopped:
+            try:
+                sock, _ = self.sock.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._handle, args=(sock,), daemon=True).start()
+
+    def _handle(self, sock):
+        # A client that connects but never says hello must not hold a thread forever
+        sock.settimeout(self.heartbeat_timeout)
+        try:
+            header, _ = recv_message(sock)
+        except (OSError, ValueError):
+            sock.close()
+            return
+
+        if header.get("type") != "hello":
+            sock.close()
+            return
+
+        if self.token and not hmac.compare_digest(str(header.get("token", "")).encode(), self.token.encode()):
+            print(f"Rejected worker {header.get('worker_id')}: bad token")
+            try:
+                send_message(sock, {"type": "rejected", "reason": "bad token"})
+            except OSError:
+                pass
+            sock.close()
+            return
+
+        sock.settimeout(None)
+        conn = WorkerConnection(sock, str(header["worker_id"]))
+        with self.lock:
+            old = self.connections.get(conn.worker_id)
+            self.connections[conn.worker_id] = conn
+        if old:
+            old.close()
+
+        print(f"Worker connected: {conn.worker_id}")
+        conn.send({"type": "config", "config": self.config})
+
+        try:
+            while conn.alive:
+                header, payload = recv_message(sock)
+                conn.last_seen = time.time()
+
+                if header["type"] == "rollout":
+                    self.results.put((conn, header, payload))
+        except (OSError, ValueError):
+            pass
+        finally:
+            conn.close()
+            print(f"Worker disconnected: {conn.worker_id}")
+
+    def live_workers(self):
+        """
+        Returns connected workers, dropping any that missed their heartbeats.
+        """
+
+        now = time.time()
+        with self.lock:
+            workers = list(self.connections.values())
+
+        live = []
+        for conn in workers:
+            if conn.alive and now - conn.last_seen > self.heartbeat_timeout:
+                print(f"Worker {conn.worker_id} missed heartbeats for {self.heartbeat_timeout:.0f}s, dropping it.")
+                conn.close()
+            if conn.alive:
+                live.append(conn)
+        return live
+
+    def collect(self, weights, n):
+        """
+        Sends the current weights to `n` workers and waits for one rollout from each.
+        If an assigned worker dies, its slot is handed to another connected worker.
+
+        Return:
+            list of n (header, arrays) rollouts, or None if the server was stopped
+        """
+
+        self.round += 1
+        payload = pack_arrays(weights)
+        assigned, received = {}, {}
+        last_wait_message = 0.0
+
+        while len(received) < n:
+            if self.stopped:
+                return None
+
+            live = self.live_workers()
+
+            # Forget assignments whose connection died, then fill the free slots
+            assigned = {wid: conn for wid, conn in assigned.items() if conn.alive}
+            for conn in live:
+                if len(assigned) + len(received) >= n:
+                    break
+                if conn.worker_id not in assigned and conn.worker_id not in received:
+                    conn.send({"type": "weights", "round": self.round}, payload)
+                    assigned[conn.worker_id] = conn
+
+            if len(assigned) + len(received) < n and time.time() - last_wait_message > 10:
+                print(f"Waiting for workers ({len(live)} connected, {n} needed)...")
+                last_wait_message = time.time()
+
+            try:
+                conn, header, rollout = self.results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # Ignore stale rollouts from earlier rounds or replaced connections
+            if header.get("round") != self.round or assigned.get(conn.worker_id) is not conn:
+                continue
+
+            del assigned[conn.worker_id]
+            received[conn.worker_id] = (header, unpack_arrays(rollout))
+
+        return list(received.values())
+
+    def stop(self):
+        self.stopped = True
+        for conn in self.live_workers():
+            conn.send({"type": "stop"})
+            conn.close()
+        self.sock.close()
+
+
+def make_spaces_vec_env(observation_space, action_space, num_envs):
+    """
+    Placeholder VecEnv for the learner. It only carries the spaces and the
+    number of rollout slots; all stepping happens on the workers.
+    """
+
+    from stable_baselines3.common.vec_env import VecEnv
+
+    class SpacesVecEnv(VecEnv):
+        def reset(self):
+            return np.zeros((self.num_envs, *self.observation_space.shape), dtype=self.observation_space.dtype)
+
+        def step_async(self, actions):
+            raise RuntimeError("The learner does not step envs, rollouts come from remote workers.")
+
+        def step_wait(self):
+            raise RuntimeError("The learner does not step envs, rollouts come from remote workers.")
+
+        def close(self):
+            pass
+
+        def get_attr(self, attr_name, indices=None):
+            return [None] * self.num_envs
+
+        def set_attr(self, attr_name, value, indices=None):
+            pass
+
+        def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+            return [None] * self.num_envs
+
+        def env_is_wrapped(self, wrapper_class, indices=None):
+            return [False] * self.num_envs
+
+    return SpacesVecEnv(num_envs, observation_space, action_space)
+
+
+def make_distributed_algo(Algo):
+    """
+    Subclasses an SB3 on-policy algorithm so collect_rollouts() gathers its
+    rollout buffer from remote workers instead of stepping a local env.
+    """
+
+    class DistributedAlgo(Algo):
+        server = None
+
+        def collect_rollouts(self, env, callback, rollout_buffer, n_rollout_steps):
+            self.policy.set_training_mode(False)
+            rollout_buffer.reset()
+            callback.on_rollout_start()
+
+            rollouts = self.server.collect(policy_weights(self.policy), env.num_envs)
+            if rollouts is None:
+                return False
+
+            # Each worker fills one env column of the buffer (GAE was already computed worker-side)
+            for i, (header, arrays) in enumerate(rollouts):
+                for field in ROLLOUT_FIELDS:
+                    getattr(rollout_buffer, field)[:, i] = arrays[field].reshape(getattr(rollout_buffer, field)[:, i].shape)
+                self.ep_info_buffer.extend(header["ep_infos"])
+
+            rollout_buffer.pos = rollout_buffer.buffer_size
+            rollout_buffer.full = True
+            self.num_timesteps += n_rollout_steps * env.num_envs
+
+            callback.update_locals(locals())
+            if not callback.on_step():
+                return False
+
+            callback.on_rollout_end()
+            return True
+
+    DistributedAlgo.__name__ = f"Distributed{Algo.__name__}"
+    return DistributedAlgo
+
+
+def run_learner(args):
+    from stable_baselines3 import PPO, A2C
+    from stable_baselines3.common.logger import configure
+    from .monitor import clear_monitor_dir, merge_monitor_files, monitor_dir
+
+    Algo = PPO if args.algo == "ppo" else A2C
+    hyperparams = load_hyperparams(args.algo, args.app)
+
+    # Same model name and cache as src.train; the distributed keys keep the two kinds of run apart
+    app_name = registry.short_name(args.app)
+    file_name = f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}"
+    model_app_dir = os.path.join(args.model_dir, args.app)
+    os.makedirs(model_app_dir, exist_ok=True)
+    path = os.path.join(model_app_dir, f"{file_name}.zip")
+
+    model_config = train_config(args.app, args.algo, args.persona, args.seed, args.timesteps, args.n_workers,
+                                args.action_repeat, hyperparams, distributed=True, n_workers=args.n_workers)
+    key = config_key(model_config)
+    cache = ArtifactCache(args.cache_dir)
+
+    cached = None if args.no_cache else cache.lookup_model(key)
+    if cached:
+        shutil.copyfile(cached, path)
+        cache.link(file_name, key)
+        print(f"Cache hit ({key}), skipped training. Restored: ", path)
+        return
+
+    # Spaces only, the env is never stepped here (Swag Labs doesn't start a browser until reset)
+    probe = registry.make_env(args.app, persona=args.persona, action_repeat=args.action_repeat)
+    observation_space, action_space = probe.observation_space, probe.action_space
+    probe.close()
+
+    # "_distributed" is a run mode parse_run_name understands, so the results store indexes these runs
+    run_name = f"{file_name}_distributed"
+
+    config = {
+        "app": args.app,
+        "algo": args.algo,
+        "persona": args.persona,
+        "seed": args.seed,
+        "action_repeat": args.action_repeat,
+        "hyperparams": hyperparams,
+        "run_id": f"{run_name}_s{args.seed}",
+        "log_dir": args.log_dir,
+        "monitor_flush_every": args.monitor_flush_every,
+    }
+    clear_monitor_dir(args.log_dir, args.app, config["run_id"])
+
+    server = RolloutServer(config, host=args.host, port=args.port, heartbeat_timeout=args.heartbeat_timeout,
+                           token=args.token)
+    print(f"Learner listening on {args.host}:{server.port}, waiting for {args.n_workers} worker(s)")
+
+    worker_env = dict(os.environ, **({TOKEN_ENV: args.token} if args.token else {}))
+    local_workers = [
+        subprocess.Popen([sys.executable, "-m", "src.distributed", "worker", "--host", "127.0.0.1",
+                          "--port", str(server.port), "--worker_id", f"local-{i}"], env=worker_env)
+        for i in range(args.local_workers)
+    ]
+
+    model = make_distributed_algo(Algo)(
+        "MlpPolicy",
+        make_spaces_vec_env(observation_space, action_space, args.n_workers),
+        verbose=1,
+        seed=args.seed,
+        **hyperparams,
+    )
+    model.server = server
+
+    log_dir = os.path.join(args.log_dir, args.app, run_name)
+    model.set_logger(configure(log_dir, ["stdout", "tensorboard"]))
+
+    try:
+        model.learn(total_timesteps=args.timesteps)
+    finally:
+        server.stop()
+        for process in local_workers:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.terminate()
+
+        # Local workers share this file system; remote workers' monitor files stay on their hosts
+        merge_monitor_files(monitor_dir(args.log_dir, args.app, config["run_id"]))
+
+    # Save as the plain algorithm so eval can load it with PPO/A2C.load
+    del model.server
+    model.__class__ = Algo
+    model.env_config = {"action_repeat": args.action_repeat}
+    model.save(path)
+
+    cache.store_model(key, path, model_config, file_name)
+    print(f"Saved ({key}): ", path)
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def build_worker_model(config, worker_id):
+    """
+    Builds a local copy of the learner's algorithm around one env, used to
+    collect rollouts with SB3's own collect_rollouts (including GAE).
+    """
+
+    from stable_baselines3 import PPO, A2C
+    from stable_baselines3.common.vec_env import DummyVecEnv
+
+    Algo = PPO if config["algo"] == "ppo" else A2C
+    worker_seed = config["seed"] + zlib.crc32(worker_id.encode()) % 10_000
+
+    vec_env = DummyVecEnv([lambda: make_env(app=config["app"], persona=config["persona"], seed=worker_seed,
+                                            run_id=config["run_id"], worker=worker_id, log_dir=config["log_dir"],
+                                            action_repeat=config["action_repeat"],
+                                            monitor_flush_every=config["monitor_flush_every"])])
+
+    model = Algo("MlpPolicy", vec_env, verbose=0, seed=worker_seed, device="cpu", **config["hyperparams"])
+    _, callback = model._setup_learn(total_timesteps=sys.maxsize, callback=None)
+    return model, callback
+
+
+def heartbeat(sock, lock, stopped, interval):
+    """
+    Sends heartbeats on one connection until `stopped` is set or the socket fails.
+    Everything it touches is passed in, so a reconnect can't swap the socket under it.
+    """
+
+    while not stopped.is_set():
+        try:
+            with lock:
+                send_message(sock, {"type": "heartbeat"})
+        except OSError:
+            return
+        stopped.wait(interval)
+
+
+def run_worker(args):
+    worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    model, callback, config = None, None, None
+    backoff = 1.0
+
+    while True:
+        try:
+            sock = socket.create_connection((args.host, args.port), timeout=10)
+        except OSError:
+            print(f"[{worker_id}] learner not reachable at {args.host}:{args.port}, retrying in {backoff:.0f}s")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+            continue
+
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        backoff = 1.0
+        lock = threading.Lock()
+        stopped = threading.Event()
+        beat = threading.Thread(target=heartbeat, args=(sock, lock, stopped, args.heartbeat_interval),
+                                name=f"heartbeat-{worker_id}", daemon=True)
+
+        try:
+            with lock:
+                send_message(sock, {"type": "hello", "worker_id": worker_id, "token": args.token or ""})
+            beat.start()
+
+            while True:
+                header, payload = recv_message(sock)
+
+                if header["type"] == "rejected":
+                    print(f"[{worker_id}] learner rejected this worker ({header.get('reason')}), stopping")
+                    if model:
+                        model.env.close()
+                    return
+
+                if header["type"] == "stop":
+                    print(f"[{worker_id}] learner finished, stopping")
+                    if model:
+                        model.env.close()
+                    return
+
+                if header["type"] == "config":
+                    # Keep the env (and browser) across reconnects to the same learner config
+                    if header["config"] != config:
+                        if model:
+                            model.env.close()
+                        config = header["config"]
+                        model, callback = build_worker_model(config, worker_id)
+                        print(f"[{worker_id}] ready: {config['app']} / {config['algo']} / {config['persona']}")
+
+                elif header["type"] == "weights":
+                    load_policy_weights(model.policy, unpack_arrays(payload))
+                    model.ep_info_buffer.clear()
+                    model.collect_rollouts(model.env, callback, model.rollout_buffer, n_rollout_steps=model.n_steps)
+
+                    buffer = model.rollout_buffer
+                    arrays = {field: getattr(buffer, field)[:, 0] for field in ROLLOUT_FIELDS}
+                    ep_infos = [{"r": float(info["r"]), "l": int(info["l"]), "t": float(info["t"])} for info in model.ep_info_buffer]
+
+                    with lock:
+                        send_message(sock, {"type": "rollout", "round": header["round"], "ep_infos": ep_infos},
+                                     pack_arrays(arrays))
+
+        except (OSError, ValueError) as e:
+            print(f"[{worker_id}] connection lost ({type(e).__name__}), reconnecting")
+        finally:
+            stopped.set()
+            sock.close()
+            if beat.is_alive():
+                beat.join()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="role", required=True)
+
+    learner = sub.add_parser("learner")
+    learner.add_argument("--app", choices=registry.app_names(), default="lunar_lander")
+    learner.add_argument("--algo", choices=["ppo", "a2c"], default="ppo")
+    learner.add_argument("--persona", choices=registry.all_personas(), default="baseline")
+    learner.add_argument("--timesteps", type=int, default=100_000)
+    learner.add_argument("--seed", type=int, default=7)
+    learner.add_argument("--action_repeat", type=int, default=1)
+    learner.add_argument("--n_workers", type=int, default=2, help="rollouts gathered per update")
+    learner.add_argument("--local_workers", type=int, default=0, help="also start this many workers on this machine")
+    learner.add_argument("--host", default="127.0.0.1", help="use 0.0.0.0 to accept workers from other machines")
+    learner.add_argument("--port", type=int, default=5555)
+    learner.add_argument("--heartbeat_timeout", type=float, default=30.0)
+    learner.add_argument("--token", default=os.environ.get(TOKEN_ENV), help=f"shared worker token (default: ${TOKEN_ENV})")
+    learner.add_argument("--log_dir", default="logs")
+    learner.add_argument("--monitor_flush_every", type=int, default=10, help="episodes buffered per monitor write (1 = every episode)")
+    learner.add_argument("--model_dir", default="models")
+    learner.add_argument("--cache_dir", default="cache")
+    learner.add_argument("--no_cache", action="store_true")
+
+    worker = sub.add_parser("worker")
+    worker.add_argument("--host", default="127.0.0.1")
+    worker.add_argument("--port", type=int, default=5555)
+    worker.add_argument("--worker_id", default=None)
+    worker.add_argument("--heartbeat_interval", type=float, default=5.0)
+    worker.add_argument("--token", default=os.environ.get(TOKEN_ENV), help=f"shared worker token (default: ${TOKEN_ENV})")
+
+    args = p.parse_args()
+
+    if args.role == "learner" and args.host not in ("127.0.0.1", "localhost", "::1") and not args.token:
+        p.error(f"--host {args.host} accepts workers from other machines; set --token or ${TOKEN_ENV} as well")
+
+    if args.role == "learner":
+        run_learner(args)
+    else:
+        run_worker(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,52 @@
 import argparse
 import numpy as np
-from stable_baselines3 import PPO, A2C
-from envs.lunar_lander.env import LunarLanderEnv
-from envs.swaglabs.env import SwagLabsEnv
+from envs import registry
 from .export import export_metrics_csv
+from .coverage import CoverageRun, CoverageStore
+from .cache import ArtifactCache, code_version, config_key, evaluator_version, file_digest
+from .events import configure as configure_events, get_logger
 
-def evaluate_swaglabs(model, env, episodes=5):
+def summarize_swaglabs(episode_metrics):
+    """
+    Aggregate results of Swag Labs episodes, in the order given.
+    """
+
+    return {
+        "avg_reward": np.mean([m["total_reward"] for m in episode_metrics]),
+        "avg_success": np.mean([m["total_success"] for m in episode_metrics]),
+        "avg_error": np.mean([m["total_error"] for m in episode_metrics]),
+    }
+
+
+def summarize_lunar(episode_metrics):
+    """
+    Aggregate results of Lunar Lander episodes, in the order given.
+    """
+
+    return {
+        "avg_reward": np.mean([m["total_reward"] for m in episode_metrics]),
+        "crash_rate": np.mean([int(m["crashed"]) for m in episode_metrics]),
+        "landing_rate": np.mean([int(m["landed"]) for m in episode_metrics]),
+    }
+
+
+def evaluate_swaglabs(model, env, episodes=5, verbose=True, coverage=None, seeds=None):
     """
     Evaluate a trained model on the Swag Labs environment.
+    Per-episode results are recorded as "episode_end" events and, if verbose, printed.
+    Page transitions are recorded into `coverage` (a CoverageRun) if given.
+    With `seeds`, episode i is reset with seeds[i] (and `episodes` is len(seeds)).
     """
 
-    rewards, successes, errors, episode_metrics = [], [], [], []
+    events = get_logger("eval")
+
+    episode_metrics = []
+    episodes = len(seeds) if seeds is not None else episodes
 
     for ep in range(episodes):
-        obs, info = env.reset()
+        obs, info = env.reset(seed=None if seeds is None else int(seeds[ep]))
         terminated, truncated = False, False
-        episode_rewards = []
+        total_reward = 0.0
         total_success = 0
         total_error = 0
         steps = 0
@@ -23,17 +54,15 @@ def evaluate_swaglabs(model, env, episodes=5):
         while not (terminated or truncated):
             action, _ = model.predict(obs, deterministic=True)
             obs, reward, terminated, truncated, info = env.step(action)
-            episode_rewards.append(reward)
+            total_reward += float(reward)
 
             steps += 1  # increment for each step
 
+            if coverage:
+                coverage.record_info(info)
+
             total_success += info.get("success", 0)
             total_error += info.get("error", 0)
-        
-        total_reward = np.sum(episode_rewards)
-        rewards.append(total_reward)
-        successes.append(total_success)
-        errors.append(total_error)
 
         episode_metrics.append({
             "episode": ep + 1,
@@ -43,27 +72,30 @@ def evaluate_swaglabs(model, env, episodes=5):
             "steps": steps,
         })
 
-        print(f"Episode {ep+1}: reward={total_reward:.2f}, "f"success={total_success}, error={total_error}, steps={steps}")
+        events.info("episode_end", **episode_metrics[-1])
 
-    results = {
-        "avg_reward": np.mean(rewards),
-        "avg_success": np.mean(successes),
-        "avg_error": np.mean(errors),
-    }
+        if verbose:
+            print(f"Episode {ep+1}: reward={total_reward:.2f}, "f"success={total_success}, error={total_error}, steps={steps}")
 
-    return results, episode_metrics
+    return summarize_swaglabs(episode_metrics), episode_metrics
             
 
-def evaluate_lunar(model, env, episodes=5):
+def evaluate_lunar(model, env, episodes=5, verbose=True, coverage=None, seeds=None):
     """
     Evaluate a trained model on the Lunar Lander environment.
+    Per-episode results are recorded as "episode_end" events and, if verbose, printed.
+    `coverage` is accepted so all evaluators share a signature; Lunar Lander has no page states to record.
+    With `seeds`, episode i is reset with seeds[i] (and `episodes` is len(seeds)).
     """
-    rewards, crashes, landings, episode_metrics = [], [], [], []
+
+    events = get_logger("eval")
+    episode_metrics = []
+    episodes = len(seeds) if seeds is not None else episodes
 
     for ep in range(episodes):
-        obs, _ = env.reset()
+        obs, _ = env.reset(seed=None if seeds is None else int(seeds[ep]))
         terminated, truncated = False, False
-        episode_rewards = []
+        total_reward = 0.0
         crashed, landed = False, False
         landing_type = None
         steps = 0
@@ -71,7 +103,7 @@ def evaluate_lunar(model, env, episodes=5):
         while not (terminated or truncated):
             action, _ = model.predict(obs, deterministic=True)
             obs, reward, terminated, truncated, info = env.step(action)
-            episode_rewards.append(reward)
+            total_reward += float(reward)
 
             steps += 1 # increment for each step
 
@@ -82,80 +114,126 @@ def evaluate_lunar(model, env, episodes=5):
             if info.get("landing_type"):
                 landing_type = info["landing_type"] 
 
-        landing_time = steps if landed else None
-        total_reward = np.sum(episode_rewards)
-        rewards.append(total_reward)
-        crashes.append(int(crashed))
-        landings.append(int(landed))
+        # Physics frames, so landing times stay comparable across action repeat. With action_repeat=1
+        # a frame is a policy step, the unit landing_time had before; landing_steps keeps the step count
+        landing_time = info.get("frame", steps) if landed else None
+        landing_steps = steps if landed else None
 
         # Add current episodes data to metrics list to export later
         episode_metrics.append({
             "episode": ep + 1,
-            "total_reward": float(np.sum(episode_rewards)),
+            "total_reward": float(total_reward),
             "landing_type": landing_type,
             "crashed": crashed, 
             "landed": landed,
             "landing_time": landing_time,
+            "landing_steps": landing_steps,
         })
 
-        print(f"Episode {ep+1}: reward={total_reward:.2f}, "f"landed={landed}, crashed={crashed}, landing_type={landing_type}, landing_time={landing_time}")
+        events.info("episode_end", **episode_metrics[-1])
 
-    results = {
-        "avg_reward": np.mean(rewards),
-        "crash_rate": np.mean(crashes),
-        "landing_rate": np.mean(landings),
-    }
-        
-    return results, episode_metrics
+        if verbose:
+            print(f"Episode {ep+1}: reward={total_reward:.2f}, "f"landed={landed}, crashed={crashed}, landing_type={landing_type}, landing_time={landing_time}")
+
+    return summarize_lunar(episode_metrics), episode_metrics
 
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--app", choices=["lunar_lander", "swaglabs"], default="lunar_lander")
+    p.add_argument("--app", choices=registry.app_names(), default="lunar_lander")
     p.add_argument("--algo", choices=["ppo", "a2c"], default="ppo")
-    p.add_argument("--persona", choices=["baseline", "speedrunner", "safe", "functional", "explorer"], default="baseline")
+    p.add_argument("--persona", choices=registry.all_personas(), default="baseline")
     p.add_argument("--episodes", type=int, default=10)
     p.add_argument("--timesteps", type=int, default=500_000)
+    p.add_argument("--seed", type=int, default=7)
     p.add_argument("--render", action="store_true")
+    p.add_argument("--best", action="store_true", help="evaluate the best snapshot kept by train --eval_freq")
+    p.add_argument("--shared", action="store_true", help="evaluate the model trained by src.multi_persona")
+    p.add_argument("--action_repeat", type=int, default=None, help="defaults to the value the model was trained with")
     p.add_argument("--export", action="store_true")
+    p.add_argument("--quiet", action="store_true")
+    p.add_argument("--events_dir", default=None)
+    p.add_argument("--step_events", type=float, default=0.0)
+    p.add_argument("--cache_dir", default="cache")
+    p.add_argument("--no_cache", action="store_true")
+    p.add_argument("--coverage", action="store_true", help="record page transition coverage (Swag Labs)")
+    p.add_argument("--coverage_dir", default="data/coverage")
+    p.add_argument("--failures_dir", default="data/failures", help="failure signature index (Swag Labs)")
     args = p.parse_args()
 
-    # Choose the algorithm
-    algo = PPO if args.algo == "ppo" else A2C
+    if args.persona not in registry.get_app(args.app)["personas"]:
+        p.error(f"--persona must be one of {', '.join(registry.get_app(args.app)['personas'])} for {args.app}")
+    if args.shared and args.best:
+        p.error("shared-rollout training keeps no --best snapshot")
+
+    # Structured event logs (JSON lines per process), per-step events sampled if enabled
+    configure_events(log_dir=args.events_dir, step_sample_rate=args.step_events)
 
-    app_name = "lunar" if args.app == "lunar_lander" else "swaglabs"
-    file_name = f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}"
+    app_name = registry.short_name(args.app)
+    file_name = f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}{'_shared' if args.shared else ''}"
 
     # Create model path
-    model_path = f"models/{args.app}/{file_name}.zip"
+    model_path = f"models/{args.app}/{file_name}{'_best' if args.best else ''}.zip"
+
+    # Everything that determines the eval results, hashed into the cache key
+    eval_config = {
+        "app": args.app,
+        "persona": args.persona,
+        "episodes": args.episodes,
+        "action_repeat": args.action_repeat,
+        "deterministic": True,
+        "seed": args.seed,
+        "model_digest": file_digest(model_path),
+        "code_version": code_version(args.app),
+        "evaluator_version": evaluator_version(args.app),
+    }
+    key = config_key(eval_config)
+    cache = ArtifactCache(args.cache_dir)
 
-    # Load model
-    model = algo.load(model_path)
-    print(f"Loaded model: {model_path}")
+    # Rendered runs are for watching the agent and coverage runs need the steps, so they always run
+    cached = None if (args.no_cache or args.render or args.coverage) else cache.lookup_eval(key)
 
-    render_mode = "human" if args.render else None
+    if cached:
+        results, episode_metrics = cached
+        print(f"Cache hit ({key}), skipped evaluation of: {model_path}")
 
-    # Create correct env and evaluate based on app
-    if args.app == "lunar_lander":
-        env = LunarLanderEnv(persona=args.persona, render_mode=render_mode, seed=7)
-        results, episode_metrics = evaluate_lunar(model, env, episodes=args.episodes)
+    else:
+        # SB3 (and torch) are only imported when a model actually has to be loaded
+        from stable_baselines3 import PPO, A2C
 
-        print(f"\n--- Evaluation Results ({args.algo.upper()} | {args.persona}) ---")
-        print(f"Average Reward: {results['avg_reward']:.2f}")
-        print(f"Landing Rate: {results['landing_rate']*100:.2f}%")
-        print(f"Crash Rate: {results['crash_rate']*100:.2f}%\n")
-    
-    else: 
-        env = SwagLabsEnv(persona=args.persona)
-        results, episode_metrics = evaluate_swaglabs(model, env, episodes=args.episodes)
+        # Choose the algorithm
+        algo = PPO if args.algo == "ppo" else A2C
+
+        # Load model
+        model = algo.load(model_path)
+        print(f"Loaded model: {model_path}")
+
+        render_mode = "human" if args.render else None
+
+        # Create correct env and evaluate based on app (only the selected app's env module is imported)
+        action_repeat = args.action_repeat or getattr(model, "env_config", {}).get("action_repeat", 1)
+        env = registry.make_env(args.app, persona=args.persona, render_mode=render_mode, seed=args.seed, action_repeat=action_repeat,
+                                failures_dir=args.failures_dir)
+        evaluate = registry.get_evaluator(args.app)
+        coverage = CoverageRun(f"{file_name}_eval", persona=args.persona, app=args.app) if args.coverage else None
+        results, episode_metrics = evaluate(model, env, episodes=args.episodes, verbose=not args.quiet, coverage=coverage)
+
+        env.close()
+        cache.store_eval(key, results, episode_metrics, eval_config, file_name)
+
+        if coverage:
+            CoverageStore(args.coverage_dir).commit(coverage)
+            print(f"Coverage: {coverage.pairs} (page, action) pairs, {coverage.transitions} transitions")
 
-        print(f"\n--- Evaluation Results ({args.algo.upper()} | {args.persona}) ---")
-        print(f"Average Reward: {results['avg_reward']:.2f}")
-        print(f"Average Success: {results['avg_success']:.2f}")
-        print(f"Average Errors: {results['avg_error']:.2f}\n")
+    print(f"\n--- Evaluation Results ({args.algo.upper()} | {args.persona}) ---")
+    print(f"Average Reward: {results['avg_reward']:.2f}")
 
-    # Evaluate
-    env.close()
+    for label, metric, fmt in registry.get_app(args.app)["summary"]:
+        if fmt == "percent":
+            print(f"{label}: {results[metric]*100:.2f}%")
+        else:
+            print(f"{label}: {results[metric]:.2f}")
+    print()
 
     # Export per-episode metrics to CSV
     export_dir = f"logs/{args.app}/{file_name}"
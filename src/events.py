@@ -0,0 +1,209 @@
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+# Event levels, lowest to highest
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+# Defaults are read from the environment so SubprocVecEnv workers inherit them
+_config = {
+    "log_dir": os.environ.get("DRL_EVENTS_DIR") or None,
+    "level": os.environ.get("DRL_EVENTS_LEVEL", "info"),
+    "step_sample_rate": float(os.environ.get("DRL_STEP_EVENTS", "0")),
+    "console_level": os.environ.get("DRL_EVENTS_CONSOLE", "error"),
+}
+
+_loggers = {}
+_lock = threading.Lock()
+
+
+class EventLogger:
+    """
+    Structured event logger for envs and evaluation loops.
+    Keeps the most recent events in an in-memory ring buffer and, if a log
+    directory is set, writes them as JSON lines from a background thread so
+    the caller never blocks on file I/O.
+
+    Per-step events are off by default. When enabled, they are sampled at
+    `step_sample_rate` (0 = off, 1 = every step).
+    """
+
+    def __init__(self, name, log_dir=None, level="info", step_sample_rate=0.0,
+                 console_level="error", buffer_size=1024, flush_interval=0.5):
+        self.name = name
+        self.buffer = deque(maxlen=buffer_size)
+        self.flush_interval = flush_interval
+        self.path = None
+
+        self._rng = random.Random()
+        self._queue = None
+        self._writer = None
+
+        self.reconfigure(log_dir=log_dir, level=level, step_sample_rate=step_sample_rate, console_level=console_level)
+
+    def reconfigure(self, log_dir=None, level="info", step_sample_rate=0.0, console_level="error"):
+        """
+        Applies new settings to this logger. Buffered events are kept; if the log
+        directory changes, pending events are flushed to the old file first.
+        """
+
+        self.level = LEVELS[level]
+        self.console_level = LEVELS[console_level]
+        self.step_sample_rate = step_sample_rate
+
+        # One file per logger and process so parallel workers never interleave
+        path = os.path.join(log_dir, f"{self.name}.{os.getpid()}.jsonl") if log_dir else None
+        if path == self.path and (self._writer is not None) == bool(path):
+            return
+
+        self.close()
+        self.path = path
+        if path:
+            os.makedirs(log_dir, exist_ok=True)
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, args=(self._queue,), name=f"events-{self.name}",
+                                            daemon=True)
+            self._writer.start()
+
+    def log(self, level, event, **fields):
+        """
+        Records an event if its level is enabled.
+        """
+
+        if LEVELS[level] < self.level:
+            return
+
+        record = {"time": time.time(), "level": level, "logger": self.name, "event": event}
+        record.update(fields)
+        self.buffer.append(record)
+
+        if self._queue is not None:
+            self._queue.put(record)
+
+        if LEVELS[level] >= self.console_level:
+            details = ", ".join(f"{key}={value}" for key, value in fields.items())
+            print(f"[{self.name}] {level.upper()} {event}: {details}", file=sys.stderr)
+
+    def debug(self, event, **fields):
+        self.log("debug", event, **fields)
+
+    def info(self, event, **fields):
+        self.log("info", event, **fields)
+
+    def warning(self, event, **fields):
+        self.log("warning", event, **fields)
+
+    def error(self, event, **fields):
+        self.log("error", event, **fields)
+
+    def step(self, event, **fields):
+        """
+        Records a per-step event. Dropped unless step events are enabled,
+        and sampled at `step_sample_rate` when they are.
+        """
+
+        if self.step_sample_rate <= 0:
+            return
+        if self.step_sample_rate < 1 and self._rng.random() >= self.step_sample_rate:
+            return
+
+        self.log("debug" if self.level <= LEVELS["debug"] else "info", event, **fields)
+
+    def recent(self, n=None):
+        """
+        Returns the last n buffered events (all buffered events by default).
+        """
+
+        events = list(self.buffer)
+        return events if n is None else events[-n:]
+
+    def _write_loop(self, records):
+        """
+        Background writer. Drains the queue in batches and flushes periodically.
+        A `None` record signals shutdown.
+        """
+
+        with open(self.path, "a", buffering=64 * 1024) as file:
+            running = True
+            while running:
+                try:
+                    record = records.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    file.flush()
+                    continue
+
+                batch = [record]
+                while True:
+                    try:
+                        batch.append(records.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for record in batch:
+                    if record is None:
+                        running = False
+                        break
+                    file.write(json.dumps(record, default=str) + "\n")
+
+            file.flush()
+
+    def close(self):
+        """
+        Flushes pending events and stops the background writer.
+        """
+
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            self._queue = None
+
+
+def configure(log_dir=None, level="info", step_sample_rate=0.0, console_level="error"):
+    """
+    Sets the logging config. Loggers already handed out by get_logger() are
+    reconfigured in place, so modules may fetch their logger before this is called.
+    Also exports the config as environment variables so worker processes pick it up.
+    """
+
+    with _lock:
+        _config.update(log_dir=log_dir, level=level, step_sample_rate=step_sample_rate, console_level=console_level)
+        for logger in _loggers.values():
+            logger.reconfigure(**_config)
+
+    if log_dir:
+        os.environ["DRL_EVENTS_DIR"] = log_dir
+    else:
+        os.environ.pop("DRL_EVENTS_DIR", None)
+    os.environ["DRL_EVENTS_LEVEL"] = level
+    os.environ["DRL_STEP_EVENTS"] = str(step_sample_rate)
+    os.environ["DRL_EVENTS_CONSOLE"] = console_level
+
+
+def get_logger(name):
+    """
+    Returns the shared logger for `name`, creating it from the current config.
+    """
+
+    with _lock:
+        if name not in _loggers:
+            _loggers[name] = EventLogger(name, **_config)
+        return _loggers[name]
+
+
+@atexit.register
+def shutdown():
+    """
+    Flushes and closes all loggers. Runs automatically at interpreter exit.
+    """
+
+    with _lock:
+        for logger in _loggers.values():
+            logger.close()
+        _loggers.clear()
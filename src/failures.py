@@ -0,0 +1,218 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+import traceback
+import uuid
+
+# Volatile parts of exception messages (addresses, session ids, numbers) that would
+# otherwise split one defect into many signatures
+VOLATILE = [
+    (re.compile(r"0x[0-9a-fA-F]+"), "<addr>"),
+    (re.compile(r"\b[0-9a-fA-F]{16,}\b"), "<id>"),
+    (re.compile(r"\d+(\.\d+)?"), "N"),
+]
+
+
+def normalize_message(message):
+    """
+    First line of an exception message with volatile parts replaced.
+    Selenium appends a native stack trace after the first line, which is dropped.
+    """
+
+    line = str(message).strip().splitlines()[0] if str(message).strip() else ""
+    for pattern, replacement in VOLATILE:
+        line = pattern.sub(replacement, line)
+    return line[:200]
+
+
+def normalize_stack(exc):
+    """
+    Python frames of an exception's traceback as "file:function", without line
+    numbers, so the signature survives unrelated edits to the same file.
+    """
+
+    frames = traceback.extract_tb(exc.__traceback__)
+    return [f"{os.path.basename(frame.filename)}:{frame.name}" for frame in frames]
+
+
+def failure_signature(action, page, exception, message, frames):
+    """
+    Return:
+        16 hex char hash identifying a failure by where it happened and how
+    """
+
+    key = json.dumps([int(action), page, exception, message, frames])
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def merge_entry(entry, other):
+    """
+    Folds `other` (same signature) into `entry`: counts add up, the time range
+    widens and the shorter reproducing prefix wins.
+    """
+
+    entry["count"] += other["count"]
+    entry["first_seen"] = min(entry["first_seen"], other["first_seen"])
+    entry["last_seen"] = max(entry["last_seen"], other["last_seen"])
+    entry["personas"] = sorted(set(entry["personas"]) | set(other["personas"]))
+    if len(other["repro"]) < len(entry["repro"]):
+        entry["repro"] = other["repro"]
+    return entry
+
+
+class FailureIndex:
+    """
+    On-disk index of distinct failures, keyed by signature.
+
+    Each process writes its own shard (`shard_<id>.json`) so parallel workers never
+    overwrite each other. Reading merges index.json and all shards; compact() folds
+    the shards back into index.json.
+
+    Per signature it keeps the action, page, exception type, normalized message and
+    stack, an occurrence count, first/last seen times, and the shortest observed
+    action sequence from reset() that ended in this failure.
+    """
+
+    def __init__(self, path="data/failures", flush_every=50):
+        self.path = path
+        self.flush_every = flush_every
+        self.entries = {}
+        self.unflushed = 0
+        self.shard = os.path.join(path, f"shard_{os.getpid()}_{uuid.uuid4().hex[:8]}.json")
+
+    def record(self, action, page, exc, actions, url=None, persona=None):
+        """
+        Records one failure. `actions` is the episode's action sequence up to and
+        including the failing action.
+
+        Return:
+            (signature, True if this process hasn't seen the signature before)
+        """
+
+        exception = type(exc).__name__
+        message = normalize_message(exc)
+        frames = normalize_stack(exc)
+        signature = failure_signature(action, page, exception, message, frames)
+        now = time.time()
+
+        observed = {
+            "signature": signature,
+            "action": int(action),
+            "page": page,
+            "url": url,
+            "exception": exception,
+            "message": message,
+            "frames": frames,
+            "count": 1,
+            "first_seen": now,
+            "last_seen": now,
+            "personas": [persona] if persona else [],
+            "repro": [int(a) for a in actions],
+        }
+
+        new = signature not in self.entries
+        if new:
+            self.entries[signature] = observed
+        else:
+            merge_entry(self.entries[signature], observed)
+
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            self.flush()
+
+        return signature, new
+
+    def flush(self):
+        """
+        Writes this process's entries to its shard, replacing it atomically.
+        """
+
+        if not self.unflushed:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self.shard + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump(self.entries, file)
+        os.replace(tmp, self.shard)
+        self.unflushed = 0
+
+    def load(self):
+        """
+        Return:
+            all signatures on disk (index.json plus every shard), merged
+        """
+
+        merged = {}
+        paths = [os.path.join(self.path, "index.json")] + sorted(glob.glob(os.path.join(self.path, "shard_*.json")))
+
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r") as file:
+                for signature, entry in json.load(file).items():
+                    if signature in merged:
+                        merge_entry(merged[signature], entry)
+                    else:
+                        merged[signature] = entry
+
+        return merged
+
+    def compact(self):
+        """
+        Folds all shards into index.json. Only run it while no process is writing.
+
+        Return:
+            number of distinct signatures
+        """
+
+        merged = self.load()
+        shards = glob.glob(os.path.join(self.path, "shard_*.json"))
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp = os.path.join(self.path, "index.json.tmp")
+        with open(tmp, "w") as file:
+            json.dump(merged, file, indent=1)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+
+        for shard in shards:
+            os.remove(shard)
+        return len(merged)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--dir", default="data/failures")
+    p.add_argument("--show", default=None, help="print the full entry of one signature")
+    p.add_argument("--compact", action="store_true", help="fold per-process shards into index.json")
+    args = p.parse_args()
+
+    index = FailureIndex(args.dir)
+    entries = index.load()
+
+    if args.compact:
+        print(f"Compacted {index.compact()} signatures into {args.dir}/index.json")
+
+    if args.show:
+        matches = [entry for signature, entry in entries.items() if signature.startswith(args.show)]
+        for entry in matches:
+            print(json.dumps(entry, indent=2))
+        if not matches:
+            print(f"No signature starting with {args.show}")
+        return
+
+    total = sum(entry["count"] for entry in entries.values())
+    print(f"{len(entries)} distinct failures ({total} occurrences) in {args.dir}\n")
+    print(f"{'signature':<18} {'count':>7} {'action':>6} {'page':<18} {'exception':<28} {'repro':>5}  message")
+
+    for entry in sorted(entries.values(), key=lambda entry: entry["count"], reverse=True):
+        print(f"{entry['signature']:<18} {entry['count']:>7} {entry['action']:>6} {entry['page']:<18} "
+              f"{entry['exception']:<28} {len(entry['repro']):>5}  {entry['message']}")
+
+
+if __name__ == "__main__":
+    main()
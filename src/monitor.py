@@ -0,0 +1,161 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+
+from stable_baselines3.common.monitor import Monitor, ResultsWriter
+
+
+def monitor_dir(log_dir, app, run_id):
+    """
+    Directory holding the per-worker monitor files of one run.
+    """
+
+    return os.path.join(log_dir, app, "monitor", run_id)
+
+
+def monitor_path(log_dir, app, run_id, worker=0):
+    """
+    Monitor file of one worker, namespaced by run id so runs never overwrite each other.
+    """
+
+    return os.path.join(monitor_dir(log_dir, app, run_id), f"worker_{worker}.{Monitor.EXT}")
+
+
+def clear_monitor_dir(log_dir, app, run_id):
+    """
+    Removes the monitor files left by an earlier run with the same id. Called
+    before the envs are built, so a rerun with fewer workers doesn't merge stale files.
+    """
+
+    shutil.rmtree(monitor_dir(log_dir, app, run_id), ignore_errors=True)
+
+
+class BufferedResultsWriter(ResultsWriter):
+    """
+    ResultsWriter that buffers episode rows and writes them in batches.
+    Rows are flushed every `flush_every` episodes and when the writer is closed.
+
+    Unlike SB3's writer, a crash loses the up to `flush_every - 1` episodes
+    still buffered. Training scripts expose this as `--monitor_flush_every`;
+    1 writes every episode as it finishes.
+    """
+
+    def __init__(self, *args, flush_every=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_every = flush_every
+        self.rows = []
+
+    def write_row(self, epinfo):
+        # Called once per finished episode by Monitor
+        self.rows.append(epinfo)
+        if len(self.rows) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.rows and not self.file_handler.closed:
+            self.logger.writerows(self.rows)
+            self.file_handler.flush()
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class BufferedMonitor(Monitor):
+    """
+    SB3 Monitor that writes through a BufferedResultsWriter.
+    """
+
+    def __init__(self, env, filename, flush_every=10, **kwargs):
+        super().__init__(env, filename=None, **kwargs)
+
+        self.results_writer = BufferedResultsWriter(
+            filename,
+            header={"t_start": self.t_start, "env_id": str(env.spec and env.spec.id)},
+            extra_keys=self.reset_keywords + self.info_keywords,
+            flush_every=flush_every,
+        )
+
+
+def read_monitor_file(path):
+    """
+    Reads a monitor file.
+
+    Return:
+        header: dict from the first (JSON) line
+        rows: list of dicts from the CSV body
+    """
+
+    with open(path, "r", newline="") as file:
+        first = file.readline()
+        header = json.loads(first[1:]) if first.startswith("#") else {}
+        rows = list(csv.DictReader(file))
+
+    return header, rows
+
+
+def merge_monitor_files(run_dir, output=None):
+    """
+    Merges all worker monitor files of a run into one time-ordered episode log.
+    Episode times are re-based on the earliest worker start, and a `worker`
+    column records where each episode came from.
+
+    Return:
+        path of the merged file, or None if there was nothing to merge
+    """
+
+    paths = sorted(glob.glob(os.path.join(run_dir, f"worker_*.{Monitor.EXT}")))
+    if not paths:
+        return None
+
+    workers = []
+    for path in paths:
+        header, rows = read_monitor_file(path)
+        worker = os.path.basename(path).split(".")[0].split("_", 1)[1]
+        workers.append((worker, header, rows))
+
+    t_start = min(float(header.get("t_start", 0.0)) for _, header, _ in workers)
+    episodes = []
+
+    for worker, header, rows in workers:
+        offset = float(header.get("t_start", t_start)) - t_start
+        for row in rows:
+            row["t"] = round(float(row["t"]) + offset, 6)
+            row["worker"] = worker
+            episodes.append(row)
+
+    episodes.sort(key=lambda row: row["t"])
+
+    fieldnames = ["r", "l", "t"]
+    for row in episodes:
+        fieldnames += [key for key in row if key not in fieldnames]
+
+    output = output or os.path.join(run_dir, f"merged.{Monitor.EXT}")
+    with open(output, "w", newline="\n") as file:
+        file.write(f"#{json.dumps({'t_start': t_start, 'workers': len(workers)})}\n")
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(episodes)
+
+    return output
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--run_dir", required=True)
+    p.add_argument("--output", default=None)
+    args = p.parse_args()
+
+    path = merge_monitor_files(args.run_dir, args.output)
+    if path:
+        print(f"Merged monitor files into: {path}")
+    else:
+        print(f"No worker monitor files found in: {args.run_dir}")
+
+
+if __name__ == "__main__":
+    main()
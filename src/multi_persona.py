@@ -0,0 +1,262 @@
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+
+from envs import registry
+from .cache import ArtifactCache, config_key
+from .events import configure as configure_events
+from .train import load_hyperparams, make_env, train_config
+
+
+def vtrace_advantages(rewards, values, episode_starts, last_values, dones, ratios, gamma, gae_lambda):
+    """
+    GAE with truncated importance weights (V-trace), for learning from
+    transitions another persona's policy chose.
+
+    All arrays are [n_steps, n_envs]. `ratios` is pi_learner(a|s) / pi_behavior(a|s),
+    which is exactly 1 on the learner's own columns, so those get plain GAE,
+    identical to SB3's RolloutBuffer.compute_returns_and_advantage.
+
+    Return:
+        advantages, returns
+    """
+
+    rho = np.minimum(ratios, 1.0)
+    advantages = np.zeros_like(rewards)
+    last_gae = np.zeros_like(last_values)
+
+    for step in reversed(range(len(rewards))):
+        if step == len(rewards) - 1:
+            next_non_terminal = 1.0 - dones
+            next_values = last_values
+        else:
+            next_non_terminal = 1.0 - episode_starts[step + 1]
+            next_values = values[step + 1]
+
+        delta = rho[step] * (rewards[step] + gamma * next_values * next_non_terminal - values[step])
+        last_gae = delta + gamma * gae_lambda * rho[step] * next_non_terminal * last_gae
+        advantages[step] = last_gae
+
+    return advantages, advantages + values
+
+
+class SharedRolloutTrainer:
+    """
+    Trains one policy per persona from a single stream of LunarLander simulation.
+
+    Env column i is driven by persona i % len(personas). Each step's reward is
+    computed for every persona (info["persona_rewards"]), and every learner
+    trains on all columns: its own on-policy, the others' corrected with
+    truncated importance weights (see vtrace_advantages). Each learner's
+    rollout buffer stores its own value estimates and log-probs of the taken
+    actions, so PPO's clipping stays relative to the learner's current policy.
+    """
+
+    def __init__(self, Algo, personas, vec_env, hyperparams, seed=7, policy="MlpPolicy"):
+        if vec_env.num_envs < len(personas):
+            raise ValueError(f"need at least one env per persona ({len(personas)}), got {vec_env.num_envs}")
+
+        self.personas = personas
+        self.env = vec_env
+        self.behavior = np.arange(vec_env.num_envs) % len(personas)
+        self.models = {
+            persona: Algo(policy, vec_env, verbose=0, seed=seed + i, **hyperparams)
+            for i, persona in enumerate(personas)
+        }
+
+    def learn(self, total_timesteps, loggers=None):
+        import torch as th
+        from stable_baselines3.common.utils import obs_as_tensor
+
+        models = list(self.models.values())
+        for persona, model in self.models.items():
+            if loggers:
+                model.set_logger(loggers[persona])
+            model._setup_learn(total_timesteps, reset_num_timesteps=True)
+
+        n_envs = self.env.num_envs
+        n_steps = models[0].n_steps
+        obs = self.env.reset()
+        episode_starts = np.ones(n_envs, dtype=bool)
+        episode_returns = np.zeros((len(models), n_envs))
+        episode_lengths = np.zeros(n_envs, dtype=np.int64)
+        timesteps, iteration = 0, 0
+
+        while timesteps < total_timesteps:
+            for model in models:
+                model.policy.set_training_mode(False)
+                model.rollout_buffer.reset()
+
+            ratios = np.ones((len(models), n_steps, n_envs), dtype=np.float32)
+
+            for step in range(n_steps):
+                actions = np.zeros(n_envs, dtype=np.int64)
+                values, log_probs = [], []
+
+                with th.no_grad():
+                    # Each persona picks the actions for its own columns
+                    for i, model in enumerate(models):
+                        columns = self.behavior == i
+                        obs_tensor = obs_as_tensor(obs[columns], model.device)
+                        actions[columns] = model.policy(obs_tensor)[0].cpu().numpy()
+
+                    # Every learner scores all taken actions with its own value and policy
+                    for model in models:
+                        obs_tensor = obs_as_tensor(obs, model.device)
+                        action_tensor = th.as_tensor(actions, device=model.device)
+                        value, log_prob, _ = model.policy.evaluate_actions(obs_tensor, action_tensor)
+                        values.append(value)
+                        log_probs.append(log_prob.cpu().numpy())
+
+                behavior_log_probs = np.choose(self.behavior, log_probs)
+                new_obs, _, dones, infos = self.env.step(actions)
+                episode_lengths += 1
+
+                for i, (persona, model) in enumerate(self.models.items()):
+                    rewards = np.array([info["persona_rewards"][persona] for info in infos], dtype=np.float32)
+                    episode_returns[i] += rewards
+                    ratios[i, step] = np.exp(log_probs[i] - behavior_log_probs)
+
+                    # Bootstrap time-limit truncations with the learner's value, as SB3 does
+                    for idx, done in enumerate(dones):
+                        if done and infos[idx].get("terminal_observation") is not None and infos[idx].get("TimeLimit.truncated", False):
+                            terminal_obs = model.policy.obs_to_tensor(infos[idx]["terminal_observation"])[0]
+                            with th.no_grad():
+                                rewards[idx] += model.gamma * model.policy.predict_values(terminal_obs)[0].item()
+
+                    model.rollout_buffer.add(obs, actions.reshape(-1, 1), rewards, episode_starts, values[i], th.as_tensor(log_probs[i]))
+
+                for idx in np.flatnonzero(dones):
+                    for i, model in enumerate(models):
+                        model.ep_info_buffer.append({"r": float(episode_returns[i, idx]), "l": int(episode_lengths[idx])})
+                    episode_returns[:, idx] = 0.0
+                    episode_lengths[idx] = 0
+
+                obs = new_obs
+                episode_starts = dones
+
+            timesteps += n_steps * n_envs
+            iteration += 1
+
+            for i, model in enumerate(models):
+                buffer = model.rollout_buffer
+                with th.no_grad():
+                    last_values = model.policy.predict_values(obs_as_tensor(obs, model.device)).cpu().numpy().flatten()
+
+                advantages, returns = vtrace_advantages(
+                    buffer.rewards, buffer.values, buffer.episode_starts, last_values, dones.astype(np.float32),
+                    ratios[i], model.gamma, model.gae_lambda,
+                )
+                buffer.advantages, buffer.returns = advantages.astype(np.float32), returns.astype(np.float32)
+
+                off_policy = ratios[i][:, self.behavior != i]
+                if off_policy.size:
+                    model.logger.record("shared/offpolicy_ratio_mean", float(off_policy.mean()))
+                    model.logger.record("shared/offpolicy_ratio_clipped", float((off_policy > 1.0).mean()))
+
+                model.num_timesteps = timesteps
+                model._update_current_progress_remaining(timesteps, total_timesteps)
+                model.train()
+                model.dump_logs(iteration)
+
+        return self.models
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--algo", choices=["ppo", "a2c"], default="ppo")
+    p.add_argument("--personas", nargs="+", choices=registry.get_app("lunar_lander")["personas"],
+                   default=registry.get_app("lunar_lander")["personas"])
+    p.add_argument("--timesteps", type=int, default=500_000, help="simulation steps, shared by all personas")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--n_envs", type=int, default=6, help="rounded up to a multiple of the number of personas")
+    p.add_argument("--action_repeat", type=int, default=1)
+    p.add_argument("--log_dir", default="logs")
+    p.add_argument("--monitor_flush_every", type=int, default=10, help="episodes buffered per monitor write (1 = every episode)")
+    p.add_argument("--model_dir", default="models")
+    p.add_argument("--events_dir", default=None)
+    p.add_argument("--cache_dir", default="cache")
+    p.add_argument("--no_cache", action="store_true")
+    args = p.parse_args()
+
+    # Heavy imports are deferred until after argument parsing
+    from stable_baselines3 import PPO, A2C
+    from stable_baselines3.common.logger import configure
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+    from .monitor import clear_monitor_dir, merge_monitor_files, monitor_dir
+
+    configure_events(log_dir=args.events_dir)
+
+    app = "lunar_lander"
+    app_name = registry.short_name(app)
+    personas = list(dict.fromkeys(args.personas))
+    n_envs = -(-args.n_envs // len(personas)) * len(personas)
+
+    Algo = PPO if args.algo == "ppo" else A2C
+    hyperparams = load_hyperparams(args.algo, app)
+
+    # src.train model names plus "_shared", so they never replace an independently trained model on disk.
+    # The shared-rollout keys (which personas shared the simulation, and how many envs) do the same in the cache.
+    # "_shared" is also a run mode parse_run_name understands, so the results store and report keep these runs apart
+    model_app_dir = os.path.join(args.model_dir, app)
+    os.makedirs(model_app_dir, exist_ok=True)
+    file_names = {persona: f"{app_name}_{args.algo}_{persona}_{args.timesteps}_shared" for persona in personas}
+    paths = {persona: os.path.join(model_app_dir, f"{file_name}.zip") for persona, file_name in file_names.items()}
+    configs = {
+        persona: train_config(app, args.algo, persona, args.seed, args.timesteps, n_envs, args.action_repeat,
+                              hyperparams, shared_rollout=personas)
+        for persona in personas
+    }
+    keys = {persona: config_key(config) for persona, config in configs.items()}
+    cache = ArtifactCache(args.cache_dir)
+
+    # The personas are trained together, so only a hit for every one of them skips training
+    cached = None if args.no_cache else {persona: cache.lookup_model(key) for persona, key in keys.items()}
+    if cached and all(cached.values()):
+        for persona, path in cached.items():
+            shutil.copyfile(path, paths[persona])
+            cache.link(file_names[persona], keys[persona])
+            print(f"Cache hit ({keys[persona]}), skipped training. Restored ({persona}): ", paths[persona])
+        return
+
+    # Monitor files record the default Gym reward, since the simulation is shared
+    run_id = f"{app_name}_{args.algo}_shared_{args.timesteps}_s{args.seed}"
+    clear_monitor_dir(args.log_dir, app, run_id)
+    env_fns = [
+        lambda worker=worker: make_env(app=app, persona="baseline", seed=args.seed + worker, run_id=run_id, worker=worker,
+                                       log_dir=args.log_dir, action_repeat=args.action_repeat, reward_personas=personas,
+                                       monitor_flush_every=args.monitor_flush_every)
+        for worker in range(n_envs)
+    ]
+    vec_env = SubprocVecEnv(env_fns) if n_envs > 1 else DummyVecEnv(env_fns)
+
+    trainer = SharedRolloutTrainer(Algo, personas, vec_env, hyperparams, seed=args.seed)
+
+    loggers = {
+        persona: configure(os.path.join(args.log_dir, app, file_name), ["stdout", "tensorboard"])
+        for persona, file_name in file_names.items()
+    }
+
+    print(f"Training {', '.join(personas)} from one shared simulation ({n_envs} envs, {args.timesteps} steps)")
+    start = time.time()
+
+    try:
+        models = trainer.learn(args.timesteps, loggers=loggers)
+    finally:
+        vec_env.close()
+        merge_monitor_files(monitor_dir(args.log_dir, app, run_id))
+
+    for persona, model in models.items():
+        model.env_config = {"action_repeat": args.action_repeat}
+        model.save(paths[persona])
+        cache.store_model(keys[persona], paths[persona], configs[persona], file_names[persona])
+        print(f"Saved ({persona}, {keys[persona]}): ", paths[persona])
+
+    print(f"Trained {len(models)} personas in {time.time() - start:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
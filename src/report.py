@@ -0,0 +1,340 @@
+import argparse
+import glob
+import html
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from .results import ResultsStore, parse_run_name
+
+# Per-episode metrics compared in the report, per app
+METRICS = {
+    "lunar_lander": ["total_reward", "landed", "crashed", "landing_time"],
+    "swaglabs": ["total_reward", "total_success", "total_error", "steps"],
+}
+
+# Shaped reward, only comparable between groups trained and evaluated with the same persona
+PRIMARY_METRIC = "total_reward"
+
+# Metrics that mean the same thing for every persona, used for pairwise significance tests
+COMPARISON_METRICS = {
+    "lunar_lander": ["landed", "crashed"],
+    "swaglabs": ["total_success", "total_error"],
+}
+
+
+def load_eval_metrics(pattern="logs/**/metrics.csv"):
+    """
+    Loads every eval metrics.csv matching `pattern` into one DataFrame,
+    tagging rows with the run metadata parsed from the parent directory name.
+    """
+
+    frames = []
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        df = pd.read_csv(path)
+        meta = parse_run_name(os.path.basename(os.path.dirname(path)))
+
+        for field, value in meta.items():
+            df[field] = value
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+
+    # Booleans are exported as strings by csv.DictWriter
+    for column in ["landed", "crashed"]:
+        if column in df:
+            df[column] = df[column].astype(str).str.lower().eq("true").astype(float)
+
+    return df
+
+
+def bootstrap_ci(values, n_boot=2000, ci=0.95, rng=None):
+    """
+    Vectorized percentile bootstrap of the mean. NaNs are ignored.
+
+    Return:
+        mean, low, high
+    """
+
+    rng = rng or np.random.default_rng(0)
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+
+    if len(values) == 0:
+        return np.nan, np.nan, np.nan
+    if len(values) == 1:
+        return values[0], values[0], values[0]
+
+    # All resamples at once: (n_boot, n) index matrix
+    samples = values[rng.integers(0, len(values), size=(n_boot, len(values)))].mean(axis=1)
+    alpha = (1 - ci) / 2
+
+    low, high = np.quantile(samples, [alpha, 1 - alpha])
+    return values.mean(), low, high
+
+
+def permutation_test(a, b, n_perm=5000, rng=None):
+    """
+    Vectorized two-sided permutation test for a difference in means.
+
+    Return:
+        mean difference (a - b), p-value
+    """
+
+    rng = rng or np.random.default_rng(0)
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    a, b = a[~np.isnan(a)], b[~np.isnan(b)]
+
+    if len(a) == 0 or len(b) == 0:
+        return np.nan, np.nan
+
+    observed = a.mean() - b.mean()
+    pooled = np.concatenate([a, b])
+
+    # Each row is one permutation of the pooled sample
+    shuffled = rng.permuted(np.broadcast_to(pooled, (n_perm, len(pooled))), axis=1)
+    diffs = shuffled[:, :len(a)].mean(axis=1) - shuffled[:, len(a):].mean(axis=1)
+
+    p_value = (np.sum(np.abs(diffs) >= abs(observed) - 1e-12) + 1) / (n_perm + 1)
+    return observed, p_value
+
+
+def holm_correction(p_values, alpha=0.05):
+    """
+    Holm-Bonferroni step-down correction.
+
+    Return:
+        boolean array, True where the null hypothesis is rejected
+    """
+
+    p_values = np.asarray(p_values, dtype=np.float64)
+    order = np.argsort(p_values)
+    thresholds = alpha / (len(p_values) - np.arange(len(p_values)))
+
+    passed = p_values[order] <= thresholds
+    # Stop at the first failure
+    passed = np.cumprod(passed).astype(bool)
+
+    rejected = np.zeros(len(p_values), dtype=bool)
+    rejected[order] = passed
+    return rejected
+
+
+def sample_units(group, metric, by_run=None):
+    """
+    Values to resample for one group. Episodes of the same run share a model, so
+    with several runs the run means are the independent units; resampling pooled
+    episodes would ignore run-to-run variance and give intervals that are too narrow.
+    `by_run` defaults to whether the group has more than one run.
+    """
+
+    if by_run is None:
+        by_run = group["run"].nunique() > 1
+    if by_run:
+        return group.groupby("run", sort=True)[metric].mean().to_numpy(dtype=np.float64)
+    return group[metric].to_numpy(dtype=np.float64)
+
+
+def final_training_rewards(store, tag="rollout/ep_rew_mean", tail=0.1):
+    """
+    Mean of the last `tail` fraction of each run's training curve.
+    """
+
+    rows = []
+    for run_id, run in enumerate(store.runs):
+        _, _, values = store.curve(run_id, tag)
+        if not len(values):
+            continue
+
+        n = max(1, int(len(values) * tail))
+        rows.append({**run, "final_train_reward": float(np.mean(values[-n:]))})
+
+    return pd.DataFrame(rows)
+
+
+def aggregate(df, n_boot=2000, seed=0):
+    """
+    Per app/algo/persona aggregates with bootstrap confidence intervals. Groups
+    with several runs are resampled by run (see sample_units), so their mean is
+    the mean of the run means.
+    """
+
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    for (app, algo, persona), group in df.groupby(["app", "algo", "persona"], sort=True):
+        row = {"app": app, "algo": algo, "persona": persona, "runs": group["run"].nunique(), "episodes": len(group)}
+
+        for metric in METRICS.get(app, [PRIMARY_METRIC]):
+            if metric not in group:
+                continue
+            row[metric] = bootstrap_ci(sample_units(group, metric), n_boot=n_boot, rng=rng)
+
+        rows.append(row)
+
+    return rows
+
+
+def pairwise(df, n_perm=5000, seed=0, alpha=0.05):
+    """
+    Pairwise permutation tests between all algo/persona groups of the same app.
+
+    Groups are compared on the app's persona-independent COMPARISON_METRICS;
+    shaped reward (PRIMARY_METRIC) is only compared between groups of the same
+    persona. If either group has several runs, both are compared by run means.
+    All tests form one family for the Holm correction.
+    """
+
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    for app, app_df in df.groupby("app", sort=True):
+        groups = dict(iter(app_df.groupby(["algo", "persona"], sort=True)))
+
+        for (key_a, a), (key_b, b) in itertools.combinations(groups.items(), 2):
+            metrics = COMPARISON_METRICS.get(app, [])
+            if key_a[1] == key_b[1]:
+                metrics = metrics + [PRIMARY_METRIC]
+
+            for metric in metrics:
+                if metric not in a or metric not in b:
+                    continue
+
+                by_run = a["run"].nunique() > 1 or b["run"].nunique() > 1
+                diff, p_value = permutation_test(sample_units(a, metric, by_run), sample_units(b, metric, by_run),
+                                                 n_perm=n_perm, rng=rng)
+                rows.append({"app": app, "a": "/".join(key_a), "b": "/".join(key_b), "metric": metric,
+                             "unit": "runs" if by_run else "episodes", "diff": diff, "p_value": p_value})
+
+    if rows:
+        rejected = holm_correction([row["p_value"] for row in rows], alpha=alpha)
+        for row, significant in zip(rows, rejected):
+            row["significant"] = bool(significant)
+
+    return rows
+
+
+def format_ci(value):
+    mean, low, high = value
+    if np.isnan(mean):
+        return "-"
+    return f"{mean:.2f} [{low:.2f}, {high:.2f}]"
+
+
+def build_tables(summary, comparisons, training):
+    """
+    Builds the report as a list of (title, header, rows) tables.
+    """
+
+    tables = []
+
+    for app in sorted({row["app"] for row in summary}):
+        metrics = METRICS.get(app, [PRIMARY_METRIC])
+        header = ["algo", "persona", "runs", "episodes"] + [f"{m} (95% CI)" for m in metrics]
+        rows = [
+            [row["algo"], row["persona"], row["runs"], row["episodes"]] + [format_ci(row[m]) if m in row else "-" for m in metrics]
+            for row in summary if row["app"] == app
+        ]
+        tables.append((f"{app}: evaluation metrics", header, rows))
+
+        app_comparisons = [row for row in comparisons if row["app"] == app]
+        if app_comparisons:
+            rows = [
+                [row["a"], row["b"], row["metric"], row["unit"], f"{row['diff']:.2f}", f"{row['p_value']:.4f}",
+                 "yes" if row["significant"] else "no"]
+                for row in app_comparisons
+            ]
+            tables.append((f"{app}: pairwise comparisons (permutation test, Holm-corrected)",
+                           ["a", "b", "metric", "unit", "mean diff (a - b)", "p-value", "significant"], rows))
+
+    if len(training):
+        rows = [
+            [row["app"], row["algo"], row["persona"], row["runs"], format_ci(row["final_train_reward"])]
+            for row in training
+        ]
+        tables.append(("Final training reward (last 10% of ep_rew_mean)",
+                       ["app", "algo", "persona", "runs", "final_train_reward (95% CI)"], rows))
+
+    return tables
+
+
+def render_markdown(tables, title):
+    lines = [f"# {title}", ""]
+    for name, header, rows in tables:
+        lines += [f"## {name}", "", "| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        lines += ["| " + " | ".join(str(cell) for cell in row) + " |" for row in rows]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def render_html(tables, title):
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:2em}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#f0f0f0}</style>",
+        f"</head><body><h1>{html.escape(title)}</h1>",
+    ]
+    for name, header, rows in tables:
+        parts.append(f"<h2>{html.escape(name)}</h2><table>")
+        parts.append("<tr>" + "".join(f"<th>{html.escape(h)}</th>" for h in header) + "</tr>")
+        for row in rows:
+            parts.append("<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--metrics", default="logs/**/metrics.csv")
+    p.add_argument("--store", default="data/results")
+    p.add_argument("--out", default="reports/report")
+    p.add_argument("--format", nargs="+", choices=["md", "html"], default=["md", "html"])
+    p.add_argument("--bootstrap", type=int, default=2000)
+    p.add_argument("--permutations", type=int, default=5000)
+    p.add_argument("--alpha", type=float, default=0.05)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    df = load_eval_metrics(args.metrics)
+    if df.empty:
+        print(f"No eval metrics found for: {args.metrics}")
+        return
+
+    summary = aggregate(df, n_boot=args.bootstrap, seed=args.seed)
+    comparisons = pairwise(df, n_perm=args.permutations, seed=args.seed, alpha=args.alpha)
+
+    # Training curves come from the results store (see src/results.py), if it was built
+    training = []
+    store = ResultsStore(args.store)
+    if store.runs:
+        train_df = final_training_rewards(store)
+        rng = np.random.default_rng(args.seed)
+        for (app, algo, persona), group in train_df.groupby(["app", "algo", "persona"], sort=True):
+            training.append({
+                "app": app, "algo": algo, "persona": persona, "runs": len(group),
+                "final_train_reward": bootstrap_ci(group["final_train_reward"], n_boot=args.bootstrap, rng=rng),
+            })
+
+    tables = build_tables(summary, comparisons, training)
+    title = f"DRL Testing Report ({df['run'].nunique()} runs, {len(df)} episodes)"
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    renderers = {"md": render_markdown, "html": render_html}
+
+    for fmt in args.format:
+        path = f"{args.out}.{fmt}"
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(renderers[fmt](tables, title))
+        print(f"Report written to: {path}")
+
+
+if __name__ == "__main__":
+    main()
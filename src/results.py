@@ -0,0 +1,388 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+import yaml
+
+from envs import registry
+
+# Columns of the store, each saved as its own .npy file
+COLUMNS = {
+    "run": np.int32,
+    "file": np.int32,
+    "tag": np.int32,
+    "step": np.int64,
+    "wall_time": np.float64,
+    "value": np.float64,
+}
+
+# Short app names used in run names, mapped back to app names
+APP_NAMES = {spec["short_name"]: app for app, spec in registry.APPS.items()}
+
+# Run metadata parsed from run names (see parse_run_name)
+RUN_FIELDS = ["run", "app", "algo", "persona", "seed", "timesteps", "mode"]
+
+# Run name suffixes of training modes other than src.train (src.distributed, src.multi_persona)
+RUN_MODES = ["distributed", "shared"]
+
+
+def default_seed():
+    """
+    Seed used by training when none is encoded in the run name.
+    """
+
+    try:
+        with open("configs/seed.yaml", "r") as file:
+            return int(yaml.safe_load(file).get("default_seed", 7))
+    except OSError:
+        return 7
+
+
+def parse_run_name(run_name):
+    """
+    Parses a training log directory name into run metadata.
+    Run names follow `{app_name}_{algo}_{persona}_{timesteps}`, optionally
+    followed by a training mode (`_distributed`, `_shared`; "single" if absent)
+    and then `_s{seed}`.
+    """
+
+    parts = run_name.split("_")
+    meta = {"run": run_name, "app": None, "algo": None, "persona": None, "seed": default_seed(), "timesteps": None,
+            "mode": "single"}
+
+    if parts and parts[-1].startswith("s") and parts[-1][1:].isdigit():
+        meta["seed"] = int(parts.pop()[1:])
+
+    if parts and parts[-1] in RUN_MODES:
+        meta["mode"] = parts.pop()
+
+    if len(parts) >= 4 and parts[-1].isdigit():
+        meta["app"] = APP_NAMES.get(parts[0], parts[0])
+        meta["algo"] = parts[1]
+        meta["persona"] = "_".join(parts[2:-1])
+        meta["timesteps"] = int(parts[-1])
+
+    return meta
+
+
+def read_scalars(path, offset=0):
+    """
+    Reads scalar summaries from a tfevents file starting at a byte offset.
+    Only complete records are consumed, so a file that is still being written
+    can be read again later from the returned offset.
+
+    Return:
+        rows: list of (tag, step, wall_time, value) tuples
+        offset: byte offset just past the last complete record
+    """
+
+    from tensorboard.compat.proto.event_pb2 import Event
+
+    rows = []
+
+    with open(path, "rb") as file:
+        file.seek(offset)
+        data = file.read()
+
+    pos = 0
+    while pos + 12 <= len(data):
+        (length,) = struct.unpack("<Q", data[pos:pos + 8])
+        end = pos + 12 + length + 4  # header (length + crc), payload, payload crc
+        if end > len(data):
+            break
+
+        event = Event.FromString(data[pos + 12:pos + 12 + length])
+        pos = end
+
+        if not event.HasField("summary"):
+            continue
+
+        for value in event.summary.value:
+            if value.HasField("simple_value"):
+                rows.append((value.tag, event.step, event.wall_time, float(value.simple_value)))
+            elif value.HasField("tensor") and value.tensor.float_val:
+                rows.append((value.tag, event.step, event.wall_time, float(value.tensor.float_val[0])))
+
+    return rows, offset + pos
+
+
+def file_head(path, offset, size=64):
+    """
+    Digest of the first bytes of a file, at most up to `offset` (the part already
+    read). The first record of a tfevents file holds its creation time, so a file
+    rewritten in place gets a new head.
+    """
+
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read(min(size, offset))).hexdigest()
+
+
+def downsample_minmax(steps, values, max_points):
+    """
+    Reduces a curve to at most `max_points` points while keeping the minimum
+    and maximum of every bucket, so spikes and dips survive downsampling.
+
+    Return:
+        index array into the original curve, in step order
+    """
+
+    n = len(values)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = []
+
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        chunk = values[start:end]
+        keep.append(start + int(np.argmin(chunk)))
+        keep.append(start + int(np.argmax(chunk)))
+
+    return np.unique(np.array(keep, dtype=np.int64))
+
+
+class ResultsStore:
+    """
+    Columnar store for TensorBoard scalars across all runs.
+
+    Layout (in `path`):
+        index.json: runs table, tags table, per-file state (id, read offset, head) and per-series row ranges
+        <column>.npy: one array per column, rows sorted by (run, tag, step)
+
+    Every row records the file it was read from, so a file that gets truncated
+    or rewritten can be re-read without touching rows from the run's other files.
+    """
+
+    def __init__(self, path="data/results"):
+        self.path = path
+        self.runs = []
+        self.tags = []
+        self._tag_ids = {}
+        self.files = {}
+        self.series = {}
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+        if os.path.exists(os.path.join(path, "index.json")):
+            self.load()
+
+    def load(self):
+        """
+        Loads the index and memory-maps the columns.
+        """
+
+        with open(os.path.join(self.path, "index.json"), "r") as file:
+            index = json.load(file)
+
+        # Stores written before rows were tagged with their file are rebuilt from scratch
+        if not os.path.exists(os.path.join(self.path, "file.npy")):
+            return
+
+        self.runs = index["runs"]
+        self.tags = index["tags"]
+        self._tag_ids = {tag: i for i, tag in enumerate(self.tags)}
+        self.files = index["files"]
+        self.series = {tuple(map(int, key.split("/"))): tuple(bounds) for key, bounds in index["series"].items()}
+        for name in COLUMNS:
+            self.columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    def save(self):
+        """
+        Writes the columns and index. Each file is replaced atomically.
+        """
+
+        os.makedirs(self.path, exist_ok=True)
+
+        for name, column in self.columns.items():
+            tmp = os.path.join(self.path, f"{name}.tmp.npy")
+            np.save(tmp, np.asarray(column))
+            os.replace(tmp, os.path.join(self.path, f"{name}.npy"))
+
+        index = {
+            "runs": self.runs,
+            "tags": self.tags,
+            "files": self.files,
+            "series": {f"{run}/{tag}": list(bounds) for (run, tag), bounds in self.series.items()},
+        }
+
+        tmp = os.path.join(self.path, "index.json.tmp")
+        with open(tmp, "w") as file:
+            json.dump(index, file)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+
+    def _run_id(self, run_name):
+        for i, run in enumerate(self.runs):
+            if run["run"] == run_name:
+                return i
+
+        self.runs.append(parse_run_name(run_name))
+        return len(self.runs) - 1
+
+    def _tag_id(self, tag):
+        if tag not in self._tag_ids:
+            self._tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        return self._tag_ids[tag]
+
+    def _file_state(self, key):
+        if key not in self.files:
+            self.files[key] = {"id": len(self.files), "offset": 0, "head": None}
+        return self.files[key]
+
+    def _drop_file(self, file_id):
+        keep = np.asarray(self.columns["file"]) != file_id
+        self.columns = {name: np.asarray(column)[keep] for name, column in self.columns.items()}
+
+    def ingest(self, log_dir="logs"):
+        """
+        Reads every events.out.tfevents.* file under `log_dir`, continuing from
+        the byte offset reached by the previous ingest.
+
+        Return:
+            number of new rows added
+        """
+
+        new = {name: [] for name in COLUMNS}
+        dropped = False
+
+        for path in sorted(glob.glob(os.path.join(log_dir, "**", "events.out.tfevents.*"), recursive=True)):
+            key = os.path.relpath(path, log_dir).replace(os.sep, "/")
+            run_id = self._run_id(os.path.basename(os.path.dirname(path)))
+            state = self._file_state(key)
+
+            # File was truncated or rewritten since the last ingest: forget its rows and read it again from the start
+            if state["offset"] and (os.path.getsize(path) < state["offset"] or file_head(path, state["offset"]) != state["head"]):
+                self._drop_file(state["id"])
+                dropped = True
+                state["offset"] = 0
+
+            rows, state["offset"] = read_scalars(path, state["offset"])
+            state["head"] = file_head(path, state["offset"])
+
+            for tag, step, wall_time, value in rows:
+                new["run"].append(run_id)
+                new["file"].append(state["id"])
+                new["tag"].append(self._tag_id(tag))
+                new["step"].append(step)
+                new["wall_time"].append(wall_time)
+                new["value"].append(value)
+
+        added = len(new["run"])
+        if added:
+            for name, dtype in COLUMNS.items():
+                self.columns[name] = np.concatenate([np.asarray(self.columns[name]), np.array(new[name], dtype=dtype)])
+        if added or dropped:
+            self._reindex()
+
+        self.save()
+        return added
+
+    def _reindex(self):
+        """
+        Sorts rows by (run, tag, step) and rebuilds the per-series row ranges.
+        """
+
+        order = np.lexsort((self.columns["step"], self.columns["tag"], self.columns["run"]))
+        self.columns = {name: np.asarray(column)[order] for name, column in self.columns.items()}
+
+        key = self.columns["run"].astype(np.int64) * len(self.tags) + self.columns["tag"]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.empty(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(key)]
+
+        self.series = {
+            (int(self.columns["run"][s]), int(self.columns["tag"][s])): (int(s), int(e))
+            for s, e in zip(starts, ends)
+        }
+
+    def select_runs(self, **filters):
+        """
+        Returns the ids of runs matching all given metadata filters
+        (app, algo, persona, seed, timesteps, mode, run). Filter values may be lists.
+        """
+
+        ids = []
+        for i, run in enumerate(self.runs):
+            match = True
+            for field, wanted in filters.items():
+                if wanted is None:
+                    continue
+                wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+                if run.get(field) not in wanted:
+                    match = False
+                    break
+            if match:
+                ids.append(i)
+        return ids
+
+    def curve(self, run_id, tag, max_points=None):
+        """
+        Returns (steps, wall_times, values) for one run and tag.
+        """
+
+        key = (run_id, self._tag_ids.get(tag))
+        if key not in self.series:
+            empty = np.empty(0)
+            return empty, empty, empty
+
+        start, end = self.series[key]
+        steps = self.columns["step"][start:end]
+        wall_times = self.columns["wall_time"][start:end]
+        values = self.columns["value"][start:end]
+
+        keep = downsample_minmax(steps, values, max_points)
+        return steps[keep], wall_times[keep], values[keep]
+
+    def query(self, tag="rollout/ep_rew_mean", max_points=None, **filters):
+        """
+        Loads a set of curves as a long-format pandas DataFrame with columns
+        run, app, algo, persona, seed, timesteps, mode, tag, step, wall_time, value.
+
+        Example:
+            store.query(tag="rollout/ep_len_mean", app="lunar_lander", persona=["safe", "baseline"])
+        """
+
+        import pandas as pd
+
+        frames = []
+        for run_id in self.select_runs(**filters):
+            steps, wall_times, values = self.curve(run_id, tag, max_points=max_points)
+            if not len(steps):
+                continue
+
+            frame = pd.DataFrame({"step": steps, "wall_time": wall_times, "value": values})
+            for field in RUN_FIELDS:
+                frame[field] = self.runs[run_id].get(field)
+            frame["tag"] = tag
+            frames.append(frame)
+
+        columns = RUN_FIELDS + ["tag", "step", "wall_time", "value"]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+
+        return pd.concat(frames, ignore_index=True)[columns]
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--log_dir", default="logs")
+    p.add_argument("--store", default="data/results")
+    p.add_argument("--list", action="store_true")
+    args = p.parse_args()
+
+    store = ResultsStore(args.store)
+    added = store.ingest(args.log_dir)
+    print(f"Ingested {added} new scalar rows into {args.store} ({len(store.runs)} runs, {len(store.tags)} tags)")
+
+    if args.list:
+        for (run_id, tag_id), (start, end) in sorted(store.series.items()):
+            print(f"{store.runs[run_id]['run']:<40} {store.tags[tag_id]:<32} {end - start} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import argparse
+import json
+import math
+import os
+import time
+from collections import deque
+
+from envs import registry
+from .events import configure as configure_events, get_logger
+
+
+class RunningStats:
+    """
+    Online count/mean/variance/min/max (Welford), O(1) memory.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+
+class P2Quantile:
+    """
+    P-square streaming quantile estimate (Jain & Chlamtac, 1985).
+    Tracks one quantile with five markers, O(1) memory.
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x):
+        h = self.heights
+
+        # The first five observations initialise the markers
+        if len(h) < 5:
+            h.append(x)
+            h.sort()
+            return
+
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= x < h[i + 1])
+
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Adjust the three middle markers if they drifted from their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - self.positions[i]
+            if (d >= 1 and self.positions[i + 1] - self.positions[i] > 1) or (d <= -1 and self.positions[i - 1] - self.positions[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not h[i - 1] < candidate < h[i + 1]:
+                    candidate = h[i] + d * (h[i + d] - h[i]) / (self.positions[i + d] - self.positions[i])
+                h[i] = candidate
+                self.positions[i] += d
+
+    def _parabolic(self, i, d):
+        h, n = self.heights, self.positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            # Too few points for the markers, use the exact quantile
+            ordered = sorted(self.heights)
+            return ordered[min(len(ordered) - 1, int(round(self.q * (len(ordered) - 1))))]
+        return self.heights[2]
+
+
+class StreamingMetric:
+    """
+    RunningStats plus a fixed set of P-square quantiles.
+    """
+
+    def __init__(self, quantiles=(0.5, 0.9, 0.99)):
+        self.stats = RunningStats()
+        self.quantiles = {q: P2Quantile(q) for q in quantiles}
+
+    def add(self, x):
+        x = float(x)
+        self.stats.add(x)
+        for estimator in self.quantiles.values():
+            estimator.add(x)
+
+    def summary(self):
+        summary = self.stats.summary()
+        for q, estimator in self.quantiles.items():
+            summary[f"p{int(q * 100)}"] = estimator.value()
+        return summary
+
+
+class FailureWindow:
+    """
+    Failure rate over the last `size` observations, with an alert when it
+    goes above `threshold`. Only re-alerts after the rate has recovered.
+    """
+
+    def __init__(self, size=200, threshold=0.5):
+        self.window = deque(maxlen=size)
+        self.failures = 0
+        self.threshold = threshold
+        self.alerting = False
+
+    def add(self, failed):
+        failed = int(bool(failed))
+        if len(self.window) == self.window.maxlen:
+            self.failures -= self.window[0]
+        self.window.append(failed)
+        self.failures += failed
+
+    @property
+    def rate(self):
+        return self.failures / len(self.window) if self.window else 0.0
+
+    def check(self):
+        """
+        Return:
+            True if the rate just crossed the threshold (only once per breach)
+        """
+
+        breached = len(self.window) == self.window.maxlen and self.rate > self.threshold
+        newly = breached and not self.alerting
+        self.alerting = breached
+        return newly
+
+
+def soak(model, env, app, duration=None, max_episodes=None, snapshot_every=60.0, snapshot_path=None,
+         window=200, alert_rate=0.5, max_browser_mb=None, verbose=True):
+    """
+    Runs evaluation episodes until the wall-clock `duration` (seconds) or
+    `max_episodes` budget is used up, keeping only streaming aggregates.
+
+    Failures come from the app's registry entry (`failure_key`, counted per
+    step or per episode). If the env reports browser memory and it grows
+    past `max_browser_mb`, the browser is recycled between episodes.
+
+    Return:
+        final snapshot dict
+    """
+
+    events = get_logger("soak")
+    spec = registry.get_app(app)
+    failure_key, failure_scope = spec["failure_key"], spec["failure_scope"]
+
+    metrics = {"episode_reward": StreamingMetric(), "episode_steps": StreamingMetric(), "step_latency_ms": StreamingMetric()}
+    failures = FailureWindow(size=window, threshold=alert_rate)
+    totals = {"episodes": 0, "steps": 0, "failures": 0, "alerts": 0, "browser_recycles": 0}
+
+    start = time.time()
+    last_snapshot = start
+    snapshot_file = None
+
+    if snapshot_path:
+        os.makedirs(os.path.dirname(snapshot_path) or ".", exist_ok=True)
+        snapshot_file = open(snapshot_path, "a")
+
+    def snapshot():
+        data = {
+            "time": time.time(),
+            "elapsed_s": time.time() - start,
+            **totals,
+            "failure_rate_window": failures.rate,
+            "metrics": {name: metric.summary() for name, metric in metrics.items()},
+        }
+        if hasattr(env, "total_browser_memory"):
+            data["browser_mb"] = {"env": env.browser_memory() / (1024 * 1024), "total": env.total_browser_memory() / (1024 * 1024)}
+        if snapshot_file:
+            snapshot_file.write(json.dumps(data) + "\n")
+            snapshot_file.flush()
+        return data
+
+    try:
+        while True:
+            if duration is not None and time.time() - start >= duration:
+                break
+            if max_episodes is not None and totals["episodes"] >= max_episodes:
+                break
+
+            obs, _ = env.reset()
+            terminated, truncated = False, False
+            total_reward, steps, episode_failed = 0.0, 0, False
+
+            while not (terminated or truncated):
+                step_start = time.perf_counter()
+                action, _ = model.predict(obs, deterministic=True)
+                obs, reward, terminated, truncated, info = env.step(action)
+                metrics["step_latency_ms"].add((time.perf_counter() - step_start) * 1000)
+
+                total_reward += float(reward)
+                steps += 1
+
+                failed = bool(info.get(failure_key, False))
+                episode_failed = episode_failed or failed
+                if failure_scope == "step":
+                    failures.add(failed)
+                    totals["failures"] += int(failed)
+
+            if failure_scope == "episode":
+                failures.add(episode_failed)
+                totals["failures"] += int(episode_failed)
+
+            totals["episodes"] += 1
+            totals["steps"] += steps
+            metrics["episode_reward"].add(total_reward)
+            metrics["episode_steps"].add(steps)
+
+            if failures.check():
+                totals["alerts"] += 1
+                events.warning("failure_rate_alert", rate=round(failures.rate, 3), threshold=alert_rate, window=window,
+                               episodes=totals["episodes"])
+                print(f"ALERT: failure rate {failures.rate * 100:.1f}% over the last {window} {failure_scope}s "
+                      f"(threshold {alert_rate * 100:.0f}%)")
+
+            # Restart the browser if it has grown too large, so the tester never becomes the bottleneck
+            browser_memory = getattr(env, "browser_memory", None)
+            if max_browser_mb and browser_memory:
+                memory_mb = browser_memory() / (1024 * 1024)
+                if memory_mb > max_browser_mb:
+                    events.info("browser_recycle", memory_mb=round(memory_mb, 1), limit_mb=max_browser_mb)
+                    env.recycle_driver()
+                    totals["browser_recycles"] += 1
+
+            if time.time() - last_snapshot >= snapshot_every:
+                last_snapshot = time.time()
+                data = snapshot()
+                if verbose:
+                    reward = data["metrics"]["episode_reward"]
+                    print(f"[{data['elapsed_s']:.0f}s] episodes={totals['episodes']}, steps={totals['steps']}, "
+                          f"reward_mean={reward['mean']:.2f}, failure_rate={failures.rate * 100:.1f}%")
+
+        return snapshot()
+
+    finally:
+        if snapshot_file:
+            snapshot_file.close()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--app", choices=registry.app_names(), default="swaglabs")
+    p.add_argument("--algo", choices=["ppo", "a2c"], default="ppo")
+    p.add_argument("--persona", choices=registry.all_personas(), default="functional")
+    p.add_argument("--timesteps", type=int, default=2000)
+    p.add_argument("--duration", type=float, default=None, help="wall-clock budget in seconds")
+    p.add_argument("--episodes", type=int, default=None, help="episode budget")
+    p.add_argument("--snapshot_every", type=float, default=60.0)
+    p.add_argument("--window", type=int, default=200)
+    p.add_argument("--alert_rate", type=float, default=0.5)
+    p.add_argument("--max_browser_mb", type=float, default=1500.0)
+    p.add_argument("--events_dir", default=None)
+    p.add_argument("--failures_dir", default="data/failures", help="failure signature index (Swag Labs)")
+    args = p.parse_args()
+
+    if args.duration is None and args.episodes is None:
+        p.error("set a budget with --duration and/or --episodes")
+
+    configure_events(log_dir=args.events_dir)
+
+    from stable_baselines3 import PPO, A2C
+
+    app_name = registry.short_name(args.app)
+    file_name = f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}"
+    model_path = f"models/{args.app}/{file_name}.zip"
+
+    algo = PPO if args.algo == "ppo" else A2C
+    model = algo.load(model_path)
+    print(f"Loaded model: {model_path}")
+
+    action_repeat = getattr(model, "env_config", {}).get("action_repeat", 1)
+    env = registry.make_env(args.app, persona=args.persona, action_repeat=action_repeat, failures_dir=args.failures_dir)
+    snapshot_path = f"logs/{args.app}/{file_name}/soak.jsonl"
+
+    try:
+        final = soak(model, env, args.app, duration=args.duration, max_episodes=args.episodes,
+                     snapshot_every=args.snapshot_every, snapshot_path=snapshot_path, window=args.window,
+                     alert_rate=args.alert_rate, max_browser_mb=args.max_browser_mb)
+    finally:
+        env.close()
+
+    reward = final["metrics"]["episode_reward"]
+    latency = final["metrics"]["step_latency_ms"]
+
+    print(f"\n--- Soak Results ({args.algo.upper()} | {args.persona}) ---")
+    print(f"Duration: {final['elapsed_s']:.0f}s, Episodes: {final['episodes']}, Steps: {final['steps']}")
+    if reward["count"]:
+        print(f"Reward: mean={reward['mean']:.2f}, std={reward['std']:.2f}, p50={reward['p50']:.2f}, p90={reward['p90']:.2f}")
+        print(f"Step latency: p50={latency['p50']:.1f} ms, p99={latency['p99']:.1f} ms")
+    print(f"Failures: {final['failures']}, Alerts: {final['alerts']}, Browser recycles: {final['browser_recycles']}")
+    print(f"Snapshots written to: {snapshot_path}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import yaml
+
+from envs import registry
+from .cache import code_version, evaluator_version, file_digest
+from .events import configure as configure_events
+from .export import export_metrics_csv
+
+
+def load_seed_bank(version="v1", path="configs/seed_bank.yaml"):
+    with open(path, "r") as file:
+        banks = yaml.safe_load(file)
+
+    if version not in banks:
+        raise ValueError(f"Seed bank version does not exist: {version} (available: {', '.join(banks)})")
+    return [int(seed) for seed in banks[version]["seeds"]]
+
+
+def seeds_digest(seeds):
+    return hashlib.sha256(json.dumps(seeds).encode()).hexdigest()[:16]
+
+
+def parse_shard(value):
+    """
+    Parses "i/n" (shard i of n, zero-based).
+    """
+
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like i/n, got {value}")
+
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, {count}), got {index}")
+    return index, count
+
+
+def shard_indices(episodes, index, count):
+    """
+    Contiguous block of episode indices for shard `index` of `count`. The shards
+    cover range(episodes) exactly once.
+    """
+
+    return range(episodes * index // count, episodes * (index + 1) // count)
+
+
+def suite_dir(app, file_name, bank, episodes, log_dir="logs"):
+    return os.path.join(log_dir, app, file_name, "suite", f"{bank}_{episodes}")
+
+
+def run_shard(model, env, app, seeds, indices, verbose=True):
+    """
+    Evaluates the episodes at `indices` of the suite, each reset with its own seed.
+
+    Return:
+        per-episode metrics, numbered by suite episode and tagged with their seed
+    """
+
+    evaluate = registry.get_evaluator(app)
+    _, episode_metrics = evaluate(model, env, verbose=verbose, seeds=[seeds[i] for i in indices])
+
+    for i, metrics in zip(indices, episode_metrics):
+        metrics["episode"] = i + 1
+        metrics["seed"] = seeds[i]
+
+    return episode_metrics
+
+
+def merge_shards(directory, count=None):
+    """
+    Combines the shard files in `directory` into one suite result. Refuses to
+    merge shards that were run on a different model, code or seed bank, or
+    that don't cover each episode exactly once. If the suite was run with
+    more than one shard count (e.g. 1 and 4), `count` picks which to merge.
+
+    Return:
+        header, results (same aggregate as an unsharded run), per-episode metrics in suite order
+    """
+
+    pattern = f"shard_*_of_{count:03d}.json" if count else "shard_*.json"
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not paths:
+        raise ValueError(f"No shard results in {directory}")
+
+    counts = sorted({int(path[-8:-5]) for path in paths})
+    if len(counts) > 1:
+        raise ValueError(f"{directory} has shards of runs split {counts} ways, pick one with --shards")
+
+    shards = []
+    for path in paths:
+        with open(path, "r") as file:
+            shards.append(json.load(file))
+
+    header = {key: value for key, value in shards[0]["header"].items() if key != "shard"}
+    for shard in shards[1:]:
+        other = {key: value for key, value in shard["header"].items() if key != "shard"}
+        if other != header:
+            changed = sorted(key for key in header if header[key] != other.get(key))
+            raise ValueError(f"Shard {shard['header']['shard']} doesn't match shard {shards[0]['header']['shard']}: {changed}")
+
+    episode_metrics = sorted((m for shard in shards for m in shard["episodes"]), key=lambda m: m["episode"])
+    covered = [m["episode"] for m in episode_metrics]
+    if covered != list(range(1, header["episodes"] + 1)):
+        missing = sorted(set(range(1, header["episodes"] + 1)) - set(covered))
+        raise ValueError(f"Shards don't cover the suite exactly once (missing episodes: {missing[:10]}, "
+                         f"{len(covered) - len(set(covered))} duplicated)")
+
+    results = registry.get_summarizer(header["app"])(episode_metrics)
+    return header, {name: float(value) for name, value in results.items()}, episode_metrics
+
+
+def print_results(app, title, results):
+    print(f"\n--- {title} ---")
+    print(f"Average Reward: {results['avg_reward']:.2f}")
+
+    for label, metric, fmt in registry.get_app(app)["summary"]:
+        if fmt == "percent":
+            print(f"{label}: {results[metric]*100:.2f}%")
+        else:
+            print(f"{label}: {results[metric]:.2f}")
+    print()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="command", required=True)
+
+    for name in ["run", "merge"]:
+        sp = sub.add_parser(name)
+        sp.add_argument("--app", choices=registry.app_names(), default="lunar_lander")
+        sp.add_argument("--algo", choices=["ppo", "a2c"], default="ppo")
+        sp.add_argument("--persona", choices=registry.all_personas(), default="baseline")
+        sp.add_argument("--timesteps", type=int, default=500_000)
+        sp.add_argument("--shared", action="store_true", help="use the model trained by src.multi_persona")
+        sp.add_argument("--episodes", type=int, default=100, help="suite size, the first N seeds of the bank")
+        sp.add_argument("--bank", default="v1", help="seed bank version in configs/seed_bank.yaml")
+        sp.add_argument("--log_dir", default="logs")
+
+    run_p = sub.choices["run"]
+    run_p.add_argument("--shard", type=parse_shard, default=(0, 1), help="run shard i of n (zero-based), e.g. 2/8")
+    run_p.add_argument("--quiet", action="store_true")
+    run_p.add_argument("--events_dir", default=None)
+
+    merge_p = sub.choices["merge"]
+    merge_p.add_argument("--shards", type=int, default=None, help="merge the shards of the run split this many ways")
+    merge_p.add_argument("--export", action="store_true", help="write the merged episodes to the model's metrics.csv")
+
+    args = p.parse_args()
+
+    app_name = registry.short_name(args.app)
+    file_name = f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}{'_shared' if args.shared else ''}"
+    directory = suite_dir(args.app, file_name, args.bank, args.episodes, log_dir=args.log_dir)
+
+    if args.command == "merge":
+        header, results, episode_metrics = merge_shards(directory, count=args.shards)
+        with open(os.path.join(directory, "merged.json"), "w") as file:
+            json.dump({"header": header, "results": results, "episodes": episode_metrics}, file, indent=1)
+
+        print_results(args.app, f"Suite {args.bank} x {args.episodes} ({args.algo.upper()} | {args.persona})", results)
+        if args.export:
+            export_metrics_csv(episode_metrics, export_dir=os.path.join(args.log_dir, args.app, file_name))
+        return
+
+    seeds = load_seed_bank(args.bank)
+    if args.episodes > len(seeds):
+        p.error(f"seed bank {args.bank} only has {len(seeds)} seeds")
+    seeds = seeds[:args.episodes]
+
+    configure_events(log_dir=args.events_dir)
+
+    from stable_baselines3 import PPO, A2C
+
+    model_path = f"models/{args.app}/{file_name}.zip"
+    model = (PPO if args.algo == "ppo" else A2C).load(model_path, device="cpu")
+    action_repeat = getattr(model, "env_config", {}).get("action_repeat", 1)
+
+    index, count = args.shard
+    indices = shard_indices(args.episodes, index, count)
+    print(f"Loaded model: {model_path}, running episodes {indices.start + 1}-{indices.stop} of {args.episodes} (shard {index}/{count})")
+
+    env = registry.make_env(args.app, persona=args.persona, action_repeat=action_repeat)
+    try:
+        episode_metrics = run_shard(model, env, args.app, seeds, indices, verbose=not args.quiet)
+    finally:
+        env.close()
+
+    # Everything a merge has to agree on, so shards from different models or code never get mixed
+    header = {
+        "app": args.app,
+        "model": file_name,
+        "model_digest": file_digest(model_path),
+        "code_version": code_version(args.app),
+        "evaluator_version": evaluator_version(args.app),
+        "action_repeat": action_repeat,
+        "bank": args.bank,
+        "seeds_digest": seeds_digest(seeds),
+        "episodes": args.episodes,
+        "shard": [index, count],
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"shard_{index:03d}_of_{count:03d}.json")
+    with open(path, "w") as file:
+        json.dump({"header": header, "episodes": episode_metrics}, file, indent=1)
+
+    results = registry.get_summarizer(args.app)(episode_metrics)
+    print_results(args.app, f"Shard {index}/{count} ({len(indices)} episodes)", results)
+    print(f"Saved shard results to: {path}")
+    print(f"Once every shard is done: python -m src.suite merge --app {args.app} --algo {args.algo} --persona {args.persona} "
+          f"--timesteps {args.timesteps} --episodes {args.episodes} --bank {args.bank}")
+
+
+if __name__ == "__main__":
+    main()
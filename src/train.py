@@ -1,34 +1,28 @@
 import argparse
 import os
+import shutil
 import yaml
-import gymnasium as gym
 
-from stable_baselines3 import PPO, A2C
-from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.logger import configure
-from stable_baselines3.common.vec_env import DummyVecEnv
+from envs import registry
+from .events import configure as configure_events
+from .cache import ArtifactCache, code_version, config_key
 
-from envs.lunar_lander.env import LunarLanderEnv
-from envs.swaglabs.env import SwagLabsEnv
 
-
-def make_env(app="lunar_lander", persona="baseline", render_mode=None, seed=7):
+def make_env(app="lunar_lander", persona="baseline", render_mode=None, seed=7, run_id=None, worker=0, log_dir="logs",
+             action_repeat=1, failures_dir=None, reward_personas=None, shared_browser=False, monitor_flush_every=10):
     """
     Function to build an instance of the app env.
-    Applies Monitor SB3 wrapper for logging episode stats.
+    Applies a buffered Monitor wrapper for logging episode stats, writing to
+    one file per run and worker so runs and parallel workers never collide.
     """
-    if (app == "lunar_lander"): 
-        app_name = "lunar"
-        env = LunarLanderEnv(persona=persona, render_mode=render_mode)
+    # Imported here so only the selected app's env module (and SB3) gets loaded
+    from .monitor import BufferedMonitor, monitor_path
 
-    elif app == "swaglabs": 
-        app_name = "swaglabs"
-        env = SwagLabsEnv(persona=persona)
+    env = registry.make_env(app, persona=persona, render_mode=render_mode, action_repeat=action_repeat,
+                            failures_dir=failures_dir, reward_personas=reward_personas, shared_browser=shared_browser)
 
-    else:
-        raise ValueError(f"App does not exist: {app}")
-    
-    env = Monitor(env, filename=f"logs/{app}/{app_name}_{seed}.monitor.csv")
+    run_id = run_id or f"{registry.short_name(app)}_{persona}_s{seed}"
+    env = BufferedMonitor(env, filename=monitor_path(log_dir, app, run_id, worker), flush_every=monitor_flush_every)
 
     return env
 
@@ -48,24 +42,123 @@ def load_hyperparams(algo, app):
 
     return config.get("default")
 
+def train_config(app, algo, persona, seed, timesteps, n_envs, action_repeat, hyperparams, policy="MlpPolicy", **mode):
+    """
+    Everything that determines a trained model, hashed into its cache key.
+    Training modes other than plain src.train (distributed, shared rollouts) pass
+    extra `mode` keys, so their models never share a key with a single-process run.
+    """
+
+    import stable_baselines3
+
+    config = {
+        "app": app,
+        "algo": algo,
+        "persona": persona,
+        "seed": seed,
+        "timesteps": timesteps,
+        "n_envs": n_envs,
+        "action_repeat": action_repeat,
+        "policy": policy,
+        "hyperparams": hyperparams,
+        "code_version": code_version(app),
+        "sb3_version": stable_baselines3.__version__,
+    }
+    config.update(mode)
+    return config
+
 def main(): 
     # Create command line arguments using argparse
     p = argparse.ArgumentParser()
-    p.add_argument("--app", choices=["lunar_lander","swaglabs"], default="lunar_lander")
+    p.add_argument("--app", choices=registry.app_names(), default="lunar_lander")
     p.add_argument("--algo", choices=["ppo","a2c"], default="ppo")
     p.add_argument("--timesteps", type=int, default=100_000)
     p.add_argument("--seed", type=int, default=7)
-    p.add_argument("--persona", choices=["baseline", "speedrunner", "safe", "functional", "explorer"], default="baseline")
+    p.add_argument("--n_envs", type=int, default=1)
+    p.add_argument("--shared_browser", action="store_true", help="Swag Labs: run all envs as isolated contexts of one Chrome")
+    p.add_argument("--action_repeat", type=int, default=1)
+    p.add_argument("--persona", choices=registry.all_personas(), default="baseline")
     p.add_argument("--log_dir", default="logs")
+    p.add_argument("--monitor_flush_every", type=int, default=10, help="episodes buffered per monitor write (1 = every episode)")
     p.add_argument("--model_dir", default="models")
+    p.add_argument("--events_dir", default=None)
+    p.add_argument("--step_events", type=float, default=0.0)
+    p.add_argument("--cache_dir", default="cache")
+    p.add_argument("--no_cache", action="store_true")
+    p.add_argument("--coverage", action="store_true", help="record page transition coverage (Swag Labs)")
+    p.add_argument("--coverage_dir", default="data/coverage")
+    p.add_argument("--failures_dir", default="data/failures", help="failure signature index (Swag Labs)")
+    p.add_argument("--eval_freq", type=int, default=0, help="evaluate a weight snapshot every N timesteps in a separate process (0 = off)")
+    p.add_argument("--eval_episodes", type=int, default=10)
+    p.add_argument("--eval_metric", default=None, help="defaults to the app's eval_metric in envs/registry.py")
+    p.add_argument("--eval_mode", choices=["max", "min"], default=None)
+    p.add_argument("--patience", type=int, default=None, help="stop after this many evaluations without improvement")
+    p.add_argument("--min_delta", type=float, default=0.0)
 
     args = p.parse_args()
 
+    if args.persona not in registry.get_app(args.app)["personas"]:
+        p.error(f"--persona must be one of {', '.join(registry.get_app(args.app)['personas'])} for {args.app}")
+    if args.patience is not None and not args.eval_freq:
+        p.error("--patience needs --eval_freq")
+    if args.eval_metric and args.eval_metric not in registry.summary_metrics(args.app):
+        p.error(f"--eval_metric must be one of {', '.join(registry.summary_metrics(args.app))} for {args.app}")
+
+    # Heavy imports are deferred until after argument parsing
+    from stable_baselines3 import PPO, A2C
+    from stable_baselines3.common.callbacks import ConvertCallback
+    from stable_baselines3.common.logger import configure
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+    from .monitor import clear_monitor_dir, merge_monitor_files, monitor_dir
+    from .coverage import CoverageRun, CoverageStore
+
+    # Structured event logs (JSON lines per process), per-step events sampled if enabled
+    configure_events(log_dir=args.events_dir, step_sample_rate=args.step_events)
+
     os.makedirs(args.log_dir, exist_ok=True)
     os.makedirs(args.model_dir, exist_ok=True)
 
-    # Make vectorized env for SB3
-    vec_env = DummyVecEnv([lambda: make_env(app=args.app, persona=args.persona, render_mode=None, seed=args.seed)])
+    # Store short app name for path
+    app_name = registry.short_name(args.app)
+
+    # Unique per run, so monitor files of different runs with the same seed don't overwrite each other
+    run_id = f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}_s{args.seed}"
+    file_name = f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}"
+
+    # Build clean model directories
+    model_app_dir = os.path.join(args.model_dir, args.app)
+    os.makedirs(model_app_dir, exist_ok=True)
+    path = os.path.join(model_app_dir, f"{file_name}.zip")
+
+    policy = "MlpPolicy"
+    hyperparams = load_hyperparams(args.algo, args.app)
+
+    config = train_config(args.app, args.algo, args.persona, args.seed, args.timesteps, args.n_envs, args.action_repeat,
+                          hyperparams, policy=policy)
+    key = config_key(config)
+    cache = ArtifactCache(args.cache_dir)
+
+    # A cached model has no coverage or eval curve to record, so those runs always train
+    cached = None if (args.no_cache or args.coverage or args.eval_freq) else cache.lookup_model(key)
+    if cached:
+        shutil.copyfile(cached, path)
+        cache.link(file_name, key)
+        print(f"Cache hit ({key}), skipped training. Restored: ", path)
+        return
+
+    # Make vectorized env for SB3, one monitor file per worker
+    clear_monitor_dir(args.log_dir, args.app, run_id)
+    env_fns = [
+        lambda worker=worker: make_env(app=args.app, persona=args.persona, render_mode=None, seed=args.seed + worker,
+                                       run_id=run_id, worker=worker, log_dir=args.log_dir, action_repeat=args.action_repeat,
+                                       failures_dir=args.failures_dir, shared_browser=args.shared_browser,
+                                       monitor_flush_every=args.monitor_flush_every)
+        for worker in range(args.n_envs)
+    ]
+
+    # A shared browser lives in this process and its envs are stepped in turn, so no subprocesses
+    use_subprocs = args.n_envs > 1 and not args.shared_browser
+    vec_env = SubprocVecEnv(env_fns) if use_subprocs else DummyVecEnv(env_fns)
 
     # Pick algorithm (PPO vs. A2C)
     if args.algo == "ppo": 
@@ -73,35 +166,67 @@ def main():
     else: 
         Algo = A2C
 
-    policy = "MlpPolicy"
-
     model = Algo(
         policy,
         vec_env,
         verbose=1,
         seed=args.seed,
         tensorboard_log=args.log_dir,
-        **load_hyperparams(args.algo, args.app),
+        **hyperparams,
     )
 
-    # Store short app name for path
-    app_name = "lunar" if args.app == "lunar_lander" else "swaglabs"
-
     # Build clean tensorboard log directories
     log_app_dir = os.path.join(args.log_dir, args.app)
     os.makedirs(log_app_dir, exist_ok=True)
-    log_dir = os.path.join(log_app_dir, f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}") 
+    log_dir = os.path.join(log_app_dir, file_name)
     new_logger = configure(log_dir, ["stdout", "tensorboard"])
     model.set_logger(new_logger)
 
-    model.learn(total_timesteps=args.timesteps, progress_bar=True)
-
-    # Build clean model directories
-    model_app_dir = os.path.join(args.model_dir, args.app)
-    os.makedirs(model_app_dir, exist_ok=True)
-    path = os.path.join(model_app_dir, f"{app_name}_{args.algo}_{args.persona}_{args.timesteps}.zip")
+    callbacks = []
+
+    coverage = CoverageRun(run_id, persona=args.persona, app=args.app) if args.coverage else None
+    if coverage:
+        callbacks.append(ConvertCallback(coverage))
+
+    # Snapshots are evaluated in a separate process; the best one is saved next to the final model
+    async_eval = None
+    if args.eval_freq:
+        from .async_eval import AsyncEvalCallback
+
+        metric, mode = registry.get_app(args.app)["eval_metric"]
+        async_eval = AsyncEvalCallback(
+            args.app, args.algo, args.persona, best_path=os.path.join(model_app_dir, f"{file_name}_best.zip"),
+            eval_freq=args.eval_freq, episodes=args.eval_episodes, metric=args.eval_metric or metric,
+            mode=args.eval_mode or mode, patience=args.patience, min_delta=args.min_delta,
+            action_repeat=args.action_repeat, events_dir=args.events_dir,
+        )
+        callbacks.append(async_eval)
+
+    try:
+        model.learn(total_timesteps=args.timesteps, progress_bar=True, callback=callbacks)
+    finally:
+        # Flushes buffered monitor rows, then merges worker files into one episode log
+        vec_env.close()
+        merge_monitor_files(monitor_dir(args.log_dir, args.app, run_id))
+
+        if coverage:
+            CoverageStore(args.coverage_dir).commit(coverage)
+            print(f"Coverage: {coverage.pairs} (page, action) pairs, {coverage.transitions} transitions")
+
+    # Saved inside the model zip, so eval rebuilds the env the same way
+    model.env_config = {"action_repeat": args.action_repeat}
     model.save(path)
-    print("Saved: ", path)
+
+    # Where early stopping kicks in depends on eval timing, so those models aren't reusable by config
+    if async_eval and async_eval.patience is not None:
+        print("Saved: ", path)
+    else:
+        cache.store_model(key, path, config, file_name)
+        print(f"Saved ({key}): ", path)
+
+    if async_eval and async_eval.best:
+        print(f"Best snapshot ({async_eval.metric}={async_eval.best[1]:.3f} at {async_eval.best[0]} steps): "
+              f"{os.path.join(model_app_dir, file_name)}_best.zip")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,12 @@
+def policy_weights(policy):
+    """
+    Snapshot of a policy's parameters as numpy arrays, safe to send to another process.
+    """
+
+    return {name: tensor.detach().cpu().numpy() for name, tensor in policy.state_dict().items()}
+
+
+def load_policy_weights(policy, weights):
+    import torch as th
+
+    policy.load_state_dict({name: th.as_tensor(value) for name, value in weights.items()})
@@ -0,0 +1,114 @@
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("Box2D")
+
+from envs import registry  # noqa: E402
+from src.eval import evaluate_lunar  # noqa: E402
+
+ACTIONS = [2, 2, 1, 3, 0, 2, 2, 3, 1, 2, 0, 0]
+
+
+def rollout(action_repeat, actions, persona="baseline", seed=3):
+    env = registry.make_env("lunar_lander", persona=persona, seed=seed, action_repeat=action_repeat)
+    env.reset()
+    steps = [env.step(action) for action in actions]
+    env.close()
+    return steps
+
+
+@pytest.mark.parametrize("persona", ["baseline", "safe"])
+def test_repeated_step_sums_the_rewards_of_its_frames(persona):
+    frames = rollout(1, np.repeat(ACTIONS, 3), persona=persona)
+    steps = rollout(3, ACTIONS, persona=persona)
+
+    for i, (obs, reward, _, _, info) in enumerate(steps):
+        last = frames[3 * i + 2]
+        assert reward == pytest.approx(sum(frame[1] for frame in frames[3 * i:3 * i + 3]))
+        np.testing.assert_array_equal(obs, last[0])
+        assert info["frames"] == 3 and info["frame"] == 3 * (i + 1)
+
+
+def test_repeat_stops_on_the_frame_the_episode_ends():
+    frames = []
+    env = registry.make_env("lunar_lander", seed=3)
+    env.reset()
+    terminated = truncated = False
+    while not (terminated or truncated):
+        _, reward, terminated, truncated, _ = env.step(0)
+        frames.append(reward)
+    env.close()
+
+    env = registry.make_env("lunar_lander", seed=3, action_repeat=10_000)
+    env.reset()
+    _, reward, terminated, truncated, info = env.step(0)
+    env.close()
+
+    assert terminated or truncated
+    assert info["frames"] == info["frame"] == len(frames) < 10_000
+    assert reward == pytest.approx(sum(frames))
+
+
+class ConstantModel:
+    def predict(self, obs, deterministic=True):
+        return 0, None
+
+
+class LandsAfterFourSteps:
+    """
+    Stands in for an action-repeat env: every step runs 3 frames, and the lander touches down on step 4.
+    """
+
+    def reset(self, seed=None):
+        self.steps = 0
+        return np.zeros(8), {}
+
+    def step(self, action):
+        self.steps += 1
+        done = self.steps == 4
+        info = {"frame": 3 * self.steps, "frames": 3, "landed": done, "crashed": False,
+                "landing_type": "perfect" if done else None}
+        return np.zeros(8), 1.0, done, False, info
+
+
+def test_landing_time_counts_frames_and_landing_steps_counts_steps():
+    _, episodes = evaluate_lunar(ConstantModel(), LandsAfterFourSteps(), episodes=2, verbose=False)
+    assert [(m["landing_time"], m["landing_steps"]) for m in episodes] == [(12, 4), (12, 4)]
+
+
+def test_landing_time_without_repeat_is_the_step_count():
+    env = registry.make_env("lunar_lander", seed=3)
+    env.reset()
+    steps = 0
+    terminated = truncated = False
+    while not (terminated or truncated):
+        _, _, terminated, truncated, info = env.step(0)
+        steps += 1
+    env.close()
+    assert info["frame"] == steps
+
+
+def test_env_config_round_trips_from_train_into_eval(tmp_path, monkeypatch):
+    pytest.importorskip("stable_baselines3")
+    from src import eval as eval_module
+    from src import train
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(train, "load_hyperparams", lambda algo, app: {"n_steps": 64, "batch_size": 64, "n_epochs": 1})
+    monkeypatch.setattr(sys, "argv", ["train", "--persona", "safe", "--timesteps", "64", "--action_repeat", "3"])
+    train.main()
+
+    built = []
+    make_env = registry.make_env
+    monkeypatch.setattr(registry, "make_env", lambda app, **kwargs: built.append(kwargs) or make_env(app, **kwargs))
+    monkeypatch.setattr(sys, "argv", ["eval", "--persona", "safe", "--timesteps", "64", "--episodes", "1", "--quiet"])
+    eval_module.main()
+
+    assert built[-1]["action_repeat"] == 3
+
+    monkeypatch.setattr(sys, "argv", ["eval", "--persona", "safe", "--timesteps", "64", "--episodes", "1", "--quiet",
+                                      "--action_repeat", "2", "--no_cache"])
+    eval_module.main()
+    assert built[-1]["action_repeat"] == 2
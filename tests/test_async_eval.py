@@ -0,0 +1,51 @@
+import os
+import signal
+
+import pytest
+
+pytest.importorskip("stable_baselines3")
+pytest.importorskip("Box2D")
+
+from stable_baselines3 import PPO  # noqa: E402
+from stable_baselines3.common.vec_env import DummyVecEnv  # noqa: E402
+
+from envs import registry  # noqa: E402
+from src.async_eval import AsyncEvalCallback  # noqa: E402
+
+
+def make_model():
+    env = DummyVecEnv([lambda: registry.make_env("lunar_lander")])
+    return PPO("MlpPolicy", env, n_steps=64, batch_size=64, n_epochs=1, verbose=0, device="cpu")
+
+
+def make_callback(tmp_path, **kwargs):
+    return AsyncEvalCallback("lunar_lander", "ppo", "baseline", best_path=str(tmp_path / "best.zip"),
+                             eval_freq=64, episodes=1, verbose=0, **kwargs)
+
+
+def test_failing_eval_process_stops_training_with_its_traceback(tmp_path):
+    callback = make_callback(tmp_path, metric="bogus")
+    with pytest.raises(RuntimeError, match="KeyError: 'bogus'"):
+        make_model().learn(100_000, callback=callback)
+    assert not callback.process.is_alive()
+
+
+def test_killed_eval_process_stops_training(tmp_path):
+    class KilledOnStart(AsyncEvalCallback):
+        def _on_training_start(self):
+            super()._on_training_start()
+            os.kill(self.process.pid, signal.SIGKILL)
+
+    callback = KilledOnStart("lunar_lander", "ppo", "baseline", best_path=str(tmp_path / "best.zip"),
+                             eval_freq=64, episodes=1, verbose=0)
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        make_model().learn(100_000, callback=callback)
+
+
+def test_evaluations_are_logged_and_best_is_saved(tmp_path):
+    callback = make_callback(tmp_path)
+    make_model().learn(256, callback=callback)
+
+    assert callback.evaluations >= 1
+    assert callback.best is not None
+    assert (tmp_path / "best.zip").exists()
@@ -0,0 +1,164 @@
+import pytest
+
+from envs.swaglabs.browser import BrowserPool, ContextDriver
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        if handle not in self.driver.handles:
+            raise RuntimeError(f"no such window: {handle}")
+        self.driver.active = handle
+        self.driver.switches.append(handle)
+
+
+class FakeDriver:
+    """
+    Just enough of a Chrome WebDriver for BrowserPool: CDP contexts and targets, windows, navigation.
+    A new window is listed in window_handles only after `listing_delay` reads, like the real async update.
+    """
+
+    def __init__(self, listing_delay=0, target_ids_are_handles=True):
+        self.handles = ["main"]
+        self.pending = []  # [handle, reads left before it is listed]
+        self.listing_delay = listing_delay
+        self.target_ids_are_handles = target_ids_are_handles
+        self.contexts = set()
+        self.active = "main"
+        self.switches = []
+        self.visits = []
+        self.lost = set()
+        self.quitted = False
+        self.switch_to = FakeSwitchTo(self)
+        self._next = 0
+
+    @property
+    def window_handles(self):
+        if self.quitted:
+            raise RuntimeError("session deleted")
+        for pending in self.pending:
+            pending[1] -= 1
+        self.handles += [handle for handle, left in self.pending if left < 0]
+        self.pending = [pending for pending in self.pending if pending[1] >= 0]
+        return list(self.handles)
+
+    def execute_cdp_cmd(self, cmd, params):
+        self._next += 1
+        if cmd == "Target.createBrowserContext":
+            context_id = f"ctx{self._next}"
+            self.contexts.add(context_id)
+            return {"browserContextId": context_id}
+        if cmd == "Target.createTarget":
+            target_id = f"target{self._next}"
+            handle = target_id if self.target_ids_are_handles else f"window{self._next}"
+            self.pending.append([handle, self.listing_delay])
+            return {"targetId": target_id}
+        if cmd == "Target.disposeBrowserContext":
+            self.contexts.discard(params["browserContextId"])
+            return {}
+        raise NotImplementedError(cmd)
+
+    def get(self, url):
+        if self.active in self.lost:
+            raise RuntimeError("no such window")
+        self.visits.append((self.active, url))
+
+    @property
+    def current_url(self):
+        return next((url for handle, url in reversed(self.visits) if handle == self.active), "about:blank")
+
+    def delete_all_cookies(self):
+        pass
+
+    def execute_script(self, script):
+        pass
+
+    def quit(self):
+        self.quitted = True
+
+
+def make_pool(**kwargs):
+    started = []
+
+    def start_driver():
+        driver = FakeDriver(**kwargs)
+        started.append(driver)
+        return driver
+
+    return BrowserPool(start_driver, window_timeout=0.5), started
+
+
+def test_new_context_waits_for_the_window_to_be_listed():
+    pool, started = make_pool(listing_delay=3)
+    first, second = pool.new_context(), pool.new_context()
+
+    assert isinstance(first, ContextDriver) and first.handle != second.handle
+    assert set(pool.contexts) == {first.handle, second.handle}
+    assert set(pool.contexts.values()) == started[0].contexts
+    assert len(started) == 1
+
+
+def test_new_context_falls_back_to_the_new_handle():
+    pool, _ = make_pool(listing_delay=2, target_ids_are_handles=False)
+    first, second = pool.new_context(), pool.new_context()
+
+    assert first.handle.startswith("window") and second.handle.startswith("window")
+    assert first.handle != second.handle
+
+
+def test_new_context_times_out_with_a_descriptive_error():
+    pool, started = make_pool(listing_delay=10**9)
+
+    with pytest.raises(RuntimeError, match="was not listed in window_handles"):
+        pool.new_context()
+    assert not pool.contexts
+    assert not started[0].contexts  # the orphaned context was disposed
+
+
+def test_context_driver_switches_to_its_own_window():
+    pool, started = make_pool()
+    first, second = pool.new_context(), pool.new_context()
+    driver = started[0]
+
+    first.get("https://a/")
+    first.get("https://a/cart.html")
+    second.get("https://b/")
+    assert first.current_url == "https://a/cart.html"
+
+    assert driver.switches == [first.handle, second.handle, first.handle]
+    assert driver.visits == [(first.handle, "https://a/"), (first.handle, "https://a/cart.html"),
+                             (second.handle, "https://b/")]
+
+    first.quit()
+    with pytest.raises(RuntimeError, match="browser context is closed"):
+        first.get("https://a/")
+    second.quit()
+    assert driver.quitted  # last context gone, so the browser is released
+
+
+def test_reset_replaces_a_lost_context_without_touching_the_others(monkeypatch):
+    pytest.importorskip("selenium")
+    from envs.swaglabs.env import SwagLabsEnv
+
+    pool, started = make_pool()
+    monkeypatch.setattr(BrowserPool, "_shared", pool)
+
+    env, other = SwagLabsEnv(shared_browser=True), SwagLabsEnv(shared_browser=True)
+    env.reset()
+    other.reset()
+    lost = env.driver.handle
+    kept = other.driver.handle
+
+    started[0].lost.add(lost)
+    env.reset()
+
+    assert env.driver.handle not in (lost, kept)
+    assert set(pool.contexts) == {env.driver.handle, kept}
+    assert len(started) == 1 and not started[0].quitted
+    assert len(started[0].contexts) == 2  # the lost context was disposed
+
+    env.close()
+    other.close()
+    assert started[0].quitted
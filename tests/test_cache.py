@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from envs import registry
+from src import cache as cache_module
+from src.cache import ArtifactCache, code_version, config_key, evaluator_version, source_digest
+
+
+def test_config_key_is_order_independent_and_stable():
+    config = {"app": "lunar_lander", "algo": "ppo", "seed": 7, "hyperparams": {"n_steps": 2048, "gamma": 0.99}}
+    reordered = {"hyperparams": {"gamma": 0.99, "n_steps": 2048}, "seed": 7, "algo": "ppo", "app": "lunar_lander"}
+
+    assert config_key(config) == config_key(reordered)
+    # Pinned so that an accidental change to the key format (which would orphan every cached artifact) is noticed
+    assert config_key(config) == "f3e40cba9f063caa"
+    assert config_key({**config, "seed": 8}) != config_key(config)
+
+
+def test_train_config_extra_mode_keys_change_the_key():
+    pytest.importorskip("stable_baselines3")
+    from src.train import train_config
+
+    args = ("lunar_lander", "ppo", "safe", 7, 1000, 2, 1, {"n_steps": 16})
+    single = train_config(*args)
+    assert set(single) == {"app", "algo", "persona", "seed", "timesteps", "n_envs", "action_repeat", "policy",
+                           "hyperparams", "code_version", "sb3_version"}
+
+    distributed = train_config(*args, distributed=True, n_workers=2)
+    shared = train_config(*args, shared_rollout=["baseline", "safe"])
+    assert len({config_key(single), config_key(distributed), config_key(shared)}) == 3
+
+
+@pytest.mark.parametrize("app", registry.app_names())
+def test_code_version_does_not_depend_on_working_directory(app, tmp_path, monkeypatch):
+    here = code_version(app), evaluator_version(app)
+    monkeypatch.chdir(tmp_path)
+    assert (code_version(app), evaluator_version(app)) == here
+
+
+def test_code_version_changes_with_reward_source(tmp_path):
+    env, reward = tmp_path / "env.py", tmp_path / "reward.py"
+    env.write_text("ENV = 1\n")
+    reward.write_text("REWARD = 1\n")
+    before = source_digest([str(env), str(reward)])
+
+    reward.write_text("REWARD = 2\n")
+    assert source_digest([str(env), str(reward)]) != before
+
+
+def test_missing_source_raises(tmp_path, monkeypatch):
+    with pytest.raises(FileNotFoundError):
+        source_digest([str(tmp_path / "env.py")])
+
+    apps = {"ghost": {**registry.get_app("lunar_lander"), "entry_point": "envs.ghost.env:GhostEnv"}}
+    monkeypatch.setattr(registry, "APPS", apps)
+    with pytest.raises(FileNotFoundError):
+        cache_module.code_version("ghost")
+
+
+def test_artifact_cache_round_trip(tmp_path):
+    store = ArtifactCache(str(tmp_path / "cache"))
+    model = tmp_path / "model.zip"
+    model.write_bytes(b"weights")
+
+    assert store.lookup_model("abc") is None
+    store.store_model("abc", str(model), {"seed": 7}, "lunar_ppo_safe_1000")
+    assert open(store.lookup_model("abc"), "rb").read() == b"weights"
+    assert store.resolve("lunar_ppo_safe_1000") == "abc"
+
+    store.store_eval("def", {"avg_reward": 1}, [{"episode": 1}], {"seed": 7}, "lunar_ppo_safe_1000")
+    assert store.lookup_eval("def") == ({"avg_reward": 1.0}, [{"episode": 1}])
+    assert os.path.exists(os.path.join(str(tmp_path / "cache"), "index.json"))
@@ -0,0 +1,95 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from envs.swaglabs.pages import STATES, page_from_url
+from src.coverage import ACTION_STATES, N_ACTIONS, TOTAL_PAIRS, CoverageRun, CoverageStore
+
+BASE = "https://www.saucedemo.com"
+
+
+@pytest.mark.parametrize("url, page", [
+    (f"{BASE}/", "login"),
+    (f"{BASE}/inventory.html", "inventory"),
+    (f"{BASE}/inventory-item.html?id=4", "item"),
+    (f"{BASE}/checkout-step-two.html#top", "checkout_overview"),
+    (f"{BASE}/about.html", "other"),
+    ("", "other"),
+    (None, "other"),
+])
+def test_page_from_url(url, page):
+    assert page_from_url(url) == page
+
+
+def make_run(name, transitions, persona="functional"):
+    run = CoverageRun(name, persona=persona)
+    for prev_state, action, state in transitions:
+        run.record_info({"prev_state": prev_state, "action": action, "state": state})
+    return run
+
+
+def test_run_counts_new_pairs_and_transitions_once():
+    run = make_run("r", [("login", 0, "inventory"), ("login", 0, "inventory"), ("login", 0, "login"),
+                         ("checkout_complete", 1, "inventory")])
+    run.record_info({"action": 3})
+
+    assert run.steps == 4
+    assert run.pairs == 1  # nothing is counted from the terminal page
+    assert run.transitions == 3
+    assert run.counts[STATES.index("login"), 0, STATES.index("inventory")] == 2
+    assert [point[3] for point in run.curve] == [0, 1, 2, 3]
+
+
+def test_commit_merges_runs_from_stale_store_instances(tmp_path):
+    first, second = CoverageStore(str(tmp_path)), CoverageStore(str(tmp_path))
+
+    assert first.commit(make_run("a", [("login", 0, "inventory"), ("inventory", 2, "cart")])) == 0
+    assert second.commit(make_run("b", [("login", 0, "inventory"), ("cart", 5, "checkout_info")],
+                                  persona="explorer")) == 1
+
+    store = CoverageStore(str(tmp_path))
+    assert [run["run"] for run in store.runs] == ["a", "b"]
+    login, inventory, cart = STATES.index("login"), STATES.index("inventory"), STATES.index("cart")
+    assert store.counts[login, 0, inventory] == 2
+    assert store.first_run[login, 0, inventory] == 0
+    assert store.first_run[cart, 5, STATES.index("checkout_info")] == 1
+    assert store.select_runs(persona="explorer") == [1]
+    assert [edge["first_run"] for edge in store.transitions()] == ["a", "a", "b"]
+
+
+def commit_in_process(path, i):
+    CoverageStore(path).commit(make_run(f"run{i}", [("inventory", i, "item")]))
+
+
+def test_parallel_commits_keep_every_run(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=commit_in_process, args=(str(tmp_path), i)) for i in range(6)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    store = CoverageStore(str(tmp_path))
+    assert sorted(run["run"] for run in store.runs) == [f"run{i}" for i in range(6)]
+    assert store.run_pairs.shape[0] == 6
+    assert store.counts.sum() == 6
+    assert not list(tmp_path.glob("*.tmp*"))
+
+
+def test_uncovered_lists_only_actionable_pairs_not_yet_taken(tmp_path):
+    store = CoverageStore(str(tmp_path))
+    assert len(store.uncovered()) == TOTAL_PAIRS == len(ACTION_STATES) * N_ACTIONS
+
+    a = store.commit(make_run("a", [("login", 0, "inventory"), ("other", 1, "login")]))
+    b = store.commit(make_run("b", [("cart", 4, "checkout_info")]))
+
+    uncovered = store.uncovered()
+    assert ("login", 0) not in uncovered and ("cart", 4) not in uncovered
+    assert len(uncovered) == TOTAL_PAIRS - 2
+    assert not any(state in ("other", "checkout_complete") for state, _ in uncovered)
+
+    assert ("cart", 4) in store.uncovered([a])
+    assert ("login", 0) in store.uncovered([b])
+    assert np.array_equal(store.covered_pairs([a, b]), store.covered_pairs())
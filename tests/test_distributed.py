@@ -0,0 +1,167 @@
+import socket
+import threading
+import time
+from argparse import Namespace
+
+import numpy as np
+import pytest
+
+from src.distributed import (RolloutServer, make_distributed_algo, make_spaces_vec_env, pack_arrays, recv_message,
+                             run_worker, send_message, unpack_arrays)
+
+HYPERPARAMS = {"n_steps": 64, "batch_size": 64, "n_epochs": 1}
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def make_server(tmp_path, **kwargs):
+    config = {"app": "lunar_lander", "algo": "ppo", "persona": "baseline", "seed": 7, "action_repeat": 1,
+              "hyperparams": HYPERPARAMS, "run_id": "test_distributed_s7", "log_dir": str(tmp_path),
+              "monitor_flush_every": 10}
+    return RolloutServer(config, port=0, **kwargs)
+
+
+def hello(server, worker_id="w0", token=""):
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    send_message(sock, {"type": "hello", "worker_id": worker_id, "token": token})
+    return sock
+
+
+def heartbeat_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("heartbeat-")]
+
+
+def test_framing_round_trips_header_and_payload():
+    left, right = socket.socketpair()
+    arrays = {"rewards": np.arange(6, dtype=np.float32).reshape(3, 2), "actions": np.array([1, 0, 3])}
+    big = b"x" * (3 << 20)
+
+    with left, right:
+        send_message(left, {"type": "rollout", "round": 3}, pack_arrays(arrays))
+        send_message(left, {"type": "heartbeat"})
+        sender = threading.Thread(target=send_message, args=(left, {"type": "big"}, big))
+        sender.start()
+
+        header, payload = recv_message(right)
+        assert header == {"type": "rollout", "round": 3}
+        unpacked = unpack_arrays(payload)
+        assert set(unpacked) == set(arrays)
+        for name in arrays:
+            np.testing.assert_array_equal(unpacked[name], arrays[name])
+
+        assert recv_message(right) == ({"type": "heartbeat"}, b"")
+        assert recv_message(right) == ({"type": "big"}, big)
+        sender.join()
+
+        left.close()
+        with pytest.raises(ConnectionError):
+            recv_message(right)
+
+
+def test_hello_gets_the_config_and_heartbeats_keep_the_worker(tmp_path):
+    server = make_server(tmp_path, heartbeat_timeout=0.5, token="secret")
+    try:
+        sock = hello(server, token="secret")
+        header, _ = recv_message(sock)
+        assert header == {"type": "config", "config": server.config}
+
+        for _ in range(8):
+            send_message(sock, {"type": "heartbeat"})
+            time.sleep(0.1)
+        assert [conn.worker_id for conn in server.live_workers()] == ["w0"]
+        sock.close()
+    finally:
+        server.stop()
+
+
+def test_bad_token_is_rejected(tmp_path):
+    server = make_server(tmp_path, token="secret")
+    try:
+        sock = hello(server, token="guess")
+        assert recv_message(sock)[0] == {"type": "rejected", "reason": "bad token"}
+        with pytest.raises(ConnectionError):
+            recv_message(sock)
+        assert server.live_workers() == []
+    finally:
+        server.stop()
+
+
+def test_silent_worker_is_dropped_after_heartbeat_timeout(tmp_path):
+    server = make_server(tmp_path, heartbeat_timeout=0.3)
+    try:
+        sock = hello(server)
+        recv_message(sock)
+        assert wait_until(lambda: len(server.live_workers()) == 1)
+        assert wait_until(lambda: server.live_workers() == [])
+        with pytest.raises((ConnectionError, OSError)):
+            recv_message(sock)
+    finally:
+        server.stop()
+
+
+def test_reconnect_with_the_same_id_replaces_the_old_connection(tmp_path):
+    server = make_server(tmp_path)
+    try:
+        first = hello(server)
+        recv_message(first)
+        second = hello(server)
+        recv_message(second)
+
+        assert wait_until(lambda: len(server.connections) == 1 and server.connections["w0"].sock.fileno() != -1
+                          and [conn.worker_id for conn in server.live_workers()] == ["w0"])
+        with pytest.raises((ConnectionError, OSError)):
+            recv_message(first)
+        second.close()
+    finally:
+        server.stop()
+
+
+def test_learner_and_two_workers_survive_a_dropped_connection(tmp_path):
+    pytest.importorskip("stable_baselines3")
+    pytest.importorskip("Box2D")
+    from stable_baselines3 import PPO
+    from envs import registry
+
+    server = make_server(tmp_path, heartbeat_timeout=5.0, token="secret")
+    threads_before = len(heartbeat_threads())
+    workers = [
+        threading.Thread(target=run_worker, args=(Namespace(host="127.0.0.1", port=server.port, worker_id=f"w{i}",
+                                                            heartbeat_interval=0.05, token="secret"),))
+        for i in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+
+    probe = registry.make_env("lunar_lander")
+    model = make_distributed_algo(PPO)("MlpPolicy", make_spaces_vec_env(probe.observation_space, probe.action_space, 2),
+                                       verbose=0, seed=7, device="cpu", **HYPERPARAMS)
+    probe.close()
+    model.server = server
+
+    try:
+        model.learn(total_timesteps=2 * 64 * 2)
+        assert server.round == 2
+        assert len(heartbeat_threads()) == threads_before + 2
+
+        # Drop one worker from the learner side; it reconnects and its old heartbeat thread exits
+        dropped = server.connections["w0"]
+        dropped.close()
+        assert wait_until(lambda: server.connections["w0"] is not dropped and server.connections["w0"].alive)
+
+        model.learn(total_timesteps=2 * 64 * 2, reset_num_timesteps=False)
+        assert server.round == 4
+        assert wait_until(lambda: len(heartbeat_threads()) == threads_before + 2)
+    finally:
+        server.stop()
+        for worker in workers:
+            worker.join(timeout=10)
+
+    assert not any(worker.is_alive() for worker in workers)
+    assert wait_until(lambda: len(heartbeat_threads()) == threads_before)
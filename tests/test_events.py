@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src import events
+
+
+@pytest.fixture(autouse=True)
+def default_config(monkeypatch):
+    for name in ["DRL_EVENTS_DIR", "DRL_EVENTS_LEVEL", "DRL_STEP_EVENTS", "DRL_EVENTS_CONSOLE"]:
+        monkeypatch.delenv(name, raising=False)
+    events.configure()
+    yield
+    events.configure()
+    for name in ["DRL_EVENTS_DIR", "DRL_EVENTS_LEVEL", "DRL_STEP_EVENTS", "DRL_EVENTS_CONSOLE"]:
+        os.environ.pop(name, None)
+
+
+def read_events(path):
+    with open(path) as file:
+        return [json.loads(line)["event"] for line in file]
+
+
+def test_configure_reconfigures_loggers_created_before_it(tmp_path):
+    logger = events.get_logger("early")
+    logger.info("before")
+    logger.step("dropped")
+    assert logger.path is None
+
+    events.configure(log_dir=str(tmp_path / "a"), level="debug", step_sample_rate=1.0)
+    assert events.get_logger("early") is logger
+    logger.debug("debug_now_enabled")
+    logger.step("step_now_enabled")
+    first = logger.path
+
+    events.configure(log_dir=str(tmp_path / "b"))
+    logger.debug("filtered")
+    logger.info("second_dir")
+    logger.close()
+
+    assert read_events(first) == ["debug_now_enabled", "step_now_enabled"]
+    assert read_events(logger.path) == ["second_dir"]
+    assert [record["event"] for record in logger.recent()] == ["before", "debug_now_enabled", "step_now_enabled",
+                                                               "second_dir"]
+
+
+def test_env_module_does_not_import_src():
+    pytest.importorskip("selenium")
+    code = "import sys, envs.swaglabs.env; print(any(name.split('.')[0] == 'src' for name in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_env_falls_back_to_standard_logging_and_registry_injects_events(caplog):
+    pytest.importorskip("selenium")
+    from envs import registry
+    from envs.swaglabs.env import LoggingEvents, SwagLabsEnv
+
+    env = SwagLabsEnv()
+    assert isinstance(env.events, LoggingEvents)
+    with caplog.at_level(logging.WARNING, logger="swaglabs"):
+        env.events.warning("driver_lost", error="NoSuchWindowException")
+        env.events.step("action", action=1)
+    assert [(record.levelname, record.getMessage()) for record in caplog.records] == [
+        ("WARNING", "driver_lost {'error': 'NoSuchWindowException'}")]
+
+    assert registry.make_env("swaglabs").events is events.get_logger("swaglabs")
+    injected = LoggingEvents("custom")
+    assert registry.make_env("swaglabs", events=injected).events is injected
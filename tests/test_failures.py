@@ -0,0 +1,83 @@
+import pytest
+
+from src.failures import FailureIndex, failure_signature, normalize_message, normalize_stack
+
+
+def raise_in_click(message):
+    def click():
+        raise TimeoutError(message)
+
+    try:
+        click()
+    except TimeoutError as exc:
+        return exc
+
+
+def test_normalize_message_drops_volatile_parts():
+    first = normalize_message("Element <button id=x> at 0x7f3a2b not clickable at point (103, 48)\nStacktrace:\n#0 0x55d...")
+    second = normalize_message("Element <button id=x> at 0x7f99ff not clickable at point (7, 512)\nStacktrace:\n#0 0x11a...")
+
+    assert first == second == "Element <button id=x> at <addr> not clickable at point (N, N)"
+    assert normalize_message("session 9f8e7d6c5b4a39281706f5e4d3c2b1a0 deleted") == "session <id> deleted"
+    assert normalize_message("") == ""
+
+
+def test_normalize_stack_ignores_line_numbers():
+    frames = normalize_stack(raise_in_click("timed out"))
+    assert frames == ["test_failures.py:raise_in_click", "test_failures.py:click"]
+
+
+def test_signature_is_stable_and_discriminating():
+    base = failure_signature(3, "cart", "TimeoutError", "timed out", ["env.py:step"])
+
+    assert base == failure_signature(3, "cart", "TimeoutError", "timed out", ["env.py:step"])
+    assert len(base) == 16
+    # Pinned: a change here splits every stored signature from new occurrences of the same failure
+    assert base == "fc2960e86323f692"
+
+    others = [
+        failure_signature(4, "cart", "TimeoutError", "timed out", ["env.py:step"]),
+        failure_signature(3, "inventory", "TimeoutError", "timed out", ["env.py:step"]),
+        failure_signature(3, "cart", "NoSuchElementException", "timed out", ["env.py:step"]),
+        failure_signature(3, "cart", "TimeoutError", "stale element", ["env.py:step"]),
+        failure_signature(3, "cart", "TimeoutError", "timed out", ["env.py:reset"]),
+    ]
+    assert len(set(others + [base])) == 6
+
+
+def test_index_dedups_and_keeps_shortest_repro(tmp_path):
+    index = FailureIndex(str(tmp_path), flush_every=1)
+
+    signature, new = index.record(2, "cart", raise_in_click("timed out after 10s"), actions=[0, 1, 1, 2], persona="explorer")
+    assert new
+    again, new = index.record(2, "cart", raise_in_click("timed out after 30s"), actions=[0, 2], persona="functional")
+    assert again == signature and not new
+
+    entry = index.entries[signature]
+    assert entry["count"] == 2
+    assert entry["repro"] == [0, 2]
+    assert entry["personas"] == ["explorer", "functional"]
+
+
+def test_shards_merge_and_compact(tmp_path):
+    first, second = FailureIndex(str(tmp_path), flush_every=1), FailureIndex(str(tmp_path), flush_every=1)
+    signature, _ = first.record(1, "inventory", raise_in_click("timed out"), actions=[0, 0, 1])
+    second.record(1, "inventory", raise_in_click("timed out"), actions=[1])
+    second.record(5, "checkout", raise_in_click("timed out"), actions=[5])
+
+    merged = FailureIndex(str(tmp_path)).load()
+    assert len(merged) == 2
+    assert merged[signature]["count"] == 2 and merged[signature]["repro"] == [1]
+
+    assert FailureIndex(str(tmp_path)).compact() == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["index.json"]
+    assert FailureIndex(str(tmp_path)).load()[signature]["count"] == 2
+
+
+def test_registry_builds_the_env_index_from_failures_dir(tmp_path):
+    pytest.importorskip("selenium")
+    from envs import registry
+
+    env = registry.make_env("swaglabs", failures_dir=str(tmp_path))
+    assert isinstance(env.failures, FailureIndex) and env.failures.path == str(tmp_path)
+    assert registry.make_env("swaglabs").failures is None
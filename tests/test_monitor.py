@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("stable_baselines3")
+pytest.importorskip("Box2D")
+
+from src.monitor import clear_monitor_dir, merge_monitor_files, monitor_dir, read_monitor_file  # noqa: E402
+from src.train import make_env  # noqa: E402
+
+
+def run_episodes(env, n):
+    env.reset(seed=0)
+    for _ in range(n):
+        done = False
+        while not done:
+            _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+            done = terminated or truncated
+        env.reset()
+
+
+def test_rerun_with_fewer_workers_merges_only_its_own_files(tmp_path):
+    for workers in (3, 1):
+        clear_monitor_dir(str(tmp_path), "lunar_lander", "run")
+        for worker in range(workers):
+            env = make_env(run_id="run", worker=worker, log_dir=str(tmp_path))
+            run_episodes(env, 1)
+            env.close()
+
+    merged = merge_monitor_files(monitor_dir(str(tmp_path), "lunar_lander", "run"))
+    header, rows = read_monitor_file(merged)
+    assert header["workers"] == 1
+    assert [row["worker"] for row in rows] == ["0"]
+
+
+@pytest.mark.parametrize("flush_every, written", [(1, 3), (2, 2), (10, 0)])
+def test_flush_every_bounds_the_unwritten_episodes(tmp_path, flush_every, written):
+    env = make_env(run_id="run", log_dir=str(tmp_path), monitor_flush_every=flush_every)
+    run_episodes(env, 3)
+
+    path = env.results_writer.file_handler.name
+    assert len(read_monitor_file(path)[1]) == written
+
+    env.close()
+    assert len(read_monitor_file(path)[1]) == 3
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from src.multi_persona import vtrace_advantages
+
+sb3 = pytest.importorskip("stable_baselines3")
+
+
+def rollout(n_steps=64, n_envs=4, seed=0):
+    rng = np.random.default_rng(seed)
+    episode_starts = (rng.random((n_steps, n_envs)) < 0.1).astype(np.float32)
+    episode_starts[0] = 1.0
+    return {
+        "rewards": rng.normal(size=(n_steps, n_envs)).astype(np.float32),
+        "values": rng.normal(size=(n_steps, n_envs)).astype(np.float32),
+        "episode_starts": episode_starts,
+        "last_values": rng.normal(size=n_envs).astype(np.float32),
+        "dones": (rng.random(n_envs) < 0.3).astype(np.float32),
+    }
+
+
+def sb3_gae(data, gamma, gae_lambda):
+    import gymnasium as gym
+    import torch as th
+    from stable_baselines3.common.buffers import RolloutBuffer
+
+    n_steps, n_envs = data["rewards"].shape
+    buffer = RolloutBuffer(n_steps, gym.spaces.Box(-1, 1, (1,)), gym.spaces.Discrete(2), device="cpu",
+                           gamma=gamma, gae_lambda=gae_lambda, n_envs=n_envs)
+    for step in range(n_steps):
+        buffer.add(np.zeros((n_envs, 1)), np.zeros((n_envs, 1)), data["rewards"][step], data["episode_starts"][step],
+                   th.as_tensor(data["values"][step]), th.zeros(n_envs))
+    buffer.compute_returns_and_advantage(th.as_tensor(data["last_values"]), data["dones"])
+    return buffer.advantages, buffer.returns
+
+
+def vtrace(data, ratios, gamma=0.99, gae_lambda=0.95):
+    return vtrace_advantages(data["rewards"], data["values"], data["episode_starts"], data["last_values"],
+                             data["dones"], ratios, gamma, gae_lambda)
+
+
+def test_on_policy_matches_sb3_gae():
+    data = rollout()
+    advantages, returns = vtrace(data, np.ones_like(data["rewards"]))
+    expected_advantages, expected_returns = sb3_gae(data, gamma=0.99, gae_lambda=0.95)
+
+    np.testing.assert_allclose(advantages, expected_advantages, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(returns, expected_returns, rtol=1e-5, atol=1e-5)
+
+
+def test_ratios_above_one_are_truncated():
+    data = rollout(seed=1)
+    on_policy, _ = vtrace(data, np.ones_like(data["rewards"]))
+    clipped, _ = vtrace(data, np.full_like(data["rewards"], 5.0))
+    np.testing.assert_allclose(clipped, on_policy)
+
+
+def test_zero_ratio_ignores_the_transition():
+    data = rollout(n_steps=8, n_envs=1, seed=2)
+    data["episode_starts"][:] = 0.0
+    data["dones"][:] = 0.0
+
+    ratios = np.ones_like(data["rewards"])
+    ratios[3] = 0.0
+    advantages, _ = vtrace(data, ratios)
+
+    # Step 3 contributes nothing and cuts the trace, so earlier steps only see steps 0-2
+    assert advantages[3, 0] == 0.0
+    truncated = {key: value[:3] if key in ("rewards", "values", "episode_starts") else value for key, value in data.items()}
+    truncated["last_values"] = data["values"][3]
+    expected, _ = vtrace(truncated, np.ones((3, 1), dtype=np.float32))
+    # The last step of the truncated rollout bootstraps from values[3] exactly as the full one does before the cut
+    np.testing.assert_allclose(advantages[:3], expected, rtol=1e-5, atol=1e-6)
+
+
+def test_columns_are_independent():
+    data = rollout(seed=3)
+    ratios = np.ones_like(data["rewards"])
+    ratios[:, 1] = 0.5
+    advantages, _ = vtrace(data, ratios)
+    on_policy, _ = vtrace(data, np.ones_like(data["rewards"]))
+
+    np.testing.assert_allclose(advantages[:, [0, 2, 3]], on_policy[:, [0, 2, 3]])
+    assert not np.allclose(advantages[:, 1], on_policy[:, 1])
+
+
+def test_shared_models_never_replace_independently_trained_ones(tmp_path, monkeypatch):
+    pytest.importorskip("Box2D")
+    import sys
+    from src import multi_persona
+
+    models = tmp_path / "models" / "lunar_lander"
+    models.mkdir(parents=True)
+    (models / "lunar_ppo_safe_128.zip").write_bytes(b"independently trained")
+
+    monkeypatch.setattr(multi_persona, "load_hyperparams",
+                        lambda algo, app: {"n_steps": 64, "batch_size": 64, "n_epochs": 1})
+    monkeypatch.setattr(sys, "argv", ["multi_persona", "--personas", "baseline", "safe", "--timesteps", "128",
+                                      "--n_envs", "2", "--log_dir", str(tmp_path / "logs"),
+                                      "--model_dir", str(tmp_path / "models"), "--cache_dir", str(tmp_path / "cache")])
+    multi_persona.main()
+
+    assert (models / "lunar_ppo_safe_128.zip").read_bytes() == b"independently trained"
+    assert sorted(path.name for path in models.glob("*_shared.zip")) == ["lunar_ppo_baseline_128_shared.zip",
+                                                                         "lunar_ppo_safe_128_shared.zip"]
+    assert (tmp_path / "logs" / "lunar_lander" / "lunar_ppo_safe_128_shared").is_dir()
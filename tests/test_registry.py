@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import pytest
+
+from envs import registry
+
+
+def test_unknown_persona_is_rejected():
+    with pytest.raises(ValueError, match="Persona 'explorer' does not exist for lunar_lander"):
+        registry.make_env("lunar_lander", persona="explorer")
+    with pytest.raises(ValueError, match="App does not exist"):
+        registry.make_env("pong")
+
+
+@pytest.mark.parametrize("app, kwargs, rejected", [
+    ("lunar_lander", {"persona_name": "safe"}, "persona_name='safe'"),
+    ("lunar_lander", {"shared_browser": True}, "shared_browser=True"),
+    ("swaglabs", {"action_repeat": 4}, "action_repeat=4"),
+    ("swaglabs", {"render_mode": "human", "reward_personas": ["safe"]}, "render_mode='human', reward_personas=['safe']"),
+])
+def test_kwargs_the_env_does_not_accept_are_rejected(app, kwargs, rejected):
+    with pytest.raises(ValueError, match=f"The {app} env does not accept: {rejected}".replace("[", r"\[")):
+        registry.make_env(app, **kwargs)
+
+
+def test_rejected_kwargs_never_import_the_env_module():
+    code = ("import sys\nfrom envs import registry\n"
+            "try:\n    registry.make_env('swaglabs', action_repeat=4)\nexcept ValueError:\n    pass\n"
+            "print(any(name.startswith(('selenium', 'envs.swaglabs')) for name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_unused_options_at_their_off_value_are_dropped():
+    pytest.importorskip("Box2D")
+    env = registry.make_env("lunar_lander", persona="safe", shared_browser=False, failures_dir="data/failures",
+                            action_repeat=2, seed=3)
+    assert env.persona == "safe" and env.action_repeat == 2
+    env.close()
+
+
+def test_gym_make_goes_through_the_same_checks():
+    gym = pytest.importorskip("gymnasium")
+    registry.register_gym_envs()
+    with pytest.raises(ValueError, match="Persona 'functional' does not exist"):
+        gym.make("drl/LunarLander-v0", persona="functional")
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.report import aggregate, bootstrap_ci, holm_correction, pairwise, permutation_test, sample_units
+
+
+def episodes(run, persona, values, algo="ppo", app="lunar_lander"):
+    rows = []
+    for i, (landed, reward) in enumerate(values):
+        rows.append({"run": run, "app": app, "algo": algo, "persona": persona, "episode": i + 1,
+                     "landed": float(landed), "crashed": float(not landed), "total_reward": reward})
+    return rows
+
+
+def test_bootstrap_ci_brackets_mean():
+    values = np.random.default_rng(1).normal(10.0, 2.0, size=200)
+    mean, low, high = bootstrap_ci(values, rng=np.random.default_rng(0))
+
+    assert mean == pytest.approx(values.mean())
+    assert low < mean < high
+    # Close to the normal-theory interval
+    half_width = 1.96 * values.std(ddof=1) / np.sqrt(len(values))
+    assert (high - low) / 2 == pytest.approx(half_width, rel=0.15)
+
+
+def test_bootstrap_ci_edge_cases():
+    assert np.isnan(bootstrap_ci([np.nan])[0])
+    assert bootstrap_ci([3.0, np.nan]) == (3.0, 3.0, 3.0)
+
+
+def test_permutation_test():
+    rng = np.random.default_rng(0)
+    same_a, same_b = rng.normal(0, 1, 50), rng.normal(0, 1, 50)
+    _, p_same = permutation_test(same_a, same_b, rng=np.random.default_rng(0))
+    diff, p_shifted = permutation_test(same_a + 2.0, same_b, rng=np.random.default_rng(0))
+
+    assert p_same > 0.05
+    assert diff == pytest.approx(same_a.mean() + 2.0 - same_b.mean())
+    # Smallest attainable p-value with 5000 permutations
+    assert p_shifted == pytest.approx(1 / 5001)
+
+
+def test_holm_correction():
+    # Sorted thresholds: 0.05/4, 0.05/3, 0.05/2, 0.05/1
+    rejected = holm_correction([0.01, 0.04, 0.012, 0.03])
+    assert rejected.tolist() == [True, False, True, False]
+
+    # Step-down stops at the first failure even if later p-values would pass alone
+    assert holm_correction([0.04, 0.03, 0.001]).tolist() == [False, False, True]
+    assert holm_correction([0.02, 0.02]).tolist() == [True, True]
+
+
+def test_sample_units_uses_run_means_with_several_runs():
+    df = pd.DataFrame(episodes("a", "safe", [(1, 0.0)] * 10) + episodes("b", "safe", [(0, 0.0)] * 30))
+    assert sorted(sample_units(df, "landed")) == [0.0, 1.0]
+    assert len(sample_units(df[df["run"] == "a"], "landed")) == 10
+
+
+def test_aggregate_ci_includes_run_to_run_variance():
+    # Two runs that disagree completely: pooled episodes would give a tight CI around 0.5
+    df = pd.DataFrame(episodes("lunar_ppo_safe_1000", "safe", [(1, 0.0)] * 100)
+                      + episodes("lunar_ppo_safe_2000", "safe", [(0, 0.0)] * 100))
+    (row,) = aggregate(df)
+
+    mean, low, high = row["landed"]
+    assert row["runs"] == 2
+    assert mean == pytest.approx(0.5)
+    assert (low, high) == (0.0, 1.0)
+
+
+def test_pairwise_skips_shaped_reward_across_personas():
+    df = pd.DataFrame(
+        episodes("lunar_ppo_safe_1000", "safe", [(1, 200.0)] * 20)
+        + episodes("lunar_ppo_speedrunner_1000", "speedrunner", [(1, -50.0)] * 20)
+        + episodes("lunar_a2c_safe_1000", "safe", [(0, 10.0)] * 20, algo="a2c")
+    )
+    rows = pairwise(df, n_perm=500)
+
+    compared = {(row["a"], row["b"], row["metric"]) for row in rows}
+    assert ("ppo/safe", "ppo/speedrunner", "total_reward") not in compared
+    assert ("a2c/safe", "ppo/speedrunner", "total_reward") not in compared
+    assert ("a2c/safe", "ppo/safe", "total_reward") in compared
+    assert ("ppo/safe", "ppo/speedrunner", "landed") in compared
+
+    # Both land every episode, so no difference in landing rate despite very different rewards
+    same = next(row for row in rows if (row["a"], row["b"], row["metric"]) == ("ppo/safe", "ppo/speedrunner", "landed"))
+    assert same["diff"] == 0.0 and not same["significant"]
+    assert all(row["unit"] == "episodes" for row in rows)
@@ -0,0 +1,121 @@
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from src.results import ResultsStore, parse_run_name, read_scalars
+
+pytest.importorskip("tensorboard")
+from tensorboard.compat.proto.event_pb2 import Event  # noqa: E402
+
+
+def record(event):
+    payload = event.SerializeToString()
+    # read_scalars doesn't check the CRCs, so they are left as zeros
+    return struct.pack("<Q", len(payload)) + b"\0" * 4 + payload + b"\0" * 4
+
+
+def file_version(wall_time):
+    return record(Event(wall_time=wall_time, file_version="brain.Event:2"))
+
+
+def scalar(tag, step, value, wall_time=0.0):
+    event = Event(wall_time=wall_time, step=step)
+    summary_value = event.summary.value.add()
+    summary_value.tag = tag
+    summary_value.simple_value = value
+    return record(event)
+
+
+def write(path, *records, mode="wb"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode) as file:
+        file.write(b"".join(records))
+
+
+def values(store, run_name, tag="rollout/ep_rew_mean"):
+    run_id = store.select_runs(run=run_name)[0]
+    steps, _, vals = store.curve(run_id, tag)
+    return list(zip(steps.tolist(), vals.tolist()))
+
+
+def test_parse_run_name():
+    meta = parse_run_name("lunar_ppo_safe_500000_s3")
+    assert (meta["app"], meta["algo"], meta["persona"], meta["timesteps"], meta["seed"]) == ("lunar_lander", "ppo", "safe", 500000, 3)
+
+    meta = parse_run_name("swaglabs_a2c_functional_2000")
+    assert (meta["app"], meta["persona"], meta["timesteps"], meta["mode"]) == ("swaglabs", "functional", 2000, "single")
+
+    meta = parse_run_name("lunar_ppo_safe_4096_distributed")
+    assert (meta["app"], meta["persona"], meta["timesteps"], meta["mode"]) == ("lunar_lander", "safe", 4096, "distributed")
+
+    meta = parse_run_name("lunar_ppo_speed_runner_4096_shared_s9")
+    assert (meta["persona"], meta["mode"], meta["seed"]) == ("speed_runner", "shared", 9)
+
+
+def test_read_scalars_stops_at_partial_record(tmp_path):
+    path = str(tmp_path / "events.out.tfevents.1")
+    complete = file_version(1.0) + scalar("a", 1, 1.5) + scalar("a", 2, 2.5)
+    tail = scalar("a", 3, 3.5)
+    write(path, complete + tail[:10])
+
+    rows, offset = read_scalars(path)
+    assert [(tag, step, value) for tag, step, _, value in rows] == [("a", 1, 1.5), ("a", 2, 2.5)]
+    assert offset == len(complete)
+
+    write(path, tail[10:], mode="ab")
+    rows, offset = read_scalars(path, offset)
+    assert [(step, value) for _, step, _, value in rows] == [(3, 3.5)]
+    assert offset == len(complete) + len(tail)
+
+
+def test_ingest_is_incremental(tmp_path):
+    logs = str(tmp_path / "logs")
+    path = os.path.join(logs, "lunar_lander", "lunar_ppo_safe_1000", "events.out.tfevents.1")
+    tag = "rollout/ep_rew_mean"
+
+    write(path, file_version(1.0), scalar(tag, 1, 1.0), scalar(tag, 2, 2.0))
+    store = ResultsStore(str(tmp_path / "store"))
+    assert store.ingest(logs) == 2
+    assert store.ingest(logs) == 0
+
+    write(path, scalar(tag, 3, 3.0), mode="ab")
+    reopened = ResultsStore(str(tmp_path / "store"))
+    assert reopened.ingest(logs) == 1
+    assert values(reopened, "lunar_ppo_safe_1000") == [(1, 1.0), (2, 2.0), (3, 3.0)]
+
+
+def test_truncated_file_only_replaces_its_own_rows(tmp_path):
+    logs = str(tmp_path / "logs")
+    run_dir = os.path.join(logs, "lunar_lander", "lunar_ppo_safe_1000")
+    tag = "rollout/ep_rew_mean"
+
+    write(os.path.join(run_dir, "events.out.tfevents.1"), file_version(1.0), scalar(tag, 1, 1.0), scalar(tag, 2, 2.0))
+    write(os.path.join(run_dir, "events.out.tfevents.2"), file_version(2.0), scalar(tag, 10, 10.0), scalar(tag, 20, 20.0))
+    store = ResultsStore(str(tmp_path / "store"))
+    store.ingest(logs)
+
+    # Second file is rewritten shorter (e.g. the run was restarted)
+    write(os.path.join(run_dir, "events.out.tfevents.2"), file_version(2.0), scalar(tag, 10, 11.0))
+    store.ingest(logs)
+    assert values(store, "lunar_ppo_safe_1000") == [(1, 1.0), (2, 2.0), (10, 11.0)]
+
+    # Ingesting again changes nothing
+    assert store.ingest(logs) == 0
+    assert len(store.columns["run"]) == 3
+
+
+def test_rewritten_file_of_same_size_is_reread(tmp_path):
+    logs = str(tmp_path / "logs")
+    path = os.path.join(logs, "lunar_lander", "lunar_ppo_safe_1000", "events.out.tfevents.1")
+    tag = "rollout/ep_rew_mean"
+
+    write(path, file_version(1.0), scalar(tag, 1, 1.0), scalar(tag, 2, 2.0))
+    store = ResultsStore(str(tmp_path / "store"))
+    store.ingest(logs)
+
+    write(path, file_version(5.0), scalar(tag, 1, 7.0), scalar(tag, 2, 8.0), scalar(tag, 3, 9.0))
+    store.ingest(logs)
+    assert values(store, "lunar_ppo_safe_1000") == [(1, 7.0), (2, 8.0), (3, 9.0)]
+    assert np.all(np.diff(store.columns["step"]) >= 0)
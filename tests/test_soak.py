@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from src.soak import FailureWindow, P2Quantile, RunningStats, StreamingMetric
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "normal", "exponential"])
+@pytest.mark.parametrize("q", [0.5, 0.9, 0.99])
+def test_p2_quantile_tracks_exact_quantile(distribution, q):
+    rng = np.random.default_rng(0)
+    values = getattr(rng, distribution)(size=20000)
+
+    estimator = P2Quantile(q)
+    for x in values:
+        estimator.add(float(x))
+
+    exact = np.quantile(values, q)
+    spread = np.quantile(values, 0.995) - np.quantile(values, 0.005)
+    assert abs(estimator.value() - exact) < 0.02 * spread
+
+
+def test_p2_quantile_small_samples_are_exact():
+    estimator = P2Quantile(0.5)
+    assert estimator.value() is None
+
+    for x in [5.0, 1.0, 3.0]:
+        estimator.add(x)
+    assert estimator.value() == 3.0
+
+
+def test_p2_quantile_markers_stay_ordered():
+    estimator = P2Quantile(0.9)
+    for x in np.random.default_rng(1).standard_cauchy(size=5000):
+        estimator.add(float(x))
+        assert estimator.heights == sorted(estimator.heights)
+        assert estimator.positions == sorted(estimator.positions)
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(2).normal(3.0, 2.0, size=1000)
+    stats = RunningStats()
+    for x in values:
+        stats.add(float(x))
+
+    assert stats.count == 1000
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std(ddof=1))
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_streaming_metric_summary_keys():
+    metric = StreamingMetric()
+    for x in range(100):
+        metric.add(x)
+    assert set(metric.summary()) == {"count", "mean", "std", "min", "max", "p50", "p90", "p99"}
+
+
+def test_failure_window_alerts_once_per_breach():
+    window = FailureWindow(size=4, threshold=0.5)
+    alerts = []
+    for failed in [1, 1, 1, 0, 1, 1, 0, 0, 0, 0, 1, 1, 1]:
+        window.add(failed)
+        alerts.append(window.check())
+
+    # Breaches once the window is full (index 3), recovers at index 6, breaches again at index 12
+    assert [i for i, alert in enumerate(alerts) if alert] == [3, 12]
+    assert window.rate == 0.75
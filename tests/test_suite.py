@@ -0,0 +1,80 @@
+import argparse
+import json
+
+import pytest
+
+from src.eval import summarize_lunar
+from src.suite import load_seed_bank, merge_shards, parse_shard, seeds_digest, shard_indices
+
+
+def episode(i):
+    return {"episode": i + 1, "seed": 1000 + i, "total_reward": float(i), "crashed": i % 3 == 0, "landed": i % 3 == 1}
+
+
+def write_shards(directory, episodes, count, **header):
+    for index in range(count):
+        indices = shard_indices(episodes, index, count)
+        payload = {
+            "header": {"app": "lunar_lander", "model_digest": "m", "code_version": "c", "seeds_digest": "s",
+                       "episodes": episodes, "shard": [index, count], **header},
+            "episodes": [episode(i) for i in indices],
+        }
+        with open(directory / f"shard_{index:03d}_of_{count:03d}.json", "w") as file:
+            json.dump(payload, file)
+
+
+@pytest.mark.parametrize("episodes,count", [(10, 1), (10, 3), (7, 7), (100, 8)])
+def test_shard_indices_cover_each_episode_once(episodes, count):
+    covered = [i for index in range(count) for i in shard_indices(episodes, index, count)]
+    assert covered == list(range(episodes))
+
+
+def test_parse_shard():
+    assert parse_shard("2/8") == (2, 8)
+    for bad in ["8/8", "-1/4", "a/b", "3"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(bad)
+
+
+def test_seed_bank_is_versioned_and_stable():
+    seeds = load_seed_bank("v1")
+    assert len(seeds) == 1000 and len(set(seeds)) == 1000
+    assert seeds_digest(seeds[:10]) == seeds_digest(list(seeds[:10]))
+    with pytest.raises(ValueError):
+        load_seed_bank("v0")
+
+
+def test_merge_matches_unsharded_results(tmp_path):
+    sharded, whole = tmp_path / "sharded", tmp_path / "whole"
+    sharded.mkdir()
+    whole.mkdir()
+    write_shards(sharded, 10, 3)
+    write_shards(whole, 10, 1)
+
+    _, results, episodes = merge_shards(str(sharded))
+    _, expected, _ = merge_shards(str(whole))
+
+    assert results == expected == {name: float(value) for name, value in summarize_lunar([episode(i) for i in range(10)]).items()}
+    assert [m["episode"] for m in episodes] == list(range(1, 11))
+
+
+def test_merge_refuses_mismatched_or_incomplete_shards(tmp_path):
+    write_shards(tmp_path, 10, 2)
+    header = json.loads((tmp_path / "shard_001_of_002.json").read_text())
+    header["header"]["model_digest"] = "other"
+    (tmp_path / "shard_001_of_002.json").write_text(json.dumps(header))
+    with pytest.raises(ValueError, match="model_digest"):
+        merge_shards(str(tmp_path))
+
+    (tmp_path / "shard_001_of_002.json").unlink()
+    with pytest.raises(ValueError, match="exactly once"):
+        merge_shards(str(tmp_path))
+
+
+def test_merge_picks_one_shard_count(tmp_path):
+    write_shards(tmp_path, 10, 1)
+    write_shards(tmp_path, 10, 4)
+    with pytest.raises(ValueError, match="--shards"):
+        merge_shards(str(tmp_path))
+
+    assert merge_shards(str(tmp_path), count=4)[1] == merge_shards(str(tmp_path), count=1)[1]